@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The AI views (generate_task_ai, run_prompt) are async and stream tokens, so
+serve the project through this entry point (e.g. ``uvicorn config.asgi:application``)
+to keep slow generations from holding a worker thread each. Live board
+updates (taskhero/push.py) only run here; under WSGI (runserver, gunicorn's
+sync workers) the board falls back to plain page loads.
 """
 
 import os
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from django.core.exceptions import ImproperlyConfigured
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +45,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover the rest of the stack
+    'taskhero.instrumentation.PerformanceMiddleware',
+    'taskhero.querybudget.QueryBudgetMiddleware',
+    'taskhero.activity.ActivityBufferMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,7 +62,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for PerformanceMiddleware
+        'BACKEND': 'taskhero.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,19 +76,145 @@ TEMPLATES = [
     },
 ]
 
+# Production: compile each template once per process. Django already wraps
+# the default loaders in the cached loader when 'loaders' isn't set; spelling
+# it out keeps it that way if a loader is ever added here.
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'config.wsgi.application'
+# Event streams (live board updates, streamed generations) need the ASGI
+# entry point, config/asgi.py; see its docstring.
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Pick a profile with the TASKHERO_DB_PROFILE environment variable:
+#   sqlite        (default) plain db.sqlite3 with SQLite's defaults
+#   sqlite-tuned  single-node production: WAL journal, synchronous=NORMAL,
+#                 a busy timeout, mmap/page cache, persistent connections,
+#                 write transactions that take the lock up front (BEGIN IMMEDIATE)
+#                 and retry-on-busy for autocommit writes (taskhero/dbretry.py)
+#   postgres      PostgreSQL through a psycopg connection pool
+#                 (pip install "psycopg[binary,pool]"; POSTGRES_* variables below)
+# `manage.py loadtest` against each profile shows how far one node goes.
+
+TASKHERO_DB_PROFILE = os.environ.get('TASKHERO_DB_PROFILE', 'sqlite')
+
+SQLITE_TUNED_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',      # readers no longer block the writer
+    'PRAGMA synchronous=NORMAL',    # fsync at checkpoints, not every commit (safe with WAL)
+    'PRAGMA mmap_size=268435456',   # 256 MB memory-mapped reads
+    'PRAGMA cache_size=-65536',     # 64 MB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+]
+
+if TASKHERO_DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+elif TASKHERO_DB_PROFILE == 'sqlite-tuned':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': ';'.join(SQLITE_TUNED_PRAGMAS),
+                'timeout': 5,  # seconds to wait on a locked database (busy_timeout)
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+elif TASKHERO_DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'taskhero'),
+            'USER': os.environ.get('POSTGRES_USER', 'taskhero'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0,  # the pool keeps the connections
+            'OPTIONS': {
+                'pool': {'min_size': 2, 'max_size': int(os.environ.get('POSTGRES_POOL_SIZE', 10)), 'timeout': 10},
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f"Unknown TASKHERO_DB_PROFILE {TASKHERO_DB_PROFILE!r}")
+
+# Extra attempts for an autocommit write that hits "database is locked"
+# after the busy timeout (0 disables the retry wrapper).
+TASKHERO_DB_BUSY_RETRIES = 3 if TASKHERO_DB_PROFILE == 'sqlite-tuned' else 0
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; point "default" (or TASKHERO_TASK_CACHE at another
+# alias) to a shared backend such as Redis when running several processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskhero',
+    },
+    # Finished LLM generations: LRU-evicted once MAX_ENTRIES is reached.
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskhero-llm',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 500, 'CULL_FREQUENCY': 10},
+    },
+    # Rendered task cards, keyed on (pk, updated_at); sized for a few large boards.
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskhero-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 10},
+    },
+    # Request latency histograms: one entry per URL name, kept until reset.
+    'metrics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskhero-metrics',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
+TASKHERO_TASK_CACHE = 'default'
+TASKHERO_LLM_CACHE = 'llm'
+TASKHERO_FRAGMENT_CACHE = 'fragments'
+TASKHERO_PERF_CACHE = 'metrics'  # request latency histograms
+
+# Query budgets (see taskhero/querybudget.py): "log", "raise" or None to disable
+TASKHERO_QUERY_BUDGET = 'log' if DEBUG else None
+TASKHERO_QUERY_REPEAT_LIMIT = 10
+
+# Live board updates (taskhero/push.py). The in-process broker only reaches
+# tabs connected to the same server process; use a shared backend with more.
+TASKHERO_PUSH_BROKER = 'taskhero.push.InProcessBroker'
+
+
+# Ollama (local LLM used by the AI task generator and the prompt store)
+# Run `python manage.py ollama_stub` and point OLLAMA_URL at it to work without a model.
+
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
+OLLAMA_DEFAULT_MODEL = os.environ.get('OLLAMA_DEFAULT_MODEL', 'llama3')
+OLLAMA_TIMEOUT = 60  # seconds to wait for the next chunk
+OLLAMA_MAX_CONNECTIONS = 10
+OLLAMA_MAX_CONCURRENCY = 2  # generations run at once by each run_generation_worker
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,162 @@
+"""The task activity feed: an append-only log of what happened to tasks.
+
+``record`` appends one event. Inside ``buffered()``, which
+``ActivityBufferMiddleware`` opens around every request, events are held in
+memory and written with one ``bulk_create`` when the block ends (or every
+``FLUSH_SIZE`` events); outside it they are written at once.
+
+History grows without bound, but reads don't: ``feed`` pages through one
+user's events on the (user, created_at) index with a keyset cursor, and
+``compact`` rolls events past the retention window into per-day
+``ActivityDailySummary`` counts.
+"""
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import ActivityDailySummary, TaskActivity
+from .pagination import paginate
+
+CREATED = "created"
+EDITED = "edited"
+DELETED = "deleted"
+COMPLETED = "marked completed"
+IMPORTED = "imported"
+AI_CREATED = "created by AI"
+
+FLUSH_SIZE = 500
+FEED_KEYSET = ("-created_at", "-pk")
+FEED_PAGE_SIZE = 50
+FEED_FIELDS = ("pk", "action", "task_id", "task_title", "created_at")
+RETENTION_DAYS = 90
+
+_buffer = ContextVar("taskhero_activity_buffer", default=None)
+
+
+def record(task, action, user=None, link=True):
+    """Append an event about ``task`` (a Task, or any row with ``pk`` and
+    ``title``). ``user`` defaults to the task's owner; pass ``link=False`` for
+    a task that is about to be deleted."""
+    event = TaskActivity(
+        task_id=task.pk if link else None,
+        task_title=task.title,
+        user_id=user.pk if user is not None else getattr(task, "owner_id", None),
+        action=action,
+    )
+    events = _buffer.get()
+    if events is None:
+        flush([event])
+        return
+    events.append(event)
+    if len(events) >= FLUSH_SIZE:
+        flush(events)
+
+
+def flush(events):
+    if events:
+        TaskActivity.objects.bulk_create(events, batch_size=FLUSH_SIZE)
+        events.clear()
+
+
+@contextmanager
+def buffered():
+    """Hold events recorded in the block and write them in bulk at the end.
+    Nested blocks leave the flushing to the outermost one."""
+    if _buffer.get() is not None:
+        yield
+        return
+    events = []
+    token = _buffer.set(events)
+    try:
+        yield
+    finally:
+        _buffer.reset(token)
+        flush(events)
+
+
+class ActivityBufferMiddleware:
+    """Buffer each request's activity events into one INSERT.
+
+    The events are dropped if the view raised (a 5xx response by the time it
+    gets here): whatever they describe most likely didn't happen.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        events = []
+        token = _buffer.set(events)
+        try:
+            response = self.get_response(request)
+        finally:
+            _buffer.reset(token)
+        if response.status_code < 500:
+            flush(events)
+        return response
+
+    async def __acall__(self, request):
+        events = []
+        token = _buffer.set(events)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _buffer.reset(token)
+        if events and response.status_code < 500:
+            await sync_to_async(flush)(events)
+        return response
+
+
+def feed(user, cursor=None, limit=FEED_PAGE_SIZE):
+    """One page of ``user``'s events, newest first: ``(rows, next_cursor)``.
+    May raise ``pagination.InvalidCursor``."""
+    events = TaskActivity.objects.filter(user=user).values_list(*FEED_FIELDS, named=True)
+    return paginate(events, FEED_KEYSET, cursor, limit)
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
+
+
+def compact(keep_days=RETENTION_DAYS, now=None):
+    """Roll events older than ``keep_days`` (whole days, in the current time
+    zone) into ``ActivityDailySummary`` rows, one day per transaction.
+    Returns the number of events removed."""
+    cutoff, _ = _day_bounds(timezone.localdate(now) - datetime.timedelta(days=keep_days))
+    removed = 0
+    while True:
+        oldest = (
+            TaskActivity.objects.filter(created_at__lt=cutoff)
+            .order_by("created_at").values_list("created_at", flat=True).first()
+        )
+        if oldest is None:
+            return removed
+        day = timezone.localdate(oldest)
+        start, end = _day_bounds(day)
+        with transaction.atomic():
+            events = TaskActivity.objects.filter(created_at__gte=start, created_at__lt=min(end, cutoff))
+            counts = events.order_by().values("user_id", "action").annotate(n=Count("pk"))
+            summaries = {(s.user_id, s.action): s for s in ActivityDailySummary.objects.filter(day=day)}
+            new = []
+            for row in counts:
+                summary = summaries.get((row["user_id"], row["action"]))
+                if summary is None:
+                    new.append(ActivityDailySummary(user_id=row["user_id"], day=day, action=row["action"], count=row["n"]))
+                else:
+                    summary.count += row["n"]
+            ActivityDailySummary.objects.bulk_create(new)
+            ActivityDailySummary.objects.bulk_update(summaries.values(), ["count"])
+            removed += events.delete()[0]
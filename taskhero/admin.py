@@ -1,14 +1,84 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Task, SavedPrompt
+from .models import (
+    Task, SavedPrompt, GenerationJob, UserProfile, TaskActivity, ActivityDailySummary, RecurrenceRule,
+)
+from .search import get_backend as get_search_backend
 
-admin.site.register(SavedPrompt)
+
+class FullTextSearchMixin:
+    """Route the admin search box through the full-text index instead of
+    ``icontains`` over every ``search_fields`` column."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        matches = get_search_backend(queryset.db).filter(queryset, search_term)
+        return matches, False
+
+
+@admin.register(SavedPrompt)
+class SavedPromptAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'owner', 'updated_at')
+    search_fields = ('title', 'prompt')
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
-    list_display = ('title', 'owner', 'status', 'priority', 'due_date', 'is_overdue')
+class TaskAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'owner', 'status', 'priority', 'due_date', 'overdue')
     list_filter = ('status', 'priority', 'owner')
     search_fields = ('title', 'description', 'owner__username')
     readonly_fields = ('created_at', 'updated_at')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_overdue()
+
+    @admin.display(boolean=True, ordering='overdue_now', description='Is overdue')
+    def overdue(self, obj):
+        return obj.overdue_now
+
+    def get_search_results(self, request, queryset, search_term):
+        matches, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term.strip():
+            # owners aren't in the text index; usernames live in the (small) user table
+            matches = matches | queryset.filter(owner__username__icontains=search_term.strip())
+        return matches, may_have_duplicates
+
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'owner', 'model', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'model')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'timezone')
+    search_fields = ('user__username',)
+
+
+@admin.register(TaskActivity)
+class TaskActivityAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'user', 'action', 'task_title', 'task')
+    list_filter = ('action',)
+    # the changelist count would scan the whole (unbounded) log
+    show_full_result_count = False
+    raw_id_fields = ('task', 'user')
+
+
+@admin.register(ActivityDailySummary)
+class ActivityDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('day', 'user', 'action', 'count')
+    list_filter = ('action',)
+    date_hierarchy = 'day'
+
+
+@admin.register(RecurrenceRule)
+class RecurrenceRuleAdmin(admin.ModelAdmin):
+    list_display = ('title', 'owner', 'freq', 'interval', 'starts_on', 'materialized_through', 'finished')
+    list_filter = ('freq', 'finished')
+    search_fields = ('title', 'owner__username')
+    readonly_fields = ('materialized_through', 'materialized_count', 'finished', 'created_at')
+    raw_id_fields = ('owner',)
@@ -0,0 +1,64 @@
+"""Turn an AI task plan into Task rows.
+
+The model is asked for JSON (Ollama's ``format: "json"``). Each item is
+validated with ``TaskForm`` and all valid items are inserted with one
+``bulk_create``; invalid ones are reported by index and skipped.
+"""
+import json
+
+from . import activity
+from .forms import TaskForm, task_form_data
+from .models import Task
+from .signals import tasks_bulk_changed
+
+TASK_PLAN_PROMPT = (
+    "Generate a list of tasks based on: {prompt}\n"
+    'Reply with JSON only, shaped as {{"tasks": [{{"title": str, "description": str, '
+    '"priority": "HIGH"|"MEDIUM"|"LOW", "status": "TODO"|"IN_PROGRESS"|"COMPLETED", '
+    '"due_date": "YYYY-MM-DD" or null}}]}}.'
+)
+
+
+class TaskPlanError(ValueError):
+    pass
+
+
+def parse_task_plan(text):
+    """Return the list of task items in the model's reply."""
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise TaskPlanError("The model did not return valid JSON") from e
+    if isinstance(data, dict):
+        data = data.get("tasks")
+    if not isinstance(data, list):
+        raise TaskPlanError('Expected a list of tasks or {"tasks": [...]}')
+    return data
+
+
+def create_tasks(owner, items):
+    """Validate ``items`` and insert the valid ones in a single batch.
+
+    Returns ``{"created": [{id, title}], "errors": [{index, errors}]}``.
+    """
+    tasks = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "errors": {"__all__": ["Expected an object"]}})
+            continue
+        form = TaskForm(data=task_form_data(item))
+        if not form.is_valid():
+            errors.append({"index": index, "errors": form.errors.get_json_data()})
+            continue
+        task = form.save(commit=False)
+        task.owner = owner
+        tasks.append(task)
+
+    if tasks:
+        Task.objects.bulk_create(tasks)
+        with activity.buffered():
+            for task in tasks:
+                activity.record(task, activity.AI_CREATED)
+        tasks_bulk_changed.send(sender=Task, action="create", task_ids=[t.pk for t in tasks], owner_ids={owner.pk})
+    return {"created": [{"id": t.pk, "title": t.title} for t in tasks], "errors": errors}
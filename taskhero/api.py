@@ -0,0 +1,332 @@
+"""Versioned JSON API (``/api/v1/``) for tasks and saved prompts.
+
+Collections page with keyset cursors (``?cursor=&limit=``) and take
+``?fields=id,title,...`` to return only some fields; tasks also filter by
+``?status=``, ``?priority=`` and ``?overdue=1``. Items support GET, PUT
+(missing fields take their defaults), PATCH and DELETE; collections accept
+POST; a task POSTed with an ``rrule`` starts a repeating series.
+``tasks/changes/`` serves delta sync (see ``taskhero.sync``).
+
+Collection and item GETs answer with a strong ``ETag`` and a ``Last-Modified`` taken from
+``updated_at``. A collection's version is one aggregate query (row count and
+newest ``updated_at``), so a matching ``If-None-Match`` gets ``304 Not
+Modified`` before any row is fetched or serialized. Deletes don't move
+``updated_at``, so collections only honour ``If-None-Match``; items also
+honour ``If-Modified-Since``, and ``If-Match`` on a write turns a lost update
+into ``412 Precondition Failed``.
+
+Authentication is the session, like the rest of the site, so writes need the
+CSRF token (``X-CSRFToken``).
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.forms.models import model_to_dict
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import activity, recurrence, sync
+from .forms import SavedPromptForm, TaskForm
+from .models import SavedPrompt, Task
+from .pagination import TASK_KEYSET, InvalidCursor, paginate
+from .querybudget import query_budget
+
+API_VERSION = "v1"
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# API field name -> model attribute
+TASK_FIELDS = {
+    "id": "pk", "title": "title", "description": "description", "due_date": "due_date",
+    "status": "status", "priority": "priority", "created_at": "created_at", "updated_at": "updated_at",
+    "recurrence_id": "recurrence_id",
+}
+PROMPT_FIELDS = {"id": "pk", "title": "title", "prompt": "prompt", "created_at": "created_at", "updated_at": "updated_at"}
+PROMPT_KEYSET = ("-updated_at", "-pk")  # SavedPrompt.Meta.ordering plus a tie-breaker
+
+_TRUE = {"1", "true", "yes"}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def api_view(*methods):
+    """JSON errors instead of redirects and HTML: 401 when logged out, 405
+    for other methods, ``ApiError``/``InvalidCursor`` as 4xx."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = JsonResponse({"ok": False, "error": "Method not allowed"}, status=405)
+                response["Allow"] = ", ".join(methods)
+                return response
+            if not request.user.is_authenticated:
+                return JsonResponse({"ok": False, "error": "Authentication required"}, status=401)
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as e:
+                return JsonResponse({"ok": False, "error": str(e), **e.extra}, status=e.status)
+            except InvalidCursor as e:
+                return JsonResponse({"ok": False, "error": str(e)}, status=400)
+            except Http404:
+                return JsonResponse({"ok": False, "error": "Not found"}, status=404)
+
+        return wrapper
+
+    return decorator
+
+
+# Helpers
+
+def _selected_fields(request, allowed):
+    raw = request.GET.get("fields")
+    names = list(dict.fromkeys(name.strip() for name in (raw or "").split(",") if name.strip()))
+    if not names:
+        return list(allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}", allowed=list(allowed))
+    return names
+
+
+def _limit(request, default=PAGE_SIZE):
+    try:
+        limit = int(request.GET.get("limit", default))
+    except ValueError:
+        raise ApiError("limit must be an integer")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _serialize(obj, fields, allowed):
+    return {name: getattr(obj, allowed[name]) for name in fields}
+
+
+def _etag(*parts):
+    raw = "|".join(str(part) for part in (API_VERSION,) + parts)
+    return '"%s"' % hashlib.sha1(raw.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def _conditional(request, etag, last_modified, respond, honour_last_modified=True):
+    """``respond()``, unless the request's preconditions answer first (304/412).
+    Safe responses carry the validators."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp if honour_last_modified else None,
+    )
+    if response is None:
+        response = respond()
+    if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+    return response
+
+
+def _collection(request, queryset, keyset, allowed, *version):
+    """One page of ``queryset`` as JSON, or 304 if the client's copy is current."""
+    fields = _selected_fields(request, allowed)
+    limit = _limit(request)
+    state = queryset.order_by().aggregate(count=Count("pk"), last=Max("updated_at"))
+    last = state["last"]
+    etag = _etag(request.GET.urlencode(), state["count"], last.isoformat() if last else "", *version)
+
+    def respond():
+        columns = dict.fromkeys([allowed[name] for name in fields] + [name.lstrip("-") for name in keyset])
+        rows, next_cursor = paginate(
+            queryset.values_list(*columns, named=True), keyset, request.GET.get("cursor"), limit,
+        )
+        return JsonResponse({
+            "ok": True,
+            "results": [_serialize(row, fields, allowed) for row in rows],
+            "next_cursor": next_cursor,
+        })
+
+    return _conditional(request, etag, last, respond, honour_last_modified=False)
+
+
+def _item_etag(request, obj):
+    return _etag(request.GET.get("fields", ""), obj.pk, obj.updated_at.isoformat())
+
+
+def _item(request, obj, allowed, respond):
+    fields = _selected_fields(request, allowed)
+    return _conditional(request, _item_etag(request, obj), obj.updated_at, lambda: respond(obj, fields))
+
+
+def _payload(request):
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, ValueError):
+        raise ApiError("Invalid JSON")
+    if not isinstance(payload, dict):
+        raise ApiError("Expected a JSON object")
+    return payload
+
+
+def _form_data(request, form_class, allowed, instance=None, extra=()):
+    """Form data from the JSON body. PATCH starts from ``instance``, POST and
+    PUT from the model defaults. Read-only fields and ``extra`` are ignored."""
+    payload = _payload(request)
+    writable = form_class._meta.fields
+    unknown = [name for name in payload if name not in writable and name not in allowed and name not in extra]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}", allowed=list(writable))
+    base = instance if request.method == "PATCH" else form_class._meta.model()
+    data = model_to_dict(base, fields=writable)
+    data.update({name: payload[name] for name in writable if name in payload})
+    return {name: "" if value is None else value for name, value in data.items()}
+
+
+def _invalid(form):
+    return JsonResponse({"ok": False, "errors": form.errors.get_json_data()}, status=400)
+
+
+# Tasks
+
+def _task_response(task, fields, status=200):
+    return JsonResponse({"ok": True, "task": _serialize(task, fields, TASK_FIELDS)}, status=status)
+
+
+def _task_filters(request, tasks):
+    status = request.GET.get("status")
+    if status:
+        if status not in dict(Task.STATUS_CHOICES):
+            raise ApiError(f"Unknown status {status!r}")
+        tasks = tasks.by_status(status)
+    priority = request.GET.get("priority")
+    if priority:
+        if priority not in dict(Task.PRIORITY_CHOICES):
+            raise ApiError(f"Unknown priority {priority!r}")
+        tasks = tasks.filter(priority=priority)
+    if request.GET.get("overdue", "").lower() in _TRUE:
+        today = timezone.localdate()
+        return tasks.overdue(today), today  # the result changes at midnight, so does the ETag
+    return tasks, None
+
+
+@query_budget(23)  # as task_create
+@api_view("GET", "HEAD", "POST")
+def tasks(request):
+    if request.method == "POST":
+        form = TaskForm(_form_data(request, TaskForm, TASK_FIELDS, extra=("rrule",)))
+        if not form.is_valid():
+            return _invalid(form)
+        task = form.save(commit=False)
+        task.owner = request.user
+        rrule = _payload(request).get("rrule")
+        if rrule:  # e.g. "FREQ=WEEKLY;BYDAY=MO,TH": the first of a series, see taskhero.recurrence
+            try:
+                recurrence.start(task, **recurrence.parse_rrule(rrule))
+            except ValueError as e:
+                raise ApiError(str(e))
+        else:
+            task.save()
+        activity.record(task, activity.CREATED, request.user)
+        response = _task_response(task, list(TASK_FIELDS), status=201)
+        response["Location"] = reverse("taskhero:api_task", args=[task.pk])
+        return response
+
+    queryset, today = _task_filters(request, Task.objects.for_user(request.user))
+    return _collection(request, queryset, TASK_KEYSET, TASK_FIELDS, today or "")
+
+
+@query_budget(12)  # as task_delete: stats, tombstone and push updates
+@api_view("GET", "HEAD", "PUT", "PATCH", "DELETE")
+def task(request, pk):
+    task = get_object_or_404(Task, pk=pk, owner=request.user)
+
+    def respond(task, fields):
+        if request.method == "DELETE":
+            activity.record(task, activity.DELETED, request.user, link=False)
+            task.delete()
+            return JsonResponse({"ok": True})
+        if request.method in ("PUT", "PATCH"):
+            form = TaskForm(_form_data(request, TaskForm, TASK_FIELDS, task), instance=task)
+            if not form.is_valid():
+                return _invalid(form)
+            form.save()
+            activity.record(task, activity.EDITED, request.user)
+            response = _task_response(task, fields)
+            response["ETag"] = _item_etag(request, task)
+            return response
+        return _task_response(task, fields)
+
+    return _item(request, task, TASK_FIELDS, respond)
+
+
+@query_budget(5)
+@api_view("GET")
+def task_changes(request):
+    """Delta sync (see taskhero/sync.py): tasks changed and ids deleted since
+    ``?since=<token>``; without one, a snapshot. 410 when the token expired."""
+    fields = _selected_fields(request, TASK_FIELDS)
+    try:
+        changed, deleted, token, has_more = sync.changes(
+            request.user, request.GET.get("since"), [TASK_FIELDS[name] for name in fields],
+            min(_limit(request, sync.SYNC_PAGE_SIZE), sync.SYNC_PAGE_SIZE),
+        )
+    except sync.TokenExpired as e:
+        raise ApiError(str(e), status=410)
+    return JsonResponse({
+        "ok": True,
+        "changed": [_serialize(row, fields, TASK_FIELDS) for row in changed],
+        "deleted": deleted,
+        "next_token": token,
+        "has_more": has_more,
+    })
+
+
+# Saved prompts
+
+def _prompt_response(prompt, fields, status=200):
+    return JsonResponse({"ok": True, "prompt": _serialize(prompt, fields, PROMPT_FIELDS)}, status=status)
+
+
+@query_budget(4)
+@api_view("GET", "HEAD", "POST")
+def prompts(request):
+    if request.method == "POST":
+        form = SavedPromptForm(_form_data(request, SavedPromptForm, PROMPT_FIELDS))
+        if not form.is_valid():
+            return _invalid(form)
+        prompt = form.save(commit=False)
+        prompt.owner = request.user
+        prompt.save()
+        response = _prompt_response(prompt, list(PROMPT_FIELDS), status=201)
+        response["Location"] = reverse("taskhero:api_prompt", args=[prompt.pk])
+        return response
+
+    return _collection(request, SavedPrompt.objects.filter(owner=request.user), PROMPT_KEYSET, PROMPT_FIELDS)
+
+
+@query_budget(4)
+@api_view("GET", "HEAD", "PUT", "PATCH", "DELETE")
+def prompt(request, pk):
+    prompt = get_object_or_404(SavedPrompt, pk=pk, owner=request.user)
+
+    def respond(prompt, fields):
+        if request.method == "DELETE":
+            prompt.delete()
+            return JsonResponse({"ok": True})
+        if request.method in ("PUT", "PATCH"):
+            form = SavedPromptForm(_form_data(request, SavedPromptForm, PROMPT_FIELDS, prompt), instance=prompt)
+            if not form.is_valid():
+                return _invalid(form)
+            form.save()
+            response = _prompt_response(prompt, fields)
+            response["ETag"] = _item_etag(request, prompt)
+            return response
+        return _prompt_response(prompt, fields)
+
+    return _item(request, prompt, PROMPT_FIELDS, respond)
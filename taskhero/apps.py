@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class TaskheroConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'taskhero'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .dbretry import install_busy_retry
+        from .instrumentation import install_db_instrumentation
+
+        connection_created.connect(install_db_instrumentation, dispatch_uid="taskhero_db_instrumentation")
+        connection_created.connect(install_busy_retry, dispatch_uid="taskhero_db_busy_retry")
@@ -0,0 +1,223 @@
+"""Reproducible benchmarks for the task views and queries.
+
+``seed`` fills the database with ``users x tasks x activities`` rows through
+``bulk_create`` (benchmark users are named ``bench<N>`` and replaced on every
+run). ``run_benchmarks`` times the hot paths against the first of them and
+returns plain dicts that ``manage.py benchmark`` writes as JSON; ``compare``
+checks a run against an earlier one so CI can fail on regressions.
+"""
+import datetime
+import json
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from . import views
+from .board import grouped_tasks, render_cards
+from .cache import invalidate_user_tasks
+from .instrumentation import observe_queries
+from .models import SavedPrompt, Task, TaskActivity
+from .querybudget import QueryLog
+from .signals import tasks_bulk_changed
+
+BENCH_USER_PREFIX = "bench"
+BENCH_PASSWORD = "bench-password"
+PROMPTS_PER_USER = 5
+
+_WORDS = (
+    "draft review plan ship fix refactor deploy write test call email update design "
+    "report budget invoice sprint roadmap backlog meeting release docs migrate"
+).split()
+
+
+def clear(prefix=BENCH_USER_PREFIX):
+    """Remove benchmark users and everything they own."""
+    owners = User.objects.filter(username__regex=rf"^{prefix}[0-9]+$")
+    Task.objects.filter(owner__in=owners).bulk_delete()
+    owners.delete()
+
+
+def seed(users=10, tasks=200, activities=2, prefix=BENCH_USER_PREFIX, seed=0, batch_size=1000):
+    """Create ``users`` users with ``tasks`` tasks each and ``activities`` activity
+    rows per task. The same ``seed`` always produces the same data."""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    clear(prefix)
+
+    password = make_password(BENCH_PASSWORD)  # hash once, it is deliberately slow
+    owners = User.objects.bulk_create([User(username=f"{prefix}{i}", password=password) for i in range(users)])
+    SavedPrompt.objects.bulk_create(
+        [
+            SavedPrompt(owner=owner, title=f"Prompt {n}", prompt=" ".join(rng.choices(_WORDS, k=12)))
+            for owner in owners for n in range(PROMPTS_PER_USER)
+        ],
+        batch_size=batch_size,
+    )
+
+    task_ids = []
+    for owner in owners:
+        created = Task.objects.bulk_create(
+            [
+                Task(
+                    owner=owner,
+                    title=" ".join(rng.choices(_WORDS, k=3)).capitalize(),
+                    description=" ".join(rng.choices(_WORDS, k=20)),
+                    priority=rng.choice(Task.PRIORITY_CHOICES)[0],
+                    status=rng.choice(Task.STATUS_CHOICES)[0],
+                    due_date=None if rng.random() < 0.1 else today + datetime.timedelta(days=rng.randint(-30, 30)),
+                )
+                for _ in range(tasks)
+            ],
+            batch_size=batch_size,
+        )
+        TaskActivity.objects.bulk_create(
+            [
+                TaskActivity(
+                    task=task, task_title=task.title, user=owner,
+                    action=rng.choice(["created", "marked completed", "edited"]),
+                )
+                for task in created for _ in range(activities)
+            ],
+            batch_size=batch_size,
+        )
+        task_ids.extend(task.pk for task in created)
+
+    tasks_bulk_changed.send(sender=Task, action="seed", task_ids=task_ids, owner_ids={o.pk for o in owners})
+    return owners
+
+
+def summarize(samples):
+    """Latency summary (milliseconds) of ``samples`` given in seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def measure(fn, repeat=20, warmup=2):
+    """Time ``fn()`` ``repeat`` times; also count the queries of one call."""
+    for _ in range(warmup):
+        fn()
+    log = QueryLog()
+    with observe_queries(log):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {**summarize(samples), "queries": log.count}
+
+
+def _request(user, method="get", path="/", data=None):
+    factory = RequestFactory()
+    if method == "post":
+        request = factory.post(path, json.dumps(data), content_type="application/json")
+    else:
+        request = factory.get(path, data)
+    request.user = user or AnonymousUser()
+    request.session = {}
+    return request
+
+
+def _render(response):
+    if response.status_code >= 400:
+        raise AssertionError(f"benchmark request failed with {response.status_code}: {response.content[:200]!r}")
+    return response
+
+
+def benchmarks(user):
+    """``{name: callable}`` for every micro-benchmark, run as ``user``."""
+
+    def task_list_grouping():
+        grouped_tasks(Task.objects.for_user(user))
+
+    def card_rendering():
+        # all of the user's cards; after the warm-up runs, fragment-cache hits
+        render_cards(Task.objects.for_user(user).card())
+
+    def dashboard_view():
+        invalidate_user_tasks(user.pk)  # measure the uncached path
+        _render(views.dashboard_view(_request(user, path="/dashboard/")))
+
+    def dashboard_view_cached():
+        _render(views.dashboard_view(_request(user, path="/dashboard/")))
+
+    def overdue_for_user():
+        list(Task.objects.for_user(user).overdue())
+
+    def overdue_count_all():
+        Task.objects.overdue().count()
+
+    def prompt_crud():
+        created = json.loads(_render(views.save_prompt(
+            _request(user, "post", "/prompts/save/", {"title": "Bench", "prompt": "Plan my week"})
+        )).content)["prompt"]
+        _render(views.save_prompt(
+            _request(user, "post", "/prompts/save/", {"id": created["id"], "title": "Bench", "prompt": "Plan my month"})
+        ))
+        _render(views.prompt_store_page(_request(user, path="/prompts/")))
+        _render(views.delete_prompt(_request(user, "post", "/prompts/delete/", {"id": created["id"]})))
+
+    return {
+        "task_list_grouping": task_list_grouping,
+        "card_rendering": card_rendering,
+        "dashboard_view": dashboard_view,
+        "dashboard_view_cached": dashboard_view_cached,
+        "overdue_for_user": overdue_for_user,
+        "overdue_count_all": overdue_count_all,
+        "prompt_crud": prompt_crud,
+    }
+
+
+def run_benchmarks(repeat=20, prefix=BENCH_USER_PREFIX, only=None):
+    user = User.objects.filter(username=f"{prefix}0").first()
+    if user is None:
+        raise LookupError(f"No benchmark data; seed it first (user {prefix}0 is missing)")
+    results = {}
+    for name, fn in benchmarks(user).items():
+        if only and name not in only:
+            continue
+        results[name] = measure(fn, repeat)
+    return {
+        "meta": {
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "db_profile": getattr(settings, "TASKHERO_DB_PROFILE", None),
+            "users": User.objects.filter(username__regex=rf"^{prefix}[0-9]+$").count(),
+            "tasks_per_user": Task.objects.for_user(user).count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.25, metric="p50_ms", min_delta_ms=1.0):
+    """Regressions of ``current`` against ``baseline`` (both as written by
+    ``run_benchmarks`` or ``loadtest.run_load``): any ``metric`` more than
+    ``threshold`` and ``min_delta_ms`` slower, or any increase in query count.
+    The absolute floor keeps sub-millisecond jitter from failing a build."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        slower = result[metric] - before.get(metric, result[metric])
+        if before.get(metric) and slower > before[metric] * threshold and slower > min_delta_ms:
+            regressions.append(
+                f"{name}: {metric} {result[metric]} > {before[metric]} (+{result[metric] / before[metric] - 1:.0%})"
+            )
+        if "queries" in result and "queries" in before and result["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries {result['queries']} > {before['queries']}")
+    return regressions
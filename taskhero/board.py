@@ -0,0 +1,164 @@
+"""Grouping engine for the task board (``task_list``).
+
+The database does the heavy lifting: it orders the user's tasks by
+(priority, status) and counts each group, so Python only walks the ordered
+rows once to build the nested structure the template renders.
+
+Each (priority, status) column only carries its first ``BOARD_PAGE_SIZE``
+cards; the rest are fetched with a keyset cursor through ``board_column``.
+
+Cards are rendered by ``render_cards``, which caches each card's HTML under
+(pk, updated_at): after an edit only the changed cards render again, however
+many the board holds. Colors come from the lookup tables below rather than
+``{% if %}`` chains in the templates.
+"""
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import connection
+from django.db.models import Case, Count, F, IntegerField, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .cache import cached_fragments
+from .models import Task
+from .pagination import TASK_KEYSET, encode_cursor, paginate
+
+PRIORITY_ORDER = ["HIGH", "MEDIUM", "LOW"]
+STATUS_ORDER = ["TODO", "IN_PROGRESS", "COMPLETED", "CANCELLED"]
+UNSPECIFIED = "UNSPECIFIED"
+BOARD_PAGE_SIZE = 12
+
+PRIORITY_HEADER_CLASSES = {priority: f"text-{color}-600" for priority, color in Task.PRIORITY_COLORS.items()}
+DEFAULT_HEADER_CLASS = "text-gray-800"
+STATUS_BADGE_CLASSES = {
+    "COMPLETED": "bg-green-50 text-green-700",
+    "IN_PROGRESS": "bg-yellow-50 text-yellow-800",
+    "IN PROGRESS": "bg-yellow-50 text-yellow-800",
+}
+DEFAULT_BADGE_CLASS = "bg-gray-50 text-gray-700"
+
+CARD_TEMPLATE = "taskhero/_task_card.html"
+CARD_CACHE_VERSION = 2  # bump when the card template changes
+
+
+def null_due_sort_key():
+    """What a card without a due date has in its ``data-sort`` (compared as a
+    string by the live board), so it lands where the database orders NULLs:
+    before every date (SQLite) or after them (PostgreSQL)."""
+    return "9999-99-99" if connection.features.nulls_order_largest else "0000-00-00"
+
+
+def _rank(field, order):
+    """SQL expression ranking ``field`` by ``order``; unknown values sort after
+    the known ones and blank values sort last."""
+    whens = [When(**{field: value}, then=Value(i)) for i, value in enumerate(order)]
+    whens.append(When(**{field: ""}, then=Value(len(order) + 1)))
+    return Case(*whens, default=Value(len(order)), output_field=IntegerField())
+
+
+def status_label(status):
+    return status.replace("_", " ").title()  # e.g. IN_PROGRESS -> In Progress
+
+
+def status_badge(status):
+    """What a card's status badge shows: ``{status, status_label, badge_class}``."""
+    return {
+        "status": status,
+        "status_label": status_label(status),
+        "badge_class": STATUS_BADGE_CLASSES.get(status, DEFAULT_BADGE_CLASS),
+    }
+
+
+def group_counts(queryset):
+    """Return {(priority, status): count} from a single GROUP BY query."""
+    rows = queryset.order_by().values("priority", "status").annotate(count=Count("pk"))
+    return {(row["priority"], row["status"]): row["count"] for row in rows}
+
+
+def _status_group(status, count, tasks):
+    group = {
+        **status_badge(status or UNSPECIFIED),
+        "count": count,
+        "tasks": tasks,
+        "next_cursor": None,
+    }
+    if tasks and count > len(tasks):
+        group["next_cursor"] = encode_cursor(tasks[-1], TASK_KEYSET)
+    return group
+
+
+def grouped_tasks(queryset, per_group=BOARD_PAGE_SIZE, chunk_size=2000):
+    """Build ``[{priority, header_class, statuses: [{status, status_label, badge_class, count, tasks, next_cursor}]}]``.
+
+    Two queries regardless of how many tasks the user owns: one aggregate for
+    the counts and one ordered scan, limited to the first ``per_group`` rows
+    of every column with ``ROW_NUMBER()``, that is streamed with ``iterator()``.
+    """
+    counts = group_counts(queryset)
+    if not counts:
+        return []
+
+    rows = (
+        queryset
+        .annotate(
+            priority_rank=_rank("priority", PRIORITY_ORDER),
+            status_rank=_rank("status", STATUS_ORDER),
+            column_row=Window(RowNumber(), partition_by=[F("priority"), F("status")], order_by=list(TASK_KEYSET)),
+        )
+        .filter(column_row__lte=per_group)
+        .order_by("priority_rank", "priority", "status_rank", "status", *TASK_KEYSET)
+        .card()
+        .iterator(chunk_size=chunk_size)
+    )
+
+    board = []
+    for priority, pr_tasks in groupby(rows, key=attrgetter("priority")):
+        statuses = [
+            _status_group(status, counts.get((priority, status), 0), list(items))
+            for status, items in groupby(pr_tasks, key=attrgetter("status"))
+        ]
+        board.append({
+            "priority": priority or UNSPECIFIED,
+            "header_class": PRIORITY_HEADER_CLASSES.get(priority, DEFAULT_HEADER_CLASS),
+            "statuses": statuses,
+        })
+    return board
+
+
+def render_board(board):
+    """Add ``cards``, the rendered HTML of each column's tasks, to a ``grouped_tasks`` board."""
+    for group in board:
+        for status_group in group["statuses"]:
+            status_group["cards"] = render_cards(status_group["tasks"])
+    return board
+
+
+def _card_key(card):
+    return f"taskhero:card:{CARD_CACHE_VERSION}:{card.pk}:{card.updated_at.isoformat()}"
+
+
+def render_cards(cards):
+    """The HTML of each of ``cards`` (``Task.objects.card()`` rows), from the
+    fragment cache where possible."""
+    cards = {_card_key(card): card for card in cards}
+
+    def render(keys):
+        template = get_template(CARD_TEMPLATE)
+        null_due = null_due_sort_key()
+        return {
+            key: template.render({
+                "task": cards[key], "status_group": status_badge(cards[key].status), "null_due_sort_key": null_due,
+            })
+            for key in keys
+        }
+
+    html = cached_fragments(list(cards), render)
+    return [mark_safe(html[key]) for key in cards]
+
+
+def board_column(queryset, priority, status, cursor=None, per_group=BOARD_PAGE_SIZE):
+    """Next page of one board column: ``(cards, next_cursor)``."""
+    column = queryset.filter(priority=priority, status=status).card()
+    return paginate(column, TASK_KEYSET, cursor, per_group)
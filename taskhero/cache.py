@@ -0,0 +1,78 @@
+"""Per-user cache for task pages (board, dashboard, recent tasks).
+
+Entries are keyed on a per-user version number. Any change to one of the
+user's tasks bumps the version (see ``taskhero.signals``), which orphans the
+old entries instead of having to find and delete them one by one.
+
+Rendered fragments (``cached_fragments``) are instead keyed on what they
+show, e.g. a card on its task's (pk, updated_at), so they outlive those
+version bumps; an outdated one is just never asked for again and expires.
+They live in the ``TASKHERO_FRAGMENT_CACHE`` alias, sized for many small
+entries.
+
+The page cache is whatever Django cache alias ``TASKHERO_TASK_CACHE`` names
+(``"default"`` unless configured), so local memory in development and a
+shared cache such as Redis or Memcached in production.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+TASK_CACHE_TIMEOUT = 300
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+_MISSING = object()
+
+
+def _cache():
+    return caches[getattr(settings, "TASKHERO_TASK_CACHE", "default")]
+
+
+def _version_key(user_id):
+    return f"taskhero:tasks:version:{user_id}"
+
+
+def tasks_version(user_id):
+    """Current cache version for the user's tasks."""
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # Start from the clock, not 1, so a version key that was evicted can't
+        # bring back entries written under an older version.
+        cache.add(_version_key(user_id), time.time_ns(), None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def invalidate_user_tasks(user_id):
+    """Drop every cached page built from the user's tasks."""
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def cached_for_user(user_id, name, builder, timeout=TASK_CACHE_TIMEOUT):
+    """Return the cached value of ``builder()`` for this user, computing it on a miss."""
+    cache = _cache()
+    key = f"taskhero:tasks:{user_id}:{tasks_version(user_id)}:{name}"
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+def cached_fragments(keys, render, timeout=FRAGMENT_CACHE_TIMEOUT):
+    """``{key: fragment}`` for ``keys``: one ``get_many`` for the hits, then
+    ``render(missing_keys)`` (returning a dict) and one ``set_many`` for the rest."""
+    cache = caches[getattr(settings, "TASKHERO_FRAGMENT_CACHE", "default")]
+    fragments = cache.get_many(keys)
+    missing = [key for key in keys if key not in fragments]
+    if missing:
+        rendered = render(missing)
+        cache.set_many(rendered, timeout)
+        fragments.update(rendered)
+    return fragments
@@ -0,0 +1,68 @@
+"""Retry SQLite writes that fail with "database is locked".
+
+SQLite has one writer at a time. With the ``sqlite-tuned`` profile a writer
+already waits up to ``OPTIONS["timeout"]`` seconds for the lock; this covers
+what is left when a burst outlasts that. A single statement is only retried
+in autocommit mode: inside ``atomic()`` the whole transaction has to start
+over, so wrap the function that opens it with ``retry_on_busy`` instead.
+"""
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+BUSY_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_busy(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc) for message in BUSY_MESSAGES)
+
+
+def _retries():
+    return getattr(settings, "TASKHERO_DB_BUSY_RETRIES", 0)
+
+
+def _backoff(attempt):
+    time.sleep(min(0.05 * 2 ** attempt, 1.0) * random.uniform(0.5, 1.0))
+
+
+def _retry_wrapper(execute, sql, params, many, context):
+    connection = context["connection"]
+    attempt = 0
+    while True:
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if connection.in_atomic_block or attempt >= _retries() or not is_busy(exc):
+                raise
+            attempt += 1
+            _backoff(attempt)
+
+
+def install_busy_retry(sender, connection, **kwargs):
+    """``connection_created`` receiver: retry busy autocommit statements on SQLite."""
+    if connection.vendor == "sqlite" and _retries() and _retry_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_retry_wrapper)
+
+
+def retry_on_busy(func=None, *, using=DEFAULT_DB_ALIAS):
+    """Rerun ``func`` (which opens its own transaction) when SQLite reports
+    the database locked. Calls made inside an outer transaction aren't retried."""
+    if func is None:
+        return lambda f: retry_on_busy(f, using=using)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if connections[using].in_atomic_block or attempt >= _retries() or not is_busy(exc):
+                    raise
+                attempt += 1
+                _backoff(attempt)
+
+    return wrapper
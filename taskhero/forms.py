@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Task
+from .models import RecurrenceRule, Task
 from .models import SavedPrompt
 
 class TaskForm(forms.ModelForm):
@@ -14,6 +14,43 @@ class TaskForm(forms.ModelForm):
             'priority': forms.Select(attrs={'class': 'form-select'}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        # recurrence isn't a form field, so ModelForm skips task_recurrence_date_unique
+        due_date, recurrence_id = cleaned_data.get("due_date"), self.instance.recurrence_id
+        if recurrence_id and due_date and "due_date" in self.changed_data:
+            taken = Task.objects.filter(recurrence_id=recurrence_id, due_date=due_date).exclude(pk=self.instance.pk)
+            if taken.exists():
+                self.add_error("due_date", "Another task in this series is already due on that date.")
+        return cleaned_data
+
+
+class TaskCreateForm(TaskForm):
+    """TaskForm plus a choice to make the new task the first of a series."""
+
+    repeat = forms.ChoiceField(
+        choices=[("", "Does not repeat")] + RecurrenceRule.FREQ_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("repeat") and not cleaned_data.get("due_date"):
+            self.add_error("due_date", "A repeating task needs a due date.")
+        return cleaned_data
+
+
+def task_form_data(row):
+    """TaskForm data from a loosely-typed dict (import rows, AI output):
+    missing values become blanks and status/priority fall back to the defaults."""
+    data = {name: row.get(name) or "" for name in TaskForm.Meta.fields}
+    for name in ("status", "priority"):
+        data[name] = str(data[name]).strip().upper().replace(" ", "_")
+    data["status"] = data["status"] or Task.STATUS_TODO
+    data["priority"] = data["priority"] or Task.PRIORITY_MEDIUM
+    return data
+
 
 class SignUpForm(UserCreationForm):
     first_name = forms.CharField(max_length=30, required=True)
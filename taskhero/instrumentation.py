@@ -0,0 +1,247 @@
+"""Per-request performance instrumentation.
+
+``PerformanceMiddleware`` opens a ``RequestMetrics`` for each request in a
+context variable. Three hooks add to it while the request runs:
+
+* database time and query count, from an execute wrapper installed on every
+  new connection (``install_db_instrumentation``, connected in ``apps.py``);
+* template render time, from the ``InstrumentedDjangoTemplates`` backend;
+* Ollama time, from ``timed("ollama")`` in ``taskhero.ollama``.
+
+``observe_queries`` lets other code (the query-budget guard) see each SQL
+statement through the same execute wrapper.
+
+The totals go out in a ``Server-Timing`` header and into per-URL-name
+latency histograms kept in the ``TASKHERO_PERF_CACHE`` cache alias, one key
+per view. Give the alias its own cache (culling there would drop whole
+views) and a shared backend so ``manage.py perf_report`` can see what the
+web processes recorded. Streaming responses are measured up to the moment their headers
+are sent.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.template.backends.django import DjangoTemplates
+
+METRICS = ("wall", "db", "template", "ollama")
+
+_current = ContextVar("taskhero_request_metrics", default=None)
+_observers = ContextVar("taskhero_query_observers", default=())
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.db = 0.0
+        self.db_count = 0
+        self.template = 0.0
+        self.ollama = 0.0
+
+    def server_timing(self):
+        return ", ".join([
+            f"app;dur={self.wall * 1000:.1f}",
+            f'db;dur={self.db * 1000:.1f};desc="{self.db_count} queries"',
+            f"tpl;dur={self.template * 1000:.1f}",
+            f"ollama;dur={self.ollama * 1000:.1f}",
+        ])
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def timed(metric):
+    """Add the time spent in the block to the current request's ``metric``."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, metric, getattr(metrics, metric) + time.perf_counter() - start)
+
+
+# Database
+
+@contextmanager
+def observe_queries(callback):
+    """Call ``callback(sql)`` for every query run in this context (including
+    code run through ``sync_to_async``) until the block exits."""
+    token = _observers.set(_observers.get() + (callback,))
+    try:
+        yield
+    finally:
+        _observers.reset(token)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    for callback in _observers.get():
+        callback(sql)
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db += time.perf_counter() - start
+        metrics.db_count += 1
+
+
+def install_db_instrumentation(sender, connection, **kwargs):
+    """``connection_created`` receiver: wrap every query the connection runs."""
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+# Templates
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return self.template.render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+# Histograms
+# Log-spaced bucket upper bounds in milliseconds, 0.5ms .. ~4min.
+BUCKETS_MS = [round(0.5 * 1.25 ** i, 3) for i in range(58)]
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, "TASKHERO_PERF_CACHE", "metrics")]
+
+
+def _key(*parts):
+    return "taskhero:perf:" + ":".join(str(p) for p in parts)
+
+
+def _empty_histograms():
+    return {"count": 0, "queries": 0, **{metric: [0] * len(BUCKETS_MS) for metric in METRICS}}
+
+
+def record(view_name, metrics):
+    """Add one request to ``view_name``'s entry: a single cache key holding
+    the request and query totals and one bucket list per metric.
+
+    The entry is read, updated and written back, so two processes recording
+    the same view at the same moment can drop a sample; the percentiles don't
+    notice. The view index is read back on every call, so a view missing from
+    it (culled, or overwritten by another process) is added again.
+    """
+    cache = _cache()
+    views_key, key = _key("views"), _key(view_name)
+    with _lock:
+        values = cache.get_many([views_key, key])
+        views = values.get(views_key) or set()
+        if view_name not in views:
+            cache.set(views_key, views | {view_name}, None)
+        entry = values.get(key) or _empty_histograms()
+        entry["count"] += 1
+        entry["queries"] += metrics.db_count
+        for metric in METRICS:
+            ms = getattr(metrics, metric) * 1000
+            entry[metric][min(bisect.bisect_left(BUCKETS_MS, ms), len(BUCKETS_MS) - 1)] += 1
+        cache.set(key, entry, None)
+
+
+def _percentile(counts, total, q):
+    threshold = q * total
+    seen = 0
+    for bucket, count in enumerate(counts):
+        seen += count
+        if count and seen >= threshold:
+            return BUCKETS_MS[bucket]
+    return None
+
+
+def report():
+    """``{view_name: {"count", "avg_queries", "<metric>": {"p50", "p95", "p99"}}}`` (milliseconds,
+    bucket upper bounds)."""
+    cache = _cache()
+    views = sorted(cache.get(_key("views")) or ())
+    entries = cache.get_many([_key(view_name) for view_name in views])
+    result = {}
+    for view_name in views:
+        entry = entries.get(_key(view_name))
+        if not entry or not entry["count"]:
+            continue
+        total = entry["count"]
+        result[view_name] = {"count": total, "avg_queries": round(entry["queries"] / total, 1)}
+        for metric in METRICS:
+            result[view_name][metric] = {
+                f"p{int(q * 100)}": _percentile(entry[metric], total, q) for q in (0.5, 0.95, 0.99)
+            }
+    return result
+
+
+def reset():
+    cache = _cache()
+    with _lock:
+        views = cache.get(_key("views")) or ()
+        cache.delete_many([_key(view_name) for view_name in views] + [_key("views")])
+
+
+class PerformanceMiddleware:
+    """Measure each request and report it via ``Server-Timing`` and the histograms."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics):
+        metrics.wall = time.perf_counter() - metrics.started
+        response["Server-Timing"] = metrics.server_timing()
+        match = getattr(request, "resolver_match", None)
+        record(match.view_name if match else "<unresolved>", metrics)
+        return response
@@ -0,0 +1,140 @@
+"""Database-backed queue for AI generations.
+
+Web requests only ``enqueue`` a ``GenerationJob``; ``run_generation_worker``
+claims jobs one at a time per slot and streams the model's output into the
+row, so web latency no longer depends on model latency and the number of
+concurrent generations is capped by the worker's ``--concurrency``.
+
+A claim is the job's ``(worker, attempts)`` pair: every claim increments
+``attempts``, so once ``requeue_stale`` hands a job on, writes from the
+earlier claim match no row, even if the same worker slot claimed it again.
+"""
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import llm_cache, ollama
+from .models import GenerationJob
+from .ndjson import OllamaStreamDecoder
+
+# How often partial output of a running job is written back to the database.
+PROGRESS_INTERVAL = 1.0
+MAX_ATTEMPTS = 3
+
+
+class ClaimLost(Exception):
+    """The job was requeued while this claim was still running it."""
+
+
+def enqueue(owner, prompt, model=None, options=None):
+    return GenerationJob.objects.create(
+        owner=owner, prompt=prompt, model=model or ollama.default_model(), options=options or {},
+    )
+
+
+def job_json(job):
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+        "stats": job.stats,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def claim_next(worker_id):
+    """Atomically move the oldest queued job to RUNNING and return it (or None).
+
+    Backends with ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL, MySQL 8)
+    lock the row; SQLite, which has no row locks, claims with a
+    compare-and-set UPDATE that only one worker can win.
+    """
+    queued = GenerationJob.objects.filter(status=GenerationJob.STATUS_QUEUED).order_by("created_at", "pk")
+    now = timezone.now()
+    claim = dict(
+        status=GenerationJob.STATUS_RUNNING, worker=worker_id, started_at=now, updated_at=now,
+        attempts=F("attempts") + 1,
+    )
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = queued.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            GenerationJob.objects.filter(pk=job.pk).update(**claim)
+        return GenerationJob.objects.get(pk=job.pk)
+
+    while True:
+        pk = queued.values_list("pk", flat=True).first()
+        if pk is None:
+            return None
+        if GenerationJob.objects.filter(pk=pk, status=GenerationJob.STATUS_QUEUED).update(**claim):
+            return GenerationJob.objects.get(pk=pk)
+        # another worker got there first; try the next one
+
+
+def requeue_stale(older_than=timedelta(minutes=10)):
+    """Put RUNNING jobs whose worker went silent back in the queue (or fail
+    them once they've used up their attempts). Returns the number requeued."""
+    stale = GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_RUNNING, updated_at__lt=timezone.now() - older_than,
+    )
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=GenerationJob.STATUS_FAILED, error="Worker stopped responding", finished_at=timezone.now(),
+    )
+    # the next attempt starts over, so drop the previous one's partial output
+    return stale.update(
+        status=GenerationJob.STATUS_QUEUED, worker="", result="", error="", stats={}, updated_at=timezone.now(),
+    )
+
+
+def fail(job, error):
+    """Mark a claimed job FAILED, e.g. when running it raised something unexpected."""
+    _save_progress(job, status=GenerationJob.STATUS_FAILED, error=error, finished_at=timezone.now())
+
+
+def _save_progress(job, **fields):
+    """Write ``fields`` to ``job``'s row while it is still this claim's;
+    raises ``ClaimLost`` once it isn't."""
+    claimed = GenerationJob.objects.filter(
+        pk=job.pk, status=GenerationJob.STATUS_RUNNING, worker=job.worker, attempts=job.attempts,
+    )
+    if not claimed.update(updated_at=timezone.now(), **fields):
+        raise ClaimLost(f"Job {job.pk} is no longer claimed by {job.worker} (attempt {job.attempts})")
+
+
+async def run_job(job):
+    """Generate ``job``'s output, writing partial text back as it streams.
+
+    Only a complete reply (``stream_generate`` raises on a stream cut off
+    before its ``done`` chunk) is cached and marks the job SUCCEEDED. Raises
+    ``ClaimLost``, abandoning the generation, if the job was requeued.
+    """
+    save = sync_to_async(_save_progress)
+    cached = await llm_cache.aget(job.model, job.prompt, job.options)
+    if cached is not None:
+        await save(job, status=GenerationJob.STATUS_SUCCEEDED, result=cached["text"],
+                   stats={**cached["stats"], "cache": "hit"}, finished_at=timezone.now())
+        return
+
+    decoder = OllamaStreamDecoder()
+    last_flush = time.monotonic()
+    try:
+        async for _ in ollama.stream_generate(job.prompt, job.model, decoder, options=job.options):
+            if time.monotonic() - last_flush >= PROGRESS_INTERVAL:
+                await save(job, result=decoder.text)
+                last_flush = time.monotonic()
+    except ollama.OllamaError as e:
+        await save(job, status=GenerationJob.STATUS_FAILED, result=decoder.text, error=str(e),
+                   finished_at=timezone.now())
+        return
+
+    await llm_cache.aset(job.model, job.prompt, job.options, decoder.text, decoder.summary())
+    await save(job, status=GenerationJob.STATUS_SUCCEEDED, result=decoder.text, stats=decoder.summary(),
+               finished_at=timezone.now())
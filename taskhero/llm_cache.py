@@ -0,0 +1,33 @@
+"""Cache of finished LLM generations, keyed on (model, prompt, options).
+
+Lives in its own Django cache alias (``TASKHERO_LLM_CACHE``, ``"llm"`` by
+default). The default local-memory backend is size bounded (``MAX_ENTRIES``),
+evicts least recently used entries first and expires them after ``TIMEOUT``.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[getattr(settings, "TASKHERO_LLM_CACHE", "llm")]
+
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.split())
+
+
+def cache_key(model, prompt, options=None):
+    raw = json.dumps([model, normalize_prompt(prompt), options or {}], sort_keys=True, separators=(",", ":"))
+    return "taskhero:llm:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def aget(model, prompt, options=None):
+    """Return ``{"text": ..., "stats": ...}`` or None."""
+    return await _cache().aget(cache_key(model, prompt, options))
+
+
+async def aset(model, prompt, options, text, stats):
+    await _cache().aset(cache_key(model, prompt, options), {"text": text, "stats": stats})
@@ -0,0 +1,112 @@
+"""Concurrent HTTP load driver.
+
+Each worker logs in as one of the seeded benchmark users (see
+``taskhero.benchmarks.seed``) and replays ``SCENARIO`` until the request or
+time limit is reached. It can target a running server (``runserver`` or
+``uvicorn config.asgi:application``) or the ASGI app in-process. Results have
+the same ``{"meta", "results"}`` shape as the micro-benchmarks, so
+``benchmarks.compare`` works on them too.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from .benchmarks import BENCH_PASSWORD, BENCH_USER_PREFIX, summarize
+
+# (name, weight, method, path, JSON body or None)
+SCENARIO = [
+    ("task_list", 30, "GET", "/tasks/", None),
+    ("dashboard", 20, "GET", "/dashboard/", None),
+    ("task_column", 10, "GET", "/tasks/column/?priority=HIGH&status=TODO", None),
+    ("search", 10, "GET", "/search/?q=plan", None),
+    ("about", 10, "GET", "/about/", None),
+    ("prompt_store", 10, "GET", "/prompts/", None),
+    ("run_prompt", 10, "POST", "/prompts/run/", {"prompt": "Plan my week #{n}"}),
+]
+
+
+async def _login(client, username, password):
+    await client.get("/login/")
+    response = await client.post("/login/", data={
+        "username": username, "password": password, "csrfmiddlewaretoken": client.cookies.get("csrftoken", ""),
+    })
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {username} (HTTP {response.status_code}); seed the benchmark data first")
+
+
+async def _worker(client, plan, samples, errors, deadline):
+    for name, method, path, body in plan:
+        if deadline and time.monotonic() > deadline:
+            return
+        headers = {"X-CSRFToken": client.cookies.get("csrftoken", "")}
+        start = time.perf_counter()
+        try:
+            if method == "POST":
+                response = await client.post(path, json=body, headers=headers)
+            else:
+                response = await client.get(path, headers=headers)
+            await response.aread()
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        samples[name].append(time.perf_counter() - start)
+        if failed:
+            errors[name] += 1
+
+
+def _plans(concurrency, requests, rng):
+    """Split ``requests`` weighted scenario steps across ``concurrency`` workers."""
+    names = [step for step in SCENARIO for _ in range(step[1])]
+    plans = [[] for _ in range(concurrency)]
+    for n, worker in zip(range(requests), itertools.cycle(range(concurrency))):
+        name, _, method, path, body = rng.choice(names)
+        if body is not None:
+            body = {key: value.format(n=n % 20) for key, value in body.items()}
+        plans[worker].append((name, method, path, body))
+    return plans
+
+
+async def run_load(base_url=None, app=None, users=10, concurrency=10, requests=500, duration=None,
+                   prefix=BENCH_USER_PREFIX, password=BENCH_PASSWORD, timeout=30.0, seed=0):
+    """Drive ``requests`` requests (or until ``duration`` seconds pass) at
+    ``concurrency`` against ``base_url`` or, with ``app``, an in-process ASGI app."""
+    transport = httpx.ASGITransport(app=app) if app is not None else None
+    base_url = base_url or "http://127.0.0.1"
+    samples, errors = defaultdict(list), defaultdict(int)
+    clients = [
+        httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout, follow_redirects=False)
+        for _ in range(concurrency)
+    ]
+    try:
+        await asyncio.gather(*(
+            _login(client, f"{prefix}{i % users}", password) for i, client in enumerate(clients)
+        ))
+        deadline = time.monotonic() + duration if duration else None
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, plan, samples, errors, deadline)
+            for client, plan in zip(clients, _plans(concurrency, requests, random.Random(seed)))
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    total = sum(len(s) for s in samples.values())
+    return {
+        "meta": {
+            "target": "asgi" if app is not None else base_url,
+            "concurrency": concurrency,
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "rps": round(total / elapsed, 1) if elapsed else None,
+            "errors": sum(errors.values()),
+        },
+        "results": {
+            name: {**summarize(values), "errors": errors[name]}
+            for name, values in sorted(samples.items())
+        },
+    }
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taskhero.benchmarks import compare, run_benchmarks, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the task micro-benchmarks and write the results as JSON. With --baseline, "
+        "exit non-zero when a benchmark is more than --threshold slower or runs more queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--tasks", type=int, default=200, help="Tasks per user")
+        parser.add_argument("--activities", type=int, default=2, help="Activity rows per task")
+        parser.add_argument("--no-seed", action="store_true", help="Reuse the existing benchmark data")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--only", nargs="*", help="Benchmark names to run")
+        parser.add_argument("--output", help="Write the JSON here instead of stdout")
+        parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, 0.25 = 25%%")
+
+    def handle(self, *args, **options):
+        if not options["no_seed"]:
+            seed(options["users"], options["tasks"], options["activities"])
+        try:
+            result = run_benchmarks(options["repeat"], only=options["only"])
+        except LookupError as e:
+            raise CommandError(str(e))
+        write_result(self, result, options)
+
+
+def write_result(command, result, options):
+    """Shared by ``benchmark`` and ``loadtest``: write ``result`` and check it against the baseline."""
+    text = json.dumps(result, indent=2)
+    if options["output"]:
+        with open(options["output"], "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        command.stdout.write(text)
+
+    for name, row in result["results"].items():
+        command.stderr.write(f"{name:<24} p50 {row['p50_ms']:>9} ms  p95 {row['p95_ms']:>9} ms")
+    if options["baseline"]:
+        with open(options["baseline"], encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, options["threshold"])
+        for line in regressions:
+            command.stderr.write(command.style.ERROR(f"REGRESSION {line}"))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) over the {options['threshold']:.0%} threshold")
+        command.stderr.write(command.style.SUCCESS("No regressions against the baseline"))
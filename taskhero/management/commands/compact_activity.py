@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from taskhero.activity import RETENTION_DAYS, compact
+
+
+class Command(BaseCommand):
+    help = "Roll task activity older than --keep-days into daily summaries. Schedule it daily, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-days", type=int, default=RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        removed = compact(options["keep_days"])
+        self.stdout.write(self.style.SUCCESS(f"Compacted {removed} activity event(s) into daily summaries"))
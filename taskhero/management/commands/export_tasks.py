@@ -0,0 +1,33 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from taskhero.models import Task
+from taskhero.transfer import FORMATS, export_tasks
+
+
+class Command(BaseCommand):
+    help = "Stream a user's tasks (or everyone's) to a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username to export (default: all users)")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        if options["user"]:
+            try:
+                tasks = tasks.for_user(User.objects.get(username=options["user"]))
+            except User.DoesNotExist:
+                raise CommandError(f"No such user: {options['user']}")
+
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for chunk in export_tasks(tasks, options["format"], options["chunk_size"]):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from taskhero.recurrence import WINDOW_DAYS, extend
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the occurrences of repeating tasks up to --window-days ahead. "
+        "Schedule it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-days", type=int, default=WINDOW_DAYS)
+
+    def handle(self, *args, **options):
+        created = extend(window_days=options["window_days"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} recurring task occurrence(s)"))
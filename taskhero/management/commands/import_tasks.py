@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from taskhero.transfer import FORMATS, import_tasks, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import tasks for a user from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Username that will own the tasks")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No such user: {options['user']}")
+
+        fmt = options["format"] or ("ndjson" if options["path"].endswith((".ndjson", ".jsonl")) else "csv")
+        with open(options["path"], encoding="utf-8", errors="replace", newline="") as stream:
+            result = import_tasks(owner, read_rows(stream, fmt), options["batch_size"])
+
+        for error in result["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} tasks ({len(result['errors'])} rows skipped)"))
@@ -0,0 +1,48 @@
+import asyncio
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+
+from taskhero.loadtest import run_load
+from taskhero.testing import start_ollama_stub
+
+from .benchmark import write_result
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent HTTP load at a running server (--url) or the ASGI app in-process (default) "
+        "as the seeded benchmark users. Run seed_benchmark_data first. Against a server, point its "
+        "OLLAMA_URL at `manage.py ollama_stub`; in-process, a stub is started automatically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="e.g. http://127.0.0.1:8000; omit to load the ASGI app in-process")
+        parser.add_argument("--users", type=int, default=10, help="How many seeded users to log in as")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+        parser.add_argument("--ollama-delay", type=float, default=0.01, help="Stub seconds per token (in-process)")
+        parser.add_argument("--output", help="Write the JSON here instead of stdout")
+        parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, 0.25 = 25%%")
+
+    def handle(self, *args, **options):
+        app = stub = None
+        if not options["url"]:
+            app = get_asgi_application()
+            stub = start_ollama_stub(delay=options["ollama_delay"])
+            settings.OLLAMA_URL = f"http://127.0.0.1:{stub.server_address[1]}"
+        try:
+            result = asyncio.run(run_load(
+                options["url"], app, options["users"], options["concurrency"], options["requests"], options["duration"],
+            ))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        finally:
+            if stub is not None:
+                stub.shutdown()
+        if result["meta"]["errors"]:
+            self.stderr.write(self.style.WARNING(f"{result['meta']['errors']} request(s) failed"))
+        write_result(self, result, options)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from taskhero.testing import STUB_REPLY, make_ollama_stub
+
+
+class Command(BaseCommand):
+    help = "Run a local stub of the Ollama API that streams a canned NDJSON reply."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=11434)
+        parser.add_argument("--delay", type=float, default=0.05, help="Seconds between tokens")
+        parser.add_argument("--reply", default=STUB_REPLY)
+
+    def handle(self, *args, **options):
+        server = make_ollama_stub(options["port"], options["reply"], options["delay"])
+        host, port = server.server_address
+        self.stdout.write(f"Ollama stub listening on http://{host}:{port} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
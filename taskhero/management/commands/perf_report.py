@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from taskhero import instrumentation
+
+
+class Command(BaseCommand):
+    help = "Show per-URL-name latency percentiles recorded by PerformanceMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the histograms after printing")
+
+    def handle(self, *args, **options):
+        report = instrumentation.report()
+        if not report:
+            self.stdout.write("No requests recorded (is TASKHERO_PERF_CACHE a shared cache?)")
+        header = f"{'view':<32} {'count':>7} {'queries':>7}" + "".join(
+            f" {metric + ' p50/p95/p99 (ms)':>32}" for metric in instrumentation.METRICS
+        )
+        self.stdout.write(header)
+        for view_name, entry in report.items():
+            line = f"{view_name:<32} {entry['count']:>7} {entry['avg_queries']:>7}"
+            for metric in instrumentation.METRICS:
+                cell = "/".join(str(entry[metric][p]) for p in ("p50", "p95", "p99"))
+                line += f" {cell:>32}"
+            self.stdout.write(line)
+        if options["reset"]:
+            instrumentation.reset()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from taskhero.sync import TOMBSTONE_RETENTION_DAYS, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete task tombstones older than --keep-days. Sync tokens from before them stop working. "
+        "Schedule it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-days", type=int, default=TOMBSTONE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        removed = prune_tombstones(options["keep_days"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {removed} task tombstone(s)"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from taskhero.models import SavedPrompt, Task
+from taskhero.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = "Create or repair the full-text search index for tasks and prompts and refill it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        install_search_index(connections[options["database"]], [Task, SavedPrompt])
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from taskhero.stats import rebuild_for_users
+
+
+class Command(BaseCommand):
+    help = "Recount the materialized per-user task stats from the task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", help="Only rebuild these usernames (repeatable)")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["user"]:
+            user_ids = list(User.objects.filter(username__in=options["user"]).values_list("pk", flat=True))
+            if len(user_ids) != len(set(options["user"])):
+                raise CommandError("Unknown username in --user")
+        written = rebuild_for_users(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt task stats for {written} user(s)"))
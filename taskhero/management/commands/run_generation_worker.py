@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import os
+import socket
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from taskhero import jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Process queued AI generation jobs; --concurrency caps simultaneous generations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=getattr(settings, "OLLAMA_MAX_CONCURRENCY", 2))
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument(
+            "--requeue-interval", type=float, default=60.0,
+            help="Seconds between checks for jobs left RUNNING by a worker that died",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {worker_id} running {options['concurrency']} slot(s)")
+        try:
+            asyncio.run(self.run(worker_id, options))
+        except KeyboardInterrupt:
+            pass
+
+    async def run(self, worker_id, options):
+        requeuer = asyncio.create_task(self.requeue_stale(options["requeue_interval"]))
+        slots = [
+            self.slot(f"{worker_id}/{i}", options["poll_interval"], options["once"])
+            for i in range(options["concurrency"])
+        ]
+        try:
+            await asyncio.gather(*slots)
+        finally:
+            requeuer.cancel()
+
+    async def requeue_stale(self, interval):
+        """Reclaim jobs of crashed workers for as long as this one runs."""
+        requeue_stale = sync_to_async(jobs.requeue_stale)
+        while True:
+            try:
+                if count := await requeue_stale():
+                    self.stdout.write(f"Requeued {count} stale job(s)")
+            except Exception:
+                logger.exception("Requeueing stale jobs failed")
+            await asyncio.sleep(interval)
+
+    async def slot(self, worker_id, poll_interval, once):
+        claim_next, fail = sync_to_async(jobs.claim_next), sync_to_async(jobs.fail)
+        while True:
+            try:
+                job = await claim_next(worker_id)
+            except Exception:
+                logger.exception("%s could not claim a job", worker_id)
+                await asyncio.sleep(poll_interval)
+                continue
+            if job is None:
+                if once:
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            # one bad job must not take the slot (and the other slots) down with it
+            try:
+                await jobs.run_job(job)
+            except jobs.ClaimLost:
+                # requeued as stale; whoever holds it now finishes it
+                logger.warning("%s gave up job %s: it was requeued", worker_id, job.pk)
+                continue
+            except Exception as e:
+                logger.exception("%s: job %s failed", worker_id, job.pk)
+                try:
+                    await fail(job, f"Worker error: {e}")
+                except Exception:
+                    logger.exception("%s could not mark job %s failed", worker_id, job.pk)
+                continue
+            self.stdout.write(f"{worker_id} finished job {job.pk}")
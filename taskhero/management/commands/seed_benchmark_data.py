@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from taskhero.benchmarks import BENCH_PASSWORD, BENCH_USER_PREFIX, seed
+
+
+class Command(BaseCommand):
+    help = "Replace the benchmark users (bench0, bench1, ...) with USERS x TASKS x ACTIVITIES fresh rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--tasks", type=int, default=200, help="Tasks per user")
+        parser.add_argument("--activities", type=int, default=2, help="Activity rows per task")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible data")
+
+    def handle(self, *args, **options):
+        seed(options["users"], options["tasks"], options["activities"], seed=options["seed"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['users']} users x {options['tasks']} tasks x {options['activities']} activities "
+            f"({BENCH_USER_PREFIX}0.. / password {BENCH_PASSWORD!r})"
+        ))
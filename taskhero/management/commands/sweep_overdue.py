@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from taskhero.overdue import SWEEP_BATCH_SIZE, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = "Flag tasks that became overdue (per owner time zone). Schedule it, e.g. every 15 minutes from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        flagged = sweep_overdue(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Flagged {flagged} overdue task(s)"))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from taskhero.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection, [apps.get_model("taskhero", "Task"), apps.get_model("taskhero", "SavedPrompt")])
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection, [apps.get_model("taskhero", "Task"), apps.get_model("taskhero", "SavedPrompt")])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskhero', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
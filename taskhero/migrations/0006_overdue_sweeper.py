@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:01
+
+import django.db.models.deletion
+import taskhero.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('taskhero', '0005_usertaskstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('timezone', models.CharField(default='UTC', help_text='IANA name, e.g. Europe/Berlin', max_length=64, validators=[taskhero.models.validate_timezone])),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='taskhero_ta_due_dat_ce904f_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='overdue_flagged_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'COMPLETED'), _negated=True), fields=['due_date'], name='task_open_due_idx'),
+        ),
+    ]
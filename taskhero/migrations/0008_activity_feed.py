@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_task_titles(apps, schema_editor):
+    TaskActivity = apps.get_model('taskhero', 'TaskActivity')
+    Task = apps.get_model('taskhero', 'Task')
+    TaskActivity.objects.filter(task__isnull=False).update(
+        task_title=models.Subquery(Task.objects.filter(pk=models.OuterRef('task_id')).values('title')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskhero', '0007_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('action', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Activity daily summaries',
+                'ordering': ['-day', 'action'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='taskactivity',
+            options={'verbose_name_plural': 'Task activities'},
+        ),
+        migrations.AddField(
+            model_name='taskactivity',
+            name='task_title',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='taskactivity',
+            name='task',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activities', to='taskhero.task'),
+        ),
+        migrations.RunPython(fill_task_titles, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='taskactivity',
+            index=models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskactivity',
+            index=models.Index(fields=['task', 'created_at'], name='activity_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskactivity',
+            index=models.Index(fields=['created_at'], name='activity_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='activitydailysummary',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='activitydailysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'action'), name='activity_summary_unique'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from taskhero.search import install_search_index
+
+
+def number_existing_changes(apps, schema_editor):
+    # each user's tasks get 1..n in updated_at order; the counter continues from n
+    Task = apps.get_model('taskhero', 'Task')
+    TaskChangeCounter = apps.get_model('taskhero', 'TaskChangeCounter')
+    owner_ids = Task.objects.order_by().values_list('owner_id', flat=True).distinct()
+    for owner_id in owner_ids:
+        tasks = list(Task.objects.filter(owner_id=owner_id).order_by('updated_at', 'pk').only('pk'))
+        for seq, task in enumerate(tasks, start=1):
+            task.change_seq = seq
+        Task.objects.bulk_update(tasks, ['change_seq'], batch_size=1000)
+        TaskChangeCounter.objects.create(user_id=owner_id, last_seq=len(tasks))
+
+
+def reinstall_search_index(apps, schema_editor):
+    # adding change_seq rebuilds taskhero_task on SQLite, which drops the FTS triggers
+    install_search_index(schema_editor.connection, [apps.get_model('taskhero', 'Task')])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('taskhero', '0008_activity_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_index),
+        migrations.CreateModel(
+            name='TaskChangeCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_changes', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_seq', models.BigIntegerField(default=0)),
+                ('pruned_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'change_seq'], name='task_owner_change_idx'),
+        ),
+        migrations.AddField(
+            model_name='tasktombstone',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['owner', 'change_seq'], name='tombstone_owner_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,129 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Substr
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+import zoneinfo
+
+from .signals import tasks_bulk_changed
 
 class TaskQuerySet(models.QuerySet):
     def for_user(self, user):
         return self.filter(owner=user)
 
-    def overdue(self):
-        today = timezone.localdate()
+    def overdue(self, today=None):
+        today = today or timezone.localdate()
         return self.filter(due_date__lt=today).exclude(status=Task.STATUS_COMPLETED)
 
+    def with_overdue(self, today=None):
+        """Annotate ``overdue_now`` (computed in SQL) instead of calling
+        ``is_overdue`` per instance."""
+        today = today or timezone.localdate()
+        return self.annotate(overdue_now=models.Case(
+            models.When(models.Q(due_date__lt=today) & ~models.Q(status=Task.STATUS_COMPLETED), then=models.Value(True)),
+            default=models.Value(False),
+            output_field=models.BooleanField(),
+        ))
+
     def by_status(self, status):
         return self.filter(status=status)
 
+    # Projections for list pages: named tuples with only the columns the
+    # templates render (plus created_at for keyset cursors), never the whole
+    # description.
+    LIST_FIELDS = ('pk', 'title', 'due_date', 'status', 'priority', 'created_at')
+    EXCERPT_LENGTH = 300  # cards clamp the description to three lines anyway
+
+    def row(self):
+        """Dashboard table rows: ``LIST_FIELDS`` only."""
+        return self.values_list(*self.LIST_FIELDS, named=True)
+
+    def card(self):
+        """Board and about-page cards: a row plus ``excerpt``, the start of the
+        description, and ``updated_at``, which keys the card fragment cache."""
+        return self.annotate(
+            excerpt=Substr('description', 1, self.EXCERPT_LENGTH),
+        ).values_list(*self.LIST_FIELDS, 'updated_at', 'excerpt', named=True)
+
+    # Bulk operations: one UPDATE/DELETE for the whole queryset instead of a
+    # fetch + save per task. Scope them first, e.g.
+    # ``Task.objects.for_user(user).filter(pk__in=ids).complete()``.
+
+    def complete(self):
+        return self.set_status(Task.STATUS_COMPLETED)
+
+    def set_status(self, status):
+        return self._bulk_update("status", status=status)
+
+    def set_priority(self, priority):
+        return self._bulk_update("priority", priority=priority)
+
+    def bulk_delete(self):
+        rows = list(self.values_list("pk", "owner_id"))
+        if not rows:
+            return 0
+        task_ids = [pk for pk, _ in rows]
+        with transaction.atomic(using=self.db, savepoint=False):
+            self._apply_on_delete(task_ids)
+            seqs = TaskChangeCounter.next_seqs({owner_id for _, owner_id in rows})
+            TaskTombstone.objects.bulk_create(
+                [TaskTombstone(owner_id=owner_id, task_id=pk, change_seq=seqs[owner_id]) for pk, owner_id in rows],
+                batch_size=1000,
+            )
+            # _raw_delete is a single DELETE ... WHERE; queryset.delete() would
+            # fetch every task and run the per-row post_delete receivers (stats,
+            # a tombstone and a counter bump, a push message) for each one.
+            count = self.model.objects.filter(pk__in=task_ids)._raw_delete(self.db)
+        self._send_bulk_changed("delete", rows)
+        return count
+
+    # on_delete rules bulk_delete applies itself, since _raw_delete skips the
+    # collector; a relation with any other rule makes bulk_delete refuse.
+    RAW_DELETE_RULES = (models.CASCADE, models.SET_NULL, models.DO_NOTHING)
+
+    def _apply_on_delete(self, task_ids):
+        """What the deletion collector would do to rows pointing at ``task_ids``
+        (e.g. TaskActivity keeps its history with ``task`` set to NULL)."""
+        for relation in self.model._meta.related_objects:
+            if relation.many_to_many or relation.on_delete not in self.RAW_DELETE_RULES:
+                raise NotImplementedError(f"bulk_delete can't apply on_delete for {relation}")
+            related = relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": task_ids})
+            if relation.on_delete is models.SET_NULL:
+                related.update(**{relation.field.name: None})
+            elif relation.on_delete is models.CASCADE:
+                related.delete()
+
+    def _bulk_update(self, action, **fields):
+        rows = list(self.values_list("pk", "owner_id"))
+        if not rows:
+            return 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            seqs = TaskChangeCounter.next_seqs({owner_id for _, owner_id in rows})
+            change_seq = models.Case(
+                *(models.When(owner_id=owner_id, then=models.Value(seq)) for owner_id, seq in seqs.items()),
+                output_field=models.BigIntegerField(),
+            )
+            count = self.update(updated_at=timezone.now(), change_seq=change_seq, **fields)
+        self._send_bulk_changed(action, rows)
+        return count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            seqs = TaskChangeCounter.next_seqs({obj.owner_id for obj in objs})
+            for obj in objs:
+                obj.change_seq = seqs[obj.owner_id]
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def _send_bulk_changed(self, action, rows):
+        tasks_bulk_changed.send(
+            sender=self.model,
+            action=action,
+            task_ids=[pk for pk, _ in rows],
+            owner_ids={owner_id for _, owner_id in rows},
+        )
+
 
 class Task(models.Model):
     """Core Task model for TaskHero.
@@ -44,6 +154,8 @@ class Task(models.Model):
         (PRIORITY_MEDIUM, 'Medium'),
         (PRIORITY_HIGH, 'High'),
     ]
+    # the one priority color mapping; the board derives its classes from it
+    PRIORITY_COLORS = {PRIORITY_HIGH: 'red', PRIORITY_MEDIUM: 'yellow', PRIORITY_LOW: 'green'}
 
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -59,6 +171,14 @@ class Task(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # set by the overdue sweeper (in the owner's local date); cleared when due_date changes
+    overdue_flagged_on = models.DateField(null=True, blank=True, editable=False)
+    # the owner's TaskChangeCounter value when the task last changed (delta sync)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    # set on the occurrences of a repeating task (see taskhero.recurrence)
+    recurrence = models.ForeignKey(
+        'RecurrenceRule', null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name='occurrences',
+    )
 
     objects = TaskQuerySet.as_manager()
 
@@ -66,15 +186,61 @@ class Task(models.Model):
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
         # index owner + status for fast filtering on dashboard
+        # partial due_date indexes: overdue queries never look at completed tasks
+        # the owner_* indexes match the per-user orderings, so those pages need no sort:
+        #   recent (about page), agenda (Meta.ordering: dashboard), column (board "load more", group counts)
         indexes = [
             models.Index(fields=['owner', 'status']),
-            models.Index(fields=['due_date']),
+            models.Index(fields=['due_date'], condition=~models.Q(status='COMPLETED'), name='task_open_due_idx'),
+            models.Index(fields=['owner', '-created_at'], name='task_owner_recent_idx'),
+            models.Index(fields=['owner', 'due_date', '-priority', 'created_at'], name='task_owner_agenda_idx'),
+            models.Index(fields=['owner', 'priority', 'status', 'due_date', 'created_at'], name='task_owner_column_idx'),
+            models.Index(
+                fields=['owner', 'due_date'], condition=~models.Q(status='COMPLETED'), name='task_owner_open_due_idx',
+            ),
+            models.Index(fields=['owner', 'change_seq'], name='task_owner_change_idx'),
+        ]
+        constraints = [
+            # one occurrence per date, however often the window is extended
+            models.UniqueConstraint(
+                fields=['recurrence', 'due_date'], condition=models.Q(recurrence__isnull=False),
+                name='task_recurrence_date_unique',
+            ),
         ]
         ordering = ['due_date', '-priority', 'created_at']
 
     def __str__(self):
         return f"{self.title} ({self.get_priority_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember what was loaded so stats can be adjusted by the difference on save
+        instance._loaded_state = instance.stats_state()
+        return instance
+
+    def stats_state(self):
+        """The fields ``UserTaskStats`` counts by, or None if any was deferred."""
+        deferred = self.get_deferred_fields()
+        if deferred & {'status', 'priority', 'due_date'}:
+            return None
+        return (self.status, self.priority, self._meta.get_field('due_date').to_python(self.due_date))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.overdue_flagged_on and (update_fields is None or 'due_date' in update_fields):
+            # a new due date means the overdue sweeper has to look at the task again
+            loaded, state = getattr(self, '_loaded_state', None), self.stats_state()
+            if loaded is None or state is None or loaded[2] != state[2]:
+                self.overdue_flagged_on = None
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'overdue_flagged_on'}
+        if update_fields is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            self.change_seq = TaskChangeCounter.next_seqs([self.owner_id])[self.owner_id]
+            super().save(*args, **kwargs)
+
     @property
     def is_overdue(self):
         """Return True if the task has passed its due_date and isn't completed."""
@@ -84,29 +250,194 @@ class Task(models.Model):
             return False
         return timezone.localdate() > self.due_date
 
-    def mark_completed(self):
-        """Convenience method to mark a task completed and save."""
+    def mark_completed(self, user=None):
+        """Convenience method to mark a task completed, save and log it."""
+        from . import activity
+
         self.status = self.STATUS_COMPLETED
         self.save(update_fields=['status', 'updated_at'])
+        activity.record(self, activity.COMPLETED, user)
 
     def get_priority_color(self):
         """Return a presentation-friendly color name for UI mapping.
         (View/template can map these to exact hex/classes.)
         """
-        return {
-            self.PRIORITY_HIGH: 'red',
-            self.PRIORITY_MEDIUM: 'yellow',
-            self.PRIORITY_LOW: 'blue',
-        }[self.priority]
+        return self.PRIORITY_COLORS[self.priority]
+
+
+def validate_timezone(value):
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f"Unknown time zone: {value}")
+
+
+class UserProfile(models.Model):
+    """Per-user settings. ``timezone`` decides when the user's tasks become overdue."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="profile")
+    timezone = models.CharField(
+        max_length=64, default=settings.TIME_ZONE, validators=[validate_timezone],
+        help_text='IANA name, e.g. Europe/Berlin',
+    )
+
+    def __str__(self):
+        return f"Profile of {self.user}"
 
 
-# Optionally, you can add a short log model or activity feed later:
+# Append-only activity feed (written through taskhero/activity.py)
 class TaskActivity(models.Model):
-    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='activities')
+    # kept when the task is deleted; task_title still says what it was about
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, related_name='activities')
+    task_title = models.CharField(max_length=200, blank=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     action = models.CharField(max_length=100)  # e.g. 'created', 'marked completed'
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        verbose_name_plural = 'Task activities'
+        # (user, created_at): the feed; (task, created_at): a task's history;
+        # created_at: compaction walks the oldest days
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+            models.Index(fields=['task', 'created_at'], name='activity_task_created_idx'),
+            models.Index(fields=['created_at'], name='activity_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action}: {self.task_title}"
+
+
+class ActivityDailySummary(models.Model):
+    """How many times ``user`` did ``action`` on ``day``; ``compact_activity``
+    rolls TaskActivity rows past the retention window into these."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    day = models.DateField()
+    action = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Activity daily summaries'
+        ordering = ['-day', 'action']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'action'], name='activity_summary_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.action} x{self.count}"
+
+
+
+class TaskChangeCounter(models.Model):
+    """A per-user sequence for delta sync: every task write takes the next
+    value into ``Task.change_seq`` (or ``TaskTombstone.change_seq``).
+
+    ``pruned_seq`` is the newest tombstone ``taskhero.sync.prune_tombstones``
+    has removed; tokens older than that can no longer be brought up to date.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="task_changes")
+    last_seq = models.BigIntegerField(default=0)
+    pruned_seq = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Task changes for {self.user}: {self.last_seq}"
+
+    @classmethod
+    def next_seqs(cls, user_ids):
+        """Advance the counter of each of ``user_ids``; return ``{user_id: seq}``.
+
+        Call it in the transaction that writes the tasks: the counter row stays
+        locked until commit, so a user's changes become visible in sequence
+        order and a sync token never skips a change still in flight.
+        """
+        seqs = {}
+        for user_id in sorted(set(user_ids)):  # one lock order, no deadlocks
+            seq = cls._advance(user_id)
+            if seq is None:  # the user's first task
+                _, created = cls.objects.get_or_create(user_id=user_id, defaults={'last_seq': 1})
+                seq = 1 if created else cls._advance(user_id)
+            seqs[user_id] = seq
+        return seqs
+
+    @classmethod
+    def _advance(cls, user_id):
+        if connection.vendor in ('sqlite', 'postgresql'):  # UPDATE ... RETURNING: one round trip
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {connection.ops.quote_name(cls._meta.db_table)} SET last_seq = last_seq + 1 '
+                    f'WHERE user_id = %s RETURNING last_seq',
+                    [user_id],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+        counter = cls.objects.filter(user_id=user_id)
+        if counter.update(last_seq=models.F('last_seq') + 1):
+            return counter.values_list('last_seq', flat=True).get()
+        return None
+
+
+class RecurrenceRule(models.Model):
+    """A repeating task: what to create (title, description, priority) and
+    when, modelled on iCalendar RRULE (FREQ, INTERVAL, BYDAY, UNTIL, COUNT).
+
+    Occurrences are ordinary Tasks linked through ``Task.recurrence``, and
+    only exist up to ``materialized_through``; ``taskhero.recurrence`` moves
+    that date forward a rolling window at a time.
+    """
+
+    DAILY = 'DAILY'
+    WEEKLY = 'WEEKLY'
+    MONTHLY = 'MONTHLY'
+    FREQ_CHOICES = [(DAILY, 'Daily'), (WEEKLY, 'Weekly'), (MONTHLY, 'Monthly')]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurrence_rules')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=10, choices=Task.PRIORITY_CHOICES, default=Task.PRIORITY_MEDIUM)
+
+    freq = models.CharField(max_length=10, choices=FREQ_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    # weekly only: RRULE BYDAY codes, e.g. "MO,WE,FR"; blank means the weekday of starts_on
+    weekdays = models.CharField(max_length=20, blank=True)
+    starts_on = models.DateField()
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True, help_text='Total number of occurrences')
+
+    materialized_through = models.DateField(editable=False)
+    materialized_count = models.PositiveIntegerField(default=0, editable=False)
+    finished = models.BooleanField(default=False, editable=False)  # past until / count
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # the scheduler's "whose window ends before the horizon" scan
+            models.Index(
+                fields=['materialized_through'], condition=models.Q(finished=False), name='recurrence_open_window_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.get_freq_display()})"
+
+
+class TaskTombstone(models.Model):
+    """A deleted task, kept so delta sync can tell clients to drop it."""
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_tombstones")
+    task_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'change_seq'], name='tombstone_owner_change_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} deleted ({self.change_seq})"
 
 
 class SavedPrompt(models.Model):
@@ -118,6 +449,86 @@ class SavedPrompt(models.Model):
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [models.Index(fields=["owner", "-updated_at"], name="prompt_owner_updated_idx")]
 
     def __str__(self):
         return f"{self.title} ({self.owner})"
+
+
+
+class GenerationJob(models.Model):
+    """An AI generation queued for the background worker (``manage.py run_generation_worker``).
+
+    Requests enqueue a job and return its id straight away; clients poll or
+    stream its status while ``result`` fills up with the model's output.
+    """
+
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCEEDED = 'SUCCEEDED'
+    STATUS_FAILED = 'FAILED'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="generation_jobs")
+    model = models.CharField(max_length=100)
+    prompt = models.TextField()
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    stats = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        # the worker polls for the oldest queued job
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+
+
+class UserTaskStats(models.Model):
+    """Per-user task counts (by status, by priority, overdue) kept up to date
+    incrementally by ``taskhero.stats`` so pages can read one row instead of
+    aggregating over all of a user's tasks.
+
+    ``overdue`` depends on the date as well as on the tasks, so it is only
+    trusted on ``overdue_as_of``; ``taskhero.stats.get_stats`` recounts it
+    when the day has changed.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="task_stats")
+    total = models.IntegerField(default=0)
+    todo = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    low = models.IntegerField(default=0)
+    medium = models.IntegerField(default=0)
+    high = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+    overdue_as_of = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'User task stats'
+        verbose_name_plural = 'User task stats'
+
+    def __str__(self):
+        return f"Task stats for {self.user}"
@@ -0,0 +1,83 @@
+"""Incremental decoder for Ollama's NDJSON generate stream.
+
+Bytes are fed in as they arrive from the socket. Each complete line is parsed
+once with ``json.loads`` (so escaped quotes and unicode in tokens survive),
+tokens are collected in a list and joined once, and the final ``done`` chunk's
+timing stats are kept for throughput tracking.
+"""
+import json
+
+STAT_FIELDS = (
+    "total_duration", "load_duration",
+    "prompt_eval_count", "prompt_eval_duration",
+    "eval_count", "eval_duration",
+)
+
+
+class StreamDecodeError(ValueError):
+    pass
+
+
+class OllamaStreamDecoder:
+    def __init__(self):
+        self._buffer = bytearray()
+        self._tokens = []
+        self._text = None
+        self.done = False
+        self.stats = {}
+
+    def feed(self, data):
+        """Consume raw bytes and return the chunks completed by them."""
+        self._buffer += data
+        chunks = []
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end < 0:
+                break
+            chunk = self._decode(self._buffer[start:end])
+            if chunk is not None:
+                chunks.append(chunk)
+            start = end + 1
+        del self._buffer[:start]
+        return chunks
+
+    def close(self):
+        """Decode whatever is left once the stream ends (a last line without newline)."""
+        chunk = self._decode(self._buffer)
+        self._buffer.clear()
+        return [chunk] if chunk is not None else []
+
+    def _decode(self, line):
+        if not line.strip():
+            return None
+        try:
+            chunk = json.loads(line)
+        except ValueError as e:
+            raise StreamDecodeError(f"Malformed stream line: {bytes(line[:200])!r}") from e
+        if not isinstance(chunk, dict):
+            raise StreamDecodeError("Stream line is not a JSON object")
+        if chunk.get("response"):
+            self._tokens.append(chunk["response"])
+            self._text = None
+        if chunk.get("done"):
+            self.done = True
+            self.stats = {name: chunk[name] for name in STAT_FIELDS if name in chunk}
+        return chunk
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "".join(self._tokens)
+        return self._text
+
+    @property
+    def tokens_per_second(self):
+        count, duration = self.stats.get("eval_count"), self.stats.get("eval_duration")
+        if not count or not duration:
+            return None
+        return round(count / (duration / 1e9), 2)
+
+    def summary(self):
+        """Stats as exposed to clients: Ollama's fields plus tokens_per_second."""
+        return {**self.stats, "tokens_per_second": self.tokens_per_second}
@@ -0,0 +1,140 @@
+"""Async client for the Ollama HTTP API.
+
+One pooled ``httpx.AsyncClient`` is kept per event loop (an ASGI server runs a
+single loop; ``async_to_sync`` under WSGI or a worker's ``asyncio.run`` get
+their own), so keep-alive connections to the Ollama host are reused across
+requests instead of opening one per generation.
+"""
+import asyncio
+import json
+import logging
+import weakref
+
+import httpx
+from django.conf import settings
+
+from . import llm_cache
+from .instrumentation import timed
+from .ndjson import OllamaStreamDecoder, StreamDecodeError
+
+logger = logging.getLogger(__name__)
+
+_clients = weakref.WeakKeyDictionary()
+
+
+class OllamaError(Exception):
+    pass
+
+
+def default_model():
+    return getattr(settings, "OLLAMA_DEFAULT_MODEL", "llama3")
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        max_connections = getattr(settings, "OLLAMA_MAX_CONNECTIONS", 10)
+        client = httpx.AsyncClient(
+            base_url=getattr(settings, "OLLAMA_URL", "http://localhost:11434"),
+            timeout=httpx.Timeout(getattr(settings, "OLLAMA_TIMEOUT", 60), connect=5),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def stream_generate(prompt, model=None, decoder=None, format=None, options=None):
+    """Yield each NDJSON chunk of ``/api/generate`` as soon as it arrives.
+
+    Pass an ``OllamaStreamDecoder`` to read the joined text and timing stats
+    once the stream is exhausted; ``format="json"`` constrains the reply to JSON.
+    ``options`` (temperature, num_ctx, ...) is sent as-is under ``"options"``.
+    Raises ``OllamaError`` if the stream stops without its final ``done``
+    chunk, so a truncated reply is never taken (or cached) as complete.
+    """
+    decoder = decoder or OllamaStreamDecoder()
+    payload = {"model": model or default_model(), "prompt": prompt, "stream": True}
+    if format:
+        payload["format"] = format
+    if options:
+        payload["options"] = options
+    try:
+        with timed("ollama"):
+            async with get_client().stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for data in response.aiter_bytes():
+                    for chunk in decoder.feed(data):
+                        if "error" in chunk:
+                            raise OllamaError(chunk["error"])
+                        yield chunk
+                    if decoder.done:
+                        break
+                for chunk in decoder.close():
+                    yield chunk
+    except (httpx.HTTPError, StreamDecodeError) as e:
+        raise OllamaError(str(e)) from e
+    if not decoder.done:
+        # the connection closed cleanly but the reply was cut short
+        raise OllamaError("Ollama stream ended before the final chunk")
+    logger.info("ollama %s: %s tokens/s %s", payload["model"], decoder.tokens_per_second, decoder.stats)
+
+
+async def generate(prompt, model=None, format=None, options=None):
+    """Run a whole generation; returns the decoder (``.text``, ``.stats``, ``.tokens_per_second``)."""
+    decoder = OllamaStreamDecoder()
+    async for _ in stream_generate(prompt, model, decoder, format, options):
+        pass
+    return decoder
+
+
+async def cached_generate(prompt, model=None, options=None, bypass_cache=False):
+    """Like ``generate`` but served from the LLM cache when possible.
+
+    Returns ``(text, stats, cache)`` where ``cache`` is "hit", "miss" or
+    "bypass" (the cached entry is refreshed but not read).
+    """
+    model = model or default_model()
+    if not bypass_cache:
+        cached = await llm_cache.aget(model, prompt, options)
+        if cached is not None:
+            return cached["text"], cached["stats"], "hit"
+    result = await generate(prompt, model, options=options)
+    await llm_cache.aset(model, prompt, options, result.text, result.summary())
+    return result.text, result.summary(), "bypass" if bypass_cache else "miss"
+
+
+def sse(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_tokens(prompt, model=None, options=None, use_cache=False, bypass_cache=False):
+    """Server-Sent Events stream of a generation: ``token`` events, then
+    ``done`` (carrying the timing stats) or ``error``.
+
+    With ``use_cache`` a cached reply is sent as a single token and a fresh
+    one is stored once the stream completes.
+    """
+    model = model or default_model()
+    if use_cache and not bypass_cache:
+        cached = await llm_cache.aget(model, prompt, options)
+        if cached is not None:
+            yield sse("token", {"token": cached["text"]})
+            yield sse("done", {"stats": cached["stats"], "cache": "hit"})
+            return
+
+    decoder = OllamaStreamDecoder()
+    try:
+        async for chunk in stream_generate(prompt, model, decoder, options=options):
+            if chunk.get("response"):
+                yield sse("token", {"token": chunk["response"]})
+    except OllamaError as e:
+        yield sse("error", {"error": str(e)})
+        return
+
+    done = {"stats": decoder.summary()}
+    if use_cache:
+        await llm_cache.aset(model, prompt, options, decoder.text, decoder.summary())
+        done["cache"] = "bypass" if bypass_cache else "miss"
+    yield sse("done", done)
@@ -0,0 +1,99 @@
+"""Set-based overdue sweeper.
+
+Users are grouped by time zone, and each zone is swept with one query for
+the tasks that became overdue on that zone's local date: no per-task Python
+date checks. Newly overdue tasks are flagged with one UPDATE per batch and
+get a "marked overdue" activity event, written in bulk per batch.
+"""
+import datetime
+import zoneinfo
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+
+from . import activity
+from .models import Task, UserProfile
+from .signals import tasks_bulk_changed
+
+SWEEP_BATCH_SIZE = 1000
+OVERDUE_ACTION = "marked overdue"
+
+
+ZONE_CACHE_TIMEOUT = 60 * 60
+
+
+def local_today(tz_name, now=None):
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.astimezone(zoneinfo.ZoneInfo(tz_name)).date()
+
+
+def _zone_cache():
+    return caches[getattr(settings, "TASKHERO_TASK_CACHE", "default")]
+
+
+def _zone_key(user_id):
+    return f"taskhero:timezone:{user_id}"
+
+
+def user_zones(user_ids):
+    """``{user_id: time zone name}``, the site zone for users without a
+    profile. Cached, so the stats code can ask on every task write; saving a
+    profile drops its entry (see ``taskhero.signals``)."""
+    cache = _zone_cache()
+    keys = {_zone_key(user_id): user_id for user_id in user_ids}
+    zones = {keys[key]: tz_name for key, tz_name in cache.get_many(list(keys)).items()}
+    missing = [user_id for user_id in keys.values() if user_id not in zones]
+    if missing:
+        found = dict(UserProfile.objects.filter(user_id__in=missing).values_list("user_id", "timezone"))
+        fetched = {user_id: found.get(user_id, settings.TIME_ZONE) for user_id in missing}
+        cache.set_many({_zone_key(user_id): tz_name for user_id, tz_name in fetched.items()}, ZONE_CACHE_TIMEOUT)
+        zones.update(fetched)
+    return zones
+
+
+def forget_zone(user_id):
+    _zone_cache().delete(_zone_key(user_id))
+
+
+def user_today(user_id, now=None):
+    """Today's date where ``user_id`` lives: the date their tasks go overdue by."""
+    return local_today(user_zones([user_id])[user_id], now)
+
+
+def owners_in(tz_name):
+    in_zone = Q(owner__profile__timezone=tz_name)
+    if tz_name == settings.TIME_ZONE:
+        in_zone |= Q(owner__profile__isnull=True)  # users without a profile use the site zone
+    return in_zone
+
+
+def sweep_overdue(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Flag tasks that became overdue in their owner's time zone.
+    Returns the number of tasks flagged."""
+    zones = set(UserProfile.objects.values_list("timezone", flat=True).distinct())
+    zones.add(settings.TIME_ZONE)
+
+    flagged = 0
+    for tz_name in sorted(zones):
+        today = local_today(tz_name, now)
+        candidates = (
+            Task.objects.overdue(today)
+            .filter(owners_in(tz_name), overdue_flagged_on__isnull=True)
+            .order_by()
+            .values_list("pk", "owner_id", "title", named=True)
+        )
+        while True:
+            batch = list(candidates[:batch_size])
+            if not batch:
+                break
+            task_ids = [row.pk for row in batch]
+            Task.objects.filter(pk__in=task_ids).update(overdue_flagged_on=today)
+            with activity.buffered():
+                for row in batch:
+                    activity.record(row, OVERDUE_ACTION)
+            tasks_bulk_changed.send(
+                sender=Task, action="overdue", task_ids=task_ids, owner_ids={row.owner_id for row in batch},
+            )
+            flagged += len(batch)
+    return flagged
@@ -0,0 +1,90 @@
+"""Keyset (cursor) pagination.
+
+A cursor is the ordering key of the last row on a page, so fetching the next
+page is a ``WHERE key > cursor ORDER BY key LIMIT n`` that costs the same no
+matter how deep the page is (unlike ``OFFSET``).
+"""
+import base64
+import datetime
+import json
+
+from django.db import connections
+from django.db.models import Q
+
+# Task.Meta.ordering plus the primary key as a tie-breaker, so keys are unique.
+TASK_KEYSET = ("due_date", "-priority", "created_at", "pk")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # Unlike DjangoJSONEncoder, keep full microsecond precision so the cursor
+    # compares equal to the row it was taken from.
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _field(model, name):
+    name = name.lstrip("-")
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def encode_cursor(obj, keyset):
+    values = [getattr(obj, name.lstrip("-")) for name in keyset]
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, model, keyset):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+        if not isinstance(values, list) or len(values) != len(keyset):
+            raise ValueError("cursor does not match ordering")
+        return [None if v is None else _field(model, name).to_python(v) for name, v in zip(keyset, values)]
+    except Exception as exc:
+        raise InvalidCursor(f"Invalid cursor: {exc}") from exc
+
+
+def _after(queryset, name, value):
+    """Q matching rows that sort strictly after ``value`` on a single column,
+    or None if nothing can. NULL placement follows the database backend."""
+    descending = name.startswith("-")
+    name = name.lstrip("-")
+    nullable = _field(queryset.model, name).null
+    nulls_last = connections[queryset.db].features.nulls_order_largest != descending
+
+    if value is None:
+        return Q(**{f"{name}__isnull": False}) if not nulls_last else None
+    q = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+    if nullable and nulls_last:
+        q |= Q(**{f"{name}__isnull": True})
+    return q
+
+
+def keyset_filter(queryset, keyset, values):
+    """Restrict ``queryset`` (already ordered by ``keyset``) to rows after ``values``."""
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for name, value in zip(keyset, values):
+        after = _after(queryset, name, value)
+        if after is not None:
+            condition |= prefix & after
+        field = name.lstrip("-")
+        prefix &= Q(**{f"{field}__isnull": True}) if value is None else Q(**{field: value})
+    return queryset.filter(condition)
+
+
+def paginate(queryset, keyset, cursor=None, limit=50):
+    """Return ``(items, next_cursor)``; ``next_cursor`` is None on the last page."""
+    queryset = queryset.order_by(*keyset)
+    if cursor:
+        queryset = keyset_filter(queryset, keyset, decode_cursor(cursor, queryset.model, keyset))
+    items = list(queryset[:limit + 1])
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1], keyset)
@@ -0,0 +1,147 @@
+"""Live board updates pushed to a user's open tabs over Server-Sent Events.
+
+Task changes (single saves and deletes, and ``tasks_bulk_changed``) are
+published after commit to the owner's channel as small diff messages:
+
+* ``cards``: re-rendered cards plus the column each now belongs in;
+* ``remove``: ids of deleted cards;
+* ``reload``: too much changed to patch (or the tab fell behind).
+
+Each carries the owner's fresh per-column counts. ``task_events`` streams
+them and the board patches itself in place instead of reloading.
+
+The stream is a long-lived async response, so it needs the ASGI entry point
+(``config/asgi.py``). Under WSGI Django would drain the whole stream before
+sending a byte, holding a worker thread per tab and delivering nothing, so
+``supported`` is False there: the board doesn't subscribe and ``task_events``
+answers 204.
+
+The broker is pluggable (``TASKHERO_PUSH_BROKER``). ``InProcessBroker`` only
+reaches tabs connected to the same process; with several server processes,
+plug in a shared backend (e.g. Redis pub/sub) with the same interface.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.module_loading import import_string
+
+from .board import group_counts, render_cards
+from .models import Task
+
+MAX_CARDS = 50  # beyond this one event asks the tab to reload
+QUEUE_SIZE = 100
+RELOAD = "reload"
+
+
+class Broker:
+    """Interface for push backends. ``publish`` may be called from any thread."""
+
+    def has_subscribers(self, channel):
+        return True  # a shared backend can't tell; always publish
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Async context manager yielding a subscription with ``async get(timeout)``,
+        which returns the next message or None on timeout."""
+        raise NotImplementedError
+
+
+class _Subscription:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def _deliver(self, message):
+        if self.queue.full():
+            # the tab fell behind; drop what it missed and let it start over
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = json.dumps({"type": RELOAD})
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def has_subscribers(self, channel):
+        return bool(self._subscriptions.get(channel))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = _Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[channel].discard(subscription)
+                if not self._subscriptions[channel]:
+                    del self._subscriptions[channel]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, "TASKHERO_PUSH_BROKER", "taskhero.push.InProcessBroker")
+    return import_string(path)()
+
+
+def supported(request):
+    """Whether ``request`` came through ASGI, which can hold an event stream open."""
+    return isinstance(request, ASGIRequest)
+
+
+def channel_for(user_id):
+    return f"tasks:{user_id}"
+
+
+# Messages
+
+def _counts(user_id):
+    return {f"{p}|{s}": n for (p, s), n in group_counts(Task.objects.filter(owner_id=user_id)).items()}
+
+
+def _publish(user_id, message):
+    message["counts"] = _counts(user_id)
+    get_broker().publish(channel_for(user_id), json.dumps(message, separators=(",", ":")))
+
+
+def tasks_changed(user_id, task_ids):
+    """Publish the new cards of ``task_ids`` (saved or updated) to ``user_id``."""
+    if not get_broker().has_subscribers(channel_for(user_id)):
+        return
+    if len(task_ids) > MAX_CARDS:
+        _publish(user_id, {"type": RELOAD})
+        return
+    cards = list(Task.objects.filter(owner_id=user_id, pk__in=task_ids).card())
+    _publish(user_id, {"type": "cards", "cards": [
+        {"id": card.pk, "priority": card.priority, "status": card.status, "html": html}
+        for card, html in zip(cards, render_cards(cards))
+    ]})
+
+
+def tasks_removed(user_id, task_ids):
+    if get_broker().has_subscribers(channel_for(user_id)):
+        _publish(user_id, {"type": "remove", "ids": list(task_ids)})
@@ -0,0 +1,151 @@
+"""Query budgets: catch views that quietly add a query per row.
+
+``@query_budget(n)`` declares how many queries a view may issue. On its own
+it only marks the view; ``QueryBudgetMiddleware`` enforces the mark in
+development (``TASKHERO_QUERY_BUDGET = "log"`` or ``"raise"``), and also flags
+any request that runs the same SQL shape more than ``repeat_limit`` times, the
+signature of an N+1 loop. ``query_budget`` is also a context manager for
+tests and scripts::
+
+    with query_budget(3):
+        list(Task.objects.for_user(user))
+"""
+import logging
+import re
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import observe_queries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEAT_LIMIT = 10
+
+_PLACEHOLDER_RUN = re.compile(r"%s(?:\s*,\s*%s)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def sql_shape(sql):
+    """``sql`` with ``IN (%s, %s, ...)`` lists collapsed, so the same query
+    with a different number of ids counts as one shape."""
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_RUN.sub("%s, ...", sql)).strip()
+
+
+class QueryLog:
+    """Every query seen while observing, counted by shape."""
+
+    def __init__(self):
+        self.queries = []
+        self.shapes = Counter()
+
+    def __call__(self, sql):
+        self.queries.append(sql)
+        self.shapes[sql_shape(sql)] += 1
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, limit):
+        """``[(shape, count)]`` for shapes run more than ``limit`` times."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > limit]
+
+
+def check_budget(log, max_queries=None, repeat_limit=DEFAULT_REPEAT_LIMIT, label="block"):
+    """Return a list of problems with ``log`` (empty when within budget)."""
+    problems = []
+    if max_queries is not None and log.count > max_queries:
+        problems.append(f"{label} ran {log.count} queries, budget is {max_queries}")
+    if repeat_limit is not None:
+        for shape, n in log.repeated(repeat_limit):
+            problems.append(f"{label} ran the same query {n} times (limit {repeat_limit}): {shape[:200]}")
+    return problems
+
+
+class query_budget:
+    """Declare or enforce a maximum number of queries.
+
+    As a decorator it marks a view for ``QueryBudgetMiddleware``; as a context
+    manager it raises ``QueryBudgetExceeded`` on exit if the block went over.
+    """
+
+    def __init__(self, max_queries, repeat_limit=DEFAULT_REPEAT_LIMIT):
+        self.max_queries = max_queries
+        self.repeat_limit = repeat_limit
+
+    def __call__(self, view):
+        view.query_budget = self
+        return view
+
+    def __enter__(self):
+        self.log = QueryLog()
+        self._observing = observe_queries(self.log)
+        self._observing.__enter__()
+        return self.log
+
+    def __exit__(self, exc_type, exc, tb):
+        self._observing.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            problems = check_budget(self.log, self.max_queries, self.repeat_limit)
+            if problems:
+                raise QueryBudgetExceeded("\n".join(problems + self.log.queries))
+
+
+class QueryBudgetMiddleware:
+    """Enforce ``@query_budget`` marks and repeated-query limits in development.
+
+    ``TASKHERO_QUERY_BUDGET`` picks what happens when a request goes over:
+    ``"log"`` writes a warning, ``"raise"`` raises ``QueryBudgetExceeded``,
+    anything falsy removes the middleware. Views without a mark only get the
+    repeated-query check (``TASKHERO_QUERY_REPEAT_LIMIT``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, "TASKHERO_QUERY_BUDGET", None)
+        if not self.mode:
+            raise MiddlewareNotUsed
+        self.repeat_limit = getattr(settings, "TASKHERO_QUERY_REPEAT_LIMIT", DEFAULT_REPEAT_LIMIT)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        log = QueryLog()
+        with observe_queries(log):
+            response = self.get_response(request)
+        self._check(request, log)
+        return response
+
+    async def __acall__(self, request):
+        log = QueryLog()
+        with observe_queries(log):
+            response = await self.get_response(request)
+        self._check(request, log)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, "query_budget", None)
+
+    def _check(self, request, log):
+        budget = getattr(request, "_query_budget", None)
+        max_queries = budget.max_queries if budget else None
+        repeat_limit = budget.repeat_limit if budget else self.repeat_limit
+        problems = check_budget(log, max_queries, repeat_limit, label=request.path)
+        if not problems:
+            return
+        if self.mode == "raise":
+            raise QueryBudgetExceeded("\n".join(problems))
+        for problem in problems:
+            logger.warning("query budget: %s", problem)
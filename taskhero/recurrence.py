@@ -0,0 +1,212 @@
+"""Repeating tasks.
+
+A ``RecurrenceRule`` describes a series; its occurrences are ordinary Tasks,
+created ahead of time only for a rolling window of ``WINDOW_DAYS``. The
+board, the overdue sweeper, search and sync see them like any other task,
+and the table holds one window per series instead of every future copy.
+
+``start`` makes a new task the first occurrence of a series and fills its
+first window. ``extend`` (``manage.py extend_recurrences``, run daily) moves
+every open window forward, a batch of rules and one ``bulk_create`` at a
+time, and ``stop`` ends a series early. ``occurrence_dates`` starts from the period that holds the window, so
+extending costs the same for a series started yesterday or years ago.
+"""
+import calendar
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RecurrenceRule, Task
+from .signals import tasks_bulk_changed
+
+WINDOW_DAYS = 30
+EXTEND_BATCH_SIZE = 500
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]  # RRULE BYDAY, Monday = 0
+
+_DAY = datetime.timedelta(days=1)
+_RRULE_KEYS = {"FREQ", "INTERVAL", "BYDAY", "UNTIL", "COUNT"}
+
+
+def parse_weekdays(text):
+    """``"MO,WE"`` -> ``[0, 2]``."""
+    codes = [code.strip().upper() for code in (text or "").split(",") if code.strip()]
+    unknown = [code for code in codes if code not in WEEKDAY_CODES]
+    if unknown:
+        raise ValueError(f"Unknown weekday(s): {', '.join(unknown)}")
+    return sorted({WEEKDAY_CODES.index(code) for code in codes})
+
+
+def parse_rrule(text):
+    """``RecurrenceRule`` fields from an iCalendar RRULE such as
+    ``FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=10``. Supports FREQ (DAILY,
+    WEEKLY, MONTHLY), INTERVAL, BYDAY (weekly), UNTIL (a date) and COUNT;
+    raises ValueError for anything else."""
+    try:
+        parts = dict(part.split("=", 1) for part in text.strip().removeprefix("RRULE:").split(";") if part)
+    except ValueError:
+        raise ValueError(f"Invalid RRULE {text!r}")
+    parts = {key.upper(): value.strip() for key, value in parts.items()}
+    unsupported = set(parts) - _RRULE_KEYS
+    if unsupported:
+        raise ValueError(f"Unsupported RRULE part(s): {', '.join(sorted(unsupported))}")
+    freq = parts.get("FREQ", "").upper()
+    if freq not in dict(RecurrenceRule.FREQ_CHOICES):
+        raise ValueError(f"Unsupported FREQ {freq!r}")
+    fields = {"freq": freq, "interval": int(parts.get("INTERVAL", 1))}
+    if fields["interval"] < 1:
+        raise ValueError("INTERVAL must be at least 1")
+    if "BYDAY" in parts:
+        if freq != RecurrenceRule.WEEKLY:
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        fields["weekdays"] = ",".join(WEEKDAY_CODES[day] for day in parse_weekdays(parts["BYDAY"]))
+    if "UNTIL" in parts:
+        fields["until"] = datetime.datetime.strptime(parts["UNTIL"][:8], "%Y%m%d").date()
+    if "COUNT" in parts:
+        fields["count"] = int(parts["COUNT"])
+        if fields["count"] < 1:
+            raise ValueError("COUNT must be at least 1")
+    return fields
+
+
+def _add_months(day, months):
+    """``day`` moved by ``months``, clamped to the end of shorter months
+    (a series on the 31st falls on Feb 28/29)."""
+    index = day.month - 1 + months
+    year, month = day.year + index // 12, index % 12 + 1
+    return datetime.date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_dates(rule, after, through):
+    """The dates of ``rule`` in ``(after, through]``, in order. Ignores
+    ``count``, which depends on what was already created."""
+    start, step = rule.starts_on, rule.interval
+    if rule.until:
+        through = min(through, rule.until)
+    first = max(after + _DAY, start)
+    if first > through:
+        return
+
+    if rule.freq == RecurrenceRule.DAILY:
+        day = start + datetime.timedelta(days=-(-(first - start).days // step) * step)
+        while day <= through:
+            yield day
+            day += datetime.timedelta(days=step)
+
+    elif rule.freq == RecurrenceRule.WEEKLY:
+        weekdays = parse_weekdays(rule.weekdays) or [start.weekday()]
+        first_week = start - datetime.timedelta(days=start.weekday())
+        week = first_week + datetime.timedelta(weeks=(first - first_week).days // 7 // step * step)
+        while week <= through:
+            for weekday in weekdays:
+                day = week + datetime.timedelta(days=weekday)
+                if first <= day <= through:
+                    yield day
+            week += datetime.timedelta(weeks=step)
+
+    elif rule.freq == RecurrenceRule.MONTHLY:
+        period = ((first.year - start.year) * 12 + first.month - start.month) // step
+        while (day := _add_months(start, period * step)) <= through:
+            if day >= first:
+                yield day
+            period += 1
+
+
+def _plan(rule, horizon):
+    """Unsaved occurrences of ``rule`` up to ``horizon``; moves the rule's
+    window fields along (in memory)."""
+    dates = list(occurrence_dates(rule, rule.materialized_through, horizon))
+    if rule.count is not None:
+        dates = dates[:max(0, rule.count - rule.materialized_count)]
+    rule.materialized_through = max(rule.materialized_through, horizon)
+    rule.materialized_count += len(dates)
+    rule.finished = (
+        (rule.until is not None and rule.materialized_through >= rule.until)
+        or (rule.count is not None and rule.materialized_count >= rule.count)
+    )
+    return [
+        Task(
+            owner_id=rule.owner_id, title=rule.title, description=rule.description, priority=rule.priority,
+            due_date=day, recurrence=rule,
+        )
+        for day in dates
+    ]
+
+
+def _materialize(rules, horizon, skip_existing=False):
+    tasks = [task for rule in rules for task in _plan(rule, horizon)]
+    if skip_existing and tasks:
+        # an occurrence can already exist if a rule's window was rewound (a
+        # restored backup, an edit in the admin); it still counts, but isn't
+        # created twice against the (recurrence, due_date) constraint
+        existing = set(
+            Task.objects.filter(recurrence__in=rules, due_date__gte=min(task.due_date for task in tasks))
+            .values_list("recurrence_id", "due_date")
+        )
+        tasks = [task for task in tasks if (task.recurrence_id, task.due_date) not in existing]
+    Task.objects.bulk_create(tasks, batch_size=1000)
+    RecurrenceRule.objects.bulk_update(rules, ["materialized_through", "materialized_count", "finished"])
+    return tasks
+
+
+def _announce(tasks):
+    if tasks:
+        tasks_bulk_changed.send(
+            sender=Task, action="recur", task_ids=[task.pk for task in tasks],
+            owner_ids={task.owner_id for task in tasks},
+        )
+
+
+def horizon(today=None, window_days=WINDOW_DAYS):
+    return (today or timezone.localdate()) + datetime.timedelta(days=window_days)
+
+
+def start(task, freq, interval=1, weekdays="", until=None, count=None, today=None, window_days=WINDOW_DAYS):
+    """Save ``task`` (new, with an owner and a due date) as the first
+    occurrence of a series and create the rest of its first window.
+    Returns the ``RecurrenceRule``."""
+    if task.due_date is None:
+        raise ValueError("A repeating task needs a due date")
+    if count is not None and count < 1:
+        raise ValueError("A repeating task needs a count of at least 1")
+    with transaction.atomic():
+        rule = RecurrenceRule.objects.create(
+            owner_id=task.owner_id, title=task.title, description=task.description, priority=task.priority,
+            freq=freq, interval=interval, weekdays=weekdays, starts_on=task.due_date, until=until, count=count,
+            materialized_through=task.due_date, materialized_count=1,
+        )
+        task.recurrence = rule
+        task.save()
+        tasks = _materialize([rule], horizon(today, window_days))
+    _announce(tasks)
+    return rule
+
+
+def stop(rule, after):
+    """End ``rule`` with its occurrence on ``after``: ``extend`` creates no
+    more, and the open occurrences already created for later dates are
+    deleted (completed ones are kept). Returns the number deleted."""
+    with transaction.atomic():
+        RecurrenceRule.objects.filter(pk=rule.pk).update(until=after, finished=True)
+        rule.until, rule.finished = after, True
+        later = Task.objects.filter(recurrence=rule, due_date__gt=after).exclude(status=Task.STATUS_COMPLETED)
+        return later.bulk_delete()
+
+
+def extend(today=None, window_days=WINDOW_DAYS, batch_size=EXTEND_BATCH_SIZE):
+    """Materialize every open series up to ``today + window_days``. Only
+    rules whose window ends earlier are read, and occurrences that already
+    exist are skipped, so running it again is harmless. Returns the number
+    of tasks created."""
+    target = horizon(today, window_days)
+    due = RecurrenceRule.objects.filter(finished=False, materialized_through__lt=target).order_by("pk")
+    created, last_pk = 0, 0
+    while True:
+        with transaction.atomic():
+            rules = list(due.filter(pk__gt=last_pk).select_for_update()[:batch_size])
+            if not rules:
+                return created
+            tasks = _materialize(rules, target, skip_existing=True)
+        _announce(tasks)
+        created += len(tasks)
+        last_pk = rules[-1].pk
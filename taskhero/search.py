@@ -0,0 +1,188 @@
+"""Full-text search over tasks and saved prompts.
+
+``get_backend()`` picks an implementation for the database in use (or the
+dotted path in ``TASKHERO_SEARCH_BACKEND``):
+
+* SQLite: FTS5 external-content tables kept in sync by triggers, ranked with bm25.
+* PostgreSQL: ``to_tsvector`` matched against a GIN expression index, ranked with ts_rank.
+* anything else: ``icontains`` fallback.
+
+Every backend takes a queryset that is already scoped (e.g. ``for_user``)
+and only searches within it.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# model label -> columns indexed for search
+SEARCH_FIELDS = {
+    "taskhero.task": ("title", "description"),
+    "taskhero.savedprompt": ("title", "prompt"),
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fields(model):
+    return SEARCH_FIELDS[model._meta.label_lower]
+
+
+class SearchBackend:
+    def search(self, queryset, query, limit=20):
+        """Return up to ``limit`` objects of ``queryset`` matching ``query``,
+        best first, each with a ``search_score`` attribute (higher is better)."""
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """Restrict ``queryset`` to matches without ranking (used by the admin)."""
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    def filter(self, queryset, query):
+        condition = Q()
+        for token in _TOKEN_RE.findall(query):
+            token_q = Q()
+            for field in _fields(queryset.model):
+                token_q |= Q(**{f"{field}__icontains": token})
+            condition &= token_q
+        return queryset.filter(condition) if condition else queryset.none()
+
+    def search(self, queryset, query, limit=20):
+        results = list(self.filter(queryset, query)[:limit])
+        for obj in results:
+            obj.search_score = 0.0
+        return results
+
+
+class SQLiteFTSBackend(SearchBackend):
+    @staticmethod
+    def table(model):
+        return f"{model._meta.db_table}_fts"
+
+    @staticmethod
+    def match_expression(query):
+        """Turn free text into an FTS5 query: every word must match, as a prefix."""
+        tokens = _TOKEN_RE.findall(query)
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        table = self.table(queryset.model)
+        return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match]))
+
+    def search(self, queryset, query, limit=20):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        table = self.table(queryset.model)
+        scope_sql, scope_params = queryset.order_by().values("pk").query.sql_with_params()
+        sql = (
+            f"SELECT rowid, bm25({table}) AS rank FROM {table} "
+            f"WHERE {table} MATCH %s AND rowid IN ({scope_sql}) ORDER BY rank LIMIT %s"
+        )
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(sql, [match, *scope_params, limit])
+            ranked = cursor.fetchall()
+        objects = queryset.in_bulk([pk for pk, _ in ranked])
+        results = []
+        for pk, rank in ranked:
+            if pk in objects:
+                objects[pk].search_score = -rank  # bm25: lower is better
+                results.append(objects[pk])
+        return results
+
+
+class PostgresSearchBackend(SearchBackend):
+    config = "english"
+
+    def _vector(self, model):
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector(*_fields(model), config=self.config)
+
+    def _query(self, query):
+        from django.contrib.postgres.search import SearchQuery
+        return SearchQuery(query, search_type="websearch", config=self.config)
+
+    def filter(self, queryset, query):
+        return queryset.annotate(search_document=self._vector(queryset.model)).filter(search_document=self._query(query))
+
+    def search(self, queryset, query, limit=20):
+        from django.contrib.postgres.search import SearchRank
+        ranked = self.filter(queryset, query).annotate(
+            search_score=SearchRank(self._vector(queryset.model), self._query(query)),
+        )
+        return list(ranked.order_by("-search_score")[:limit])
+
+
+def get_backend(using="default"):
+    path = getattr(settings, "TASKHERO_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    vendor = connections[using].vendor
+    if vendor == "sqlite":
+        return SQLiteFTSBackend()
+    if vendor == "postgresql":
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+
+# Index maintenance (called from migrations and ``manage.py rebuild_search_index``)
+
+def _sqlite_statements(db_table, fields):
+    table = f"{db_table}_fts"
+    columns = ", ".join(fields)
+    new_values = ", ".join(f"new.{f}" for f in fields)
+    old_values = ", ".join(f"old.{f}" for f in fields)
+    delete_old = f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, content='{db_table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {db_table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {db_table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON {db_table} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {table}({table}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_statements(db_table, fields):
+    document = " || ' ' || ".join(f"COALESCE({f}, '')" for f in fields)
+    return [
+        f"CREATE INDEX IF NOT EXISTS {db_table}_search_idx ON {db_table} "
+        f"USING GIN (to_tsvector('english'::regconfig, {document}))",
+    ]
+
+
+def install_search_index(connection, models):
+    """Create (or repair) the search index for ``models`` and fill it.
+
+    Idempotent. On SQLite, run it again after a migration that rebuilds one
+    of the tables, since SQLite drops triggers together with the old table.
+    """
+    builder = {"sqlite": _sqlite_statements, "postgresql": _postgres_statements}.get(connection.vendor)
+    if builder is None:
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            for statement in builder(model._meta.db_table, _fields(model)):
+                cursor.execute(statement)
+
+
+def uninstall_search_index(connection, models):
+    with connection.cursor() as cursor:
+        for model in models:
+            db_table = model._meta.db_table
+            if connection.vendor == "sqlite":
+                for suffix in ("ai", "ad", "au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {db_table}_fts_{suffix}")
+                cursor.execute(f"DROP TABLE IF EXISTS {db_table}_fts")
+            elif connection.vendor == "postgresql":
+                cursor.execute(f"DROP INDEX IF EXISTS {db_table}_search_idx")
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import invalidate_user_tasks
+
+# Sent by the TaskQuerySet bulk methods, which bypass post_save/post_delete.
+# Arguments: action, task_ids, owner_ids.
+tasks_bulk_changed = Signal()
+
+
+@receiver(post_save, sender="taskhero.Task")
+@receiver(post_delete, sender="taskhero.Task")
+def invalidate_task_cache(sender, instance, **kwargs):
+    """Any saved or deleted task (including ``mark_completed``) makes the
+    owner's cached pages stale. The version is bumped once the change
+    commits: bumped earlier, a concurrent request could still cache the
+    uncommitted state under the new version."""
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: invalidate_user_tasks(owner_id))
+
+
+@receiver(tasks_bulk_changed)
+def invalidate_bulk_task_cache(sender, owner_ids, **kwargs):
+    def invalidate():
+        for owner_id in owner_ids:
+            invalidate_user_tasks(owner_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender="taskhero.Task")
+def update_stats_on_save(sender, instance, created, **kwargs):
+    from . import stats
+    stats.task_saved(instance, created)
+
+
+@receiver(post_delete, sender="taskhero.Task")
+def update_stats_on_delete(sender, instance, **kwargs):
+    from . import stats
+    stats.task_deleted(instance)
+
+
+@receiver(tasks_bulk_changed)
+def rebuild_stats_on_bulk_change(sender, owner_ids, **kwargs):
+    from . import stats
+    stats.rebuild_for_users(owner_ids)
+
+
+
+@receiver(post_save, sender="taskhero.UserProfile")
+@receiver(post_delete, sender="taskhero.UserProfile")
+def forget_user_zone(sender, instance, **kwargs):
+    """A changed time zone moves the date the user's tasks go overdue by; an
+    overdue count taken for another date is recounted on the next read."""
+    from . import overdue
+    overdue.forget_zone(instance.user_id)
+
+
+@receiver(post_save, sender="taskhero.Task")
+def push_saved_task(sender, instance, **kwargs):
+    from . import push
+    owner_id, task_id = instance.owner_id, instance.pk
+    transaction.on_commit(lambda: push.tasks_changed(owner_id, [task_id]))
+
+
+@receiver(post_delete, sender="taskhero.Task")
+def push_deleted_task(sender, instance, **kwargs):
+    from . import push
+    owner_id, task_id = instance.owner_id, instance.pk
+    transaction.on_commit(lambda: push.tasks_removed(owner_id, [task_id]))
+
+
+@receiver(tasks_bulk_changed)
+def push_bulk_change(sender, action, task_ids, owner_ids, **kwargs):
+    from . import push
+    publish = push.tasks_removed if action == "delete" else push.tasks_changed
+
+    def send():
+        for owner_id in owner_ids:
+            publish(owner_id, task_ids)
+
+    transaction.on_commit(send)
+
+
+@receiver(post_delete, sender="taskhero.Task")
+def leave_tombstone(sender, instance, origin=None, **kwargs):
+    """Deleted tasks leave a tombstone for delta sync, unless the whole
+    account is going (deleting a user cascades to its tasks)."""
+    from . import sync
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model is sender:
+        sync.record_deletion(instance)
@@ -0,0 +1,142 @@
+"""Maintenance of the denormalized ``UserTaskStats`` rows.
+
+Single-task saves and deletes adjust the counters with one ``UPDATE ... SET
+x = x + 1``; bulk operations and the ``rebuild_task_stats`` command recount
+from the task table with a single GROUP BY.
+
+"Overdue" is judged on the owner's local date (``UserProfile.timezone``),
+the same one the overdue sweeper uses, and ``overdue_as_of`` holds that date.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Task, UserProfile, UserTaskStats
+from .overdue import local_today, owners_in, user_today, user_zones
+
+STATUS_FIELDS = {
+    Task.STATUS_TODO: "todo",
+    Task.STATUS_IN_PROGRESS: "in_progress",
+    Task.STATUS_COMPLETED: "completed",
+}
+PRIORITY_FIELDS = {
+    Task.PRIORITY_LOW: "low",
+    Task.PRIORITY_MEDIUM: "medium",
+    Task.PRIORITY_HIGH: "high",
+}
+COUNT_FIELDS = ["total", *STATUS_FIELDS.values(), *PRIORITY_FIELDS.values(), "overdue"]
+
+
+def _is_overdue(status, due_date, today):
+    return bool(due_date) and status != Task.STATUS_COMPLETED and due_date < today
+
+
+def _contribution(state, today):
+    """Counter increments one task in ``state`` (status, priority, due_date) adds."""
+    status, priority, due_date = state
+    deltas = defaultdict(int, total=1)
+    if status in STATUS_FIELDS:
+        deltas[STATUS_FIELDS[status]] += 1
+    if priority in PRIORITY_FIELDS:
+        deltas[PRIORITY_FIELDS[priority]] += 1
+    if _is_overdue(status, due_date, today):
+        deltas["overdue"] += 1
+    return deltas
+
+
+def _apply(user_id, deltas, today):
+    deltas = {field: d for field, d in deltas.items() if d}
+    if not deltas:
+        return 1
+    overdue = deltas.pop("overdue", 0)
+    updates = {field: F(field) + d for field, d in deltas.items()}
+    if overdue:
+        # only adjust the overdue count if it is current; otherwise it is recounted on read
+        updated = UserTaskStats.objects.filter(user_id=user_id, overdue_as_of=today).update(
+            overdue=F("overdue") + overdue, updated_at=timezone.now(), **updates,
+        )
+        if updated:
+            return updated
+    return UserTaskStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **updates)
+
+
+def task_saved(task, created):
+    today = user_today(task.owner_id)
+    new = task.stats_state()
+    old = None if created else getattr(task, "_loaded_state", None)
+    if new is None or (old is None and not created):
+        rebuild_for_users([task.owner_id])
+    else:
+        deltas = _contribution(new, today)
+        if old is not None:
+            for field, d in _contribution(old, today).items():
+                deltas[field] -= d
+        if not _apply(task.owner_id, deltas, today):
+            rebuild_for_users([task.owner_id])
+    task._loaded_state = new
+
+
+def task_deleted(task):
+    state = getattr(task, "_loaded_state", None) or task.stats_state()
+    if state is None:
+        return
+    today = user_today(task.owner_id)
+    deltas = {field: -d for field, d in _contribution(state, today).items()}
+    # never recreate the row here: the user may be the one being deleted
+    _apply(task.owner_id, deltas, today)
+
+
+def rebuild_for_users(user_ids=None):
+    """Recount stats for ``user_ids`` (every user with tasks if None). Returns rows written."""
+    tasks = Task.objects.order_by()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        tasks = tasks.filter(owner_id__in=user_ids)
+        zones = user_zones(user_ids)
+        zone_names = set(zones.values())
+    else:
+        zones = dict(UserProfile.objects.values_list("user_id", "timezone"))
+        zone_names = set(zones.values()) | {settings.TIME_ZONE}
+    todays = {tz_name: local_today(tz_name) for tz_name in zone_names}
+
+    counts = defaultdict(lambda: dict.fromkeys(COUNT_FIELDS, 0))
+    for row in tasks.values("owner_id", "status", "priority").annotate(n=Count("pk")):
+        stats = counts[row["owner_id"]]
+        stats["total"] += row["n"]
+        if row["status"] in STATUS_FIELDS:
+            stats[STATUS_FIELDS[row["status"]]] += row["n"]
+        if row["priority"] in PRIORITY_FIELDS:
+            stats[PRIORITY_FIELDS[row["priority"]]] += row["n"]
+    for tz_name, today in todays.items():  # one count per time zone among the users
+        in_zone = tasks.filter(owners_in(tz_name)) if len(todays) > 1 else tasks
+        for row in in_zone.overdue(today).values("owner_id").annotate(n=Count("pk")):
+            counts[row["owner_id"]]["overdue"] = row["n"]
+    for user_id in user_ids or ():
+        if user_id not in counts:  # users whose tasks are all gone get a row of zeros
+            counts[user_id] = dict.fromkeys(COUNT_FIELDS, 0)
+
+    rows = [
+        UserTaskStats(user_id=user_id, overdue_as_of=todays[zones.get(user_id, settings.TIME_ZONE)], **values)
+        for user_id, values in counts.items()
+    ]
+    UserTaskStats.objects.bulk_create(
+        rows, batch_size=500, update_conflicts=True, unique_fields=["user"],
+        update_fields=[*COUNT_FIELDS, "overdue_as_of", "updated_at"],
+    )
+    return len(rows)
+
+
+def get_stats(user):
+    """The user's stats row, creating it or refreshing a stale overdue count as needed."""
+    today = user_today(user.pk)
+    stats = UserTaskStats.objects.filter(user=user).first()
+    if stats is None:
+        rebuild_for_users([user.pk])
+        return UserTaskStats.objects.get(user=user)
+    if stats.overdue_as_of != today:
+        stats.overdue = Task.objects.for_user(user).overdue(today).count()
+        stats.overdue_as_of = today
+        stats.save(update_fields=["overdue", "overdue_as_of", "updated_at"])
+    return stats
@@ -0,0 +1,104 @@
+"""Delta sync: "what changed since my last token" for clients with a local copy.
+
+Every task write takes the next value of the owner's ``TaskChangeCounter``
+into ``Task.change_seq``; deletes leave a ``TaskTombstone`` with one too. A
+token is the ``(change_seq, id)`` of the last change a client has seen, so a
+sync reads only the rows after it on the (owner, change_seq) indexes and
+costs the same however many tasks the account holds.
+
+Without a token the first pages are a full snapshot. Tombstones are pruned
+after ``TOMBSTONE_RETENTION_DAYS``; a token older than that raises
+``TokenExpired`` and the client has to start over without one.
+"""
+import base64
+import datetime
+import json
+
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import Task, TaskChangeCounter, TaskTombstone
+from .pagination import InvalidCursor
+
+SYNC_PAGE_SIZE = 200
+TOMBSTONE_RETENTION_DAYS = 30
+
+
+class TokenExpired(Exception):
+    pass
+
+
+def encode_token(seq, pk, floor=0):
+    raw = json.dumps([seq, pk, floor] if floor else [seq, pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token):
+    """``(seq, pk, floor)``; ``floor`` is only set while paging through a snapshot."""
+    try:
+        seq, pk, *floor = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8"))
+        if len(floor) > 1:
+            raise ValueError("too many parts")
+        return int(seq), int(pk), int(floor[0]) if floor else 0
+    except Exception as exc:
+        raise InvalidCursor(f"Invalid sync token: {exc}") from exc
+
+
+def record_deletion(task):
+    """Leave a tombstone for ``task``; call it in the deleting transaction."""
+    seq = TaskChangeCounter.next_seqs([task.owner_id])[task.owner_id]
+    TaskTombstone.objects.create(owner_id=task.owner_id, task_id=task.pk, change_seq=seq)
+
+
+def changes(user, token=None, fields=("pk",), limit=SYNC_PAGE_SIZE):
+    """``user``'s changes after ``token``: ``(changed, deleted_ids, next_token, has_more)``.
+
+    ``changed`` are named rows of ``fields`` (latest state only, however often
+    a task changed). Keep calling with ``next_token`` while ``has_more``.
+    """
+    last_seq, pruned_seq = (
+        TaskChangeCounter.objects.filter(user=user).values_list("last_seq", "pruned_seq").first() or (0, 0)
+    )
+    # A snapshot's pages carry the counter value it started at (``floor``):
+    # the client can only hold tasks deleted after that, so its tokens stay
+    # good while the tombstones from the floor on are kept.
+    seq, pk, floor = decode_token(token) if token else (0, 0, last_seq)
+    if token and max(seq, floor) < pruned_seq:
+        raise TokenExpired("Sync token is older than the retained deletions; sync again without a token")
+
+    columns = dict.fromkeys(("change_seq", "pk", *fields))
+    tasks = (
+        Task.objects.for_user(user)
+        .filter(Q(change_seq__gt=seq) | Q(change_seq=seq, pk__gt=pk))
+        .order_by("change_seq", "pk").values_list(*columns, named=True)[:limit + 1]
+    )
+    items = [((row.change_seq, row.pk), row) for row in tasks]
+    if token:  # a snapshot has nothing to delete
+        tombstones = (
+            TaskTombstone.objects.filter(owner=user)
+            .filter(Q(change_seq__gt=seq) | Q(change_seq=seq, task_id__gt=pk))
+            .order_by("change_seq", "task_id").values_list("change_seq", "task_id")[:limit + 1]
+        )
+        items += [(key, None) for key in tombstones]
+    items.sort(key=lambda item: item[0])
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    changed = [row for _, row in items if row is not None]
+    deleted = [key[1] for key, row in items if row is None]
+    if has_more:
+        next_token = encode_token(*items[-1][0], floor)
+    else:
+        # everything up to the counter read above has committed and been seen
+        next_token = encode_token(*max([(seq, pk), (last_seq, 0)] + [key for key, _ in items[-1:]]))
+    return changed, deleted, next_token, has_more
+
+
+def prune_tombstones(keep_days=TOMBSTONE_RETENTION_DAYS, now=None):
+    """Delete tombstones older than ``keep_days``, remembering per user the
+    newest one removed so stale tokens are refused. Returns the number removed."""
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=keep_days)
+    old = TaskTombstone.objects.filter(deleted_at__lt=cutoff)
+    for user_id, seq in old.order_by().values_list("owner_id").annotate(seq=Max("change_seq")):
+        TaskChangeCounter.objects.filter(user_id=user_id, pruned_seq__lt=seq).update(pruned_seq=seq)
+    return old.delete()[0]
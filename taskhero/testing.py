@@ -0,0 +1,94 @@
+"""Helpers for tests, benchmarks and local development."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from django.urls import resolve
+
+from .querybudget import DEFAULT_REPEAT_LIMIT, query_budget
+
+STUB_REPLY = (
+    "- Draft the project plan (HIGH, TODO)\n"
+    "- Review last sprint's \"open\" issues (MEDIUM, IN_PROGRESS)\n"
+    "- Archive finished tickets (LOW, COMPLETED)"
+)
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    """Mimics ``POST /api/generate``: streams the reply word by word as NDJSON."""
+
+    protocol_version = "HTTP/1.1"
+    reply = STUB_REPLY
+    delay = 0.0
+    complete = True  # False drops the final "done" chunk, like a cut-off stream
+    requests = ()  # request bodies received, oldest first
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        self.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else " " + word
+            self._chunk({"model": body.get("model"), "response": token, "done": False})
+            if self.delay:
+                time.sleep(self.delay)
+        if not self.complete:
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self._chunk({
+            "model": body.get("model"), "response": "", "done": True,
+            "eval_count": len(words), "eval_duration": int(max(self.delay, 0.001) * len(words) * 1e9),
+        })
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data):
+        line = (json.dumps(data) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_ollama_stub(port=0, reply=STUB_REPLY, delay=0.0, complete=True):
+    handler = type("Handler", (OllamaStubHandler,), {"reply": reply, "delay": delay, "complete": complete, "requests": []})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.requests = handler.requests
+    return server
+
+
+def start_ollama_stub(port=0, reply=STUB_REPLY, delay=0.0, complete=True):
+    """Start a stub Ollama server in a daemon thread and return it.
+    ``server.server_address`` has the bound port, ``server.requests`` the
+    bodies it received, ``server.shutdown()`` stops it."""
+    server = make_ollama_stub(port, reply, delay, complete)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Query budgets
+
+def assert_max_queries(max_queries, repeat_limit=DEFAULT_REPEAT_LIMIT):
+    """Context manager failing with the offending SQL if the block runs more
+    than ``max_queries`` queries or one query shape more than ``repeat_limit`` times."""
+    return query_budget(max_queries, repeat_limit)
+
+
+def assert_view_within_budget(client, path, data=None, method="get", **extra):
+    """Request ``path`` with the test ``client`` and fail if it goes over the
+    ``@query_budget`` its view declares. Returns the response."""
+    budget = getattr(resolve(urlsplit(path).path).func, "query_budget", None)
+    if budget is None:
+        raise AssertionError(f"{path} has no @query_budget")
+    with query_budget(budget.max_queries, budget.repeat_limit):
+        return getattr(client, method)(path, data, **extra)
@@ -1,3 +1,1104 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+import re
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connection
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import activity, ai_tasks, benchmarks, board, dbretry, instrumentation, jobs, llm_cache, ollama, overdue, push, recurrence, stats, sync, transfer, views
+from .cache import tasks_version
+from .management.commands.run_generation_worker import Command as GenerationWorker
+from .models import ActivityDailySummary, GenerationJob, RecurrenceRule, SavedPrompt, Task, TaskActivity, TaskQuerySet, TaskTombstone, UserProfile
+from .pagination import TASK_KEYSET, InvalidCursor, decode_cursor, keyset_filter, paginate
+from .querybudget import QueryBudgetExceeded
+from .testing import STUB_REPLY, assert_max_queries, assert_view_within_budget, start_ollama_stub
+
+
+def make_tasks(owner, count):
+    today = datetime.date.today()
+    return Task.objects.bulk_create([
+        Task(
+            owner=owner, title=f"Task {i}",
+            priority=["LOW", "MEDIUM", "HIGH"][i % 3], status=["TODO", "IN_PROGRESS", "COMPLETED"][i % 3],
+            due_date=today + datetime.timedelta(days=i % 9 - 4),
+        )
+        for i in range(count)
+    ])
+
+
+def encode_cursor_raw(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        tasks = make_tasks(cls.user, 40)
+        # null due dates and created_at ties, so pages break inside runs of equal keys
+        Task.objects.filter(pk__in=[t.pk for t in tasks[::3]]).update(due_date=None)
+        Task.objects.filter(pk__in=[t.pk for t in tasks[::2]]).update(
+            created_at=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+
+    def page_through(self, fetch, limit):
+        pks, cursor = [], None
+        while True:
+            items, cursor = fetch(cursor, limit)
+            self.assertLessEqual(len(items), limit)
+            pks += [item.pk for item in items]
+            if cursor is None:
+                return pks
+
+    def test_pages_match_the_unpaginated_order(self):
+        tasks = Task.objects.for_user(self.user)
+        expected = list(tasks.order_by(*TASK_KEYSET).values_list("pk", flat=True))
+        for queryset in (tasks, tasks.row(), tasks.card()):
+            for limit in (1, 3, 7, 40, 100):
+                with self.subTest(queryset=str(queryset.query)[:30], limit=limit):
+                    pks = self.page_through(lambda cursor, n: paginate(queryset, TASK_KEYSET, cursor, n), limit)
+                    self.assertEqual(pks, expected)
+
+    def test_board_column_continues_the_board(self):
+        tasks = Task.objects.for_user(self.user)
+        for priority, status in board.group_counts(tasks):
+            with self.subTest(priority=priority, status=status):
+                cards, next_cursor = board.board_column(tasks, priority, status, per_group=2)
+                self.assertIsNotNone(next_cursor)
+                pks = [card.pk for card in cards] + self.page_through(
+                    lambda cursor, n: board.board_column(tasks, priority, status, cursor or next_cursor, n), 2,
+                )
+                column = tasks.filter(priority=priority, status=status).order_by(*TASK_KEYSET)
+                self.assertEqual(pks, list(column.values_list("pk", flat=True)))
+
+    def test_invalid_cursors(self):
+        valid = paginate(Task.objects.all(), TASK_KEYSET, limit=1)[1]
+        bad = [
+            "not base64!", valid[:-4], encode_cursor_raw(["2026-01-01", "HIGH"]),
+            encode_cursor_raw(["not a date", "HIGH", "2026-01-01T00:00:00+00:00", 1]), encode_cursor_raw({"a": 1}),
+        ]
+        for cursor in bad:
+            with self.subTest(cursor), self.assertRaises(InvalidCursor):
+                paginate(Task.objects.all(), TASK_KEYSET, cursor)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("taskhero:task_column"), {"priority": "HIGH", "status": "TODO", "cursor": bad[0]})
+        self.assertEqual(response.status_code, 400)
+
+
+class BoardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        make_tasks(cls.user, 3)
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["fragments"].clear()
+
+    def cards(self):
+        return list(Task.objects.for_user(self.user).card().order_by("pk"))
+
+    def test_card_fragments_are_cached_until_the_task_changes(self):
+        with mock.patch.object(board, "status_badge", wraps=board.status_badge) as rendered:
+            first = board.render_cards(self.cards())
+            self.assertEqual(rendered.call_count, 3)
+            self.assertEqual(board.render_cards(self.cards()), first)
+            self.assertEqual(rendered.call_count, 3)
+
+            task = Task.objects.filter(owner=self.user).order_by("pk").first()
+            task.title = "Renamed"
+            task.save()
+            html = board.render_cards(self.cards())
+            self.assertEqual(rendered.call_count, 4)
+        self.assertIn("Renamed", html[0])
+        self.assertEqual(html[1:], first[1:])
+
+    def test_board_caps_each_column_and_loads_the_rest(self):
+        today = datetime.date.today()
+        Task.objects.bulk_create([
+            Task(owner=self.user, title=f"Urgent {i}", priority="HIGH", status="TODO", due_date=today + datetime.timedelta(days=i % 4))
+            for i in range(board.BOARD_PAGE_SIZE + 5)
+        ])
+        Task.objects.create(owner=User.objects.create_user("bob"), title="Not ada's", priority="HIGH", status="TODO")
+        self.client.force_login(self.user)
+
+        response = assert_view_within_budget(self.client, reverse("taskhero:task_list"))
+        columns = {
+            (group["priority"], column["status"]): column
+            for group in response.context["grouped_tasks"] for column in group["statuses"]
+        }
+        expected = Task.objects.for_user(self.user).order_by().values("priority", "status").annotate(n=Count("pk"))
+        self.assertEqual({key: column["count"] for key, column in columns.items()},
+                         {(row["priority"], row["status"]): row["n"] for row in expected})
+        for key, column in columns.items():
+            with self.subTest(column=key):
+                self.assertEqual(len(column["tasks"]), min(column["count"], board.BOARD_PAGE_SIZE))
+                self.assertEqual(column["next_cursor"] is not None, column["count"] > board.BOARD_PAGE_SIZE)
+
+        urgent = columns[("HIGH", "TODO")]
+        response = assert_view_within_budget(
+            self.client, reverse("taskhero:task_column"),
+            {"priority": "HIGH", "status": "TODO", "cursor": urgent["next_cursor"]},
+        )
+        more = [int(pk) for pk in re.findall(r'data-task-id="(\d+)"', response.json()["html"])]
+        self.assertIsNone(response.json()["next_cursor"])
+        column = Task.objects.for_user(self.user).filter(priority="HIGH", status="TODO").order_by(*TASK_KEYSET)
+        self.assertEqual([task.pk for task in urgent["tasks"]] + more, list(column.values_list("pk", flat=True)))
+
+    def test_live_board_sort_keys_follow_the_database_order(self):
+        today = datetime.date.today()
+        for due_date in (None, today, None, today - datetime.timedelta(days=3)):
+            Task.objects.create(owner=self.user, title="Column", priority="HIGH", status="IN_PROGRESS", due_date=due_date)
+        column = Task.objects.for_user(self.user).filter(priority="HIGH", status="IN_PROGRESS").card().order_by(*TASK_KEYSET)
+        sort_keys = [re.search(r'data-sort="([^"]*)"', html).group(1) for html in board.render_cards(column)]
+        self.assertEqual(sorted(sort_keys), sort_keys)  # what placeCard's string comparison assumes
+
+        with mock.patch.object(connection.features, "nulls_order_largest", True):
+            self.assertGreater(board.null_due_sort_key(), today.isoformat())
+        with mock.patch.object(connection.features, "nulls_order_largest", False):
+            self.assertLess(board.null_due_sort_key(), today.isoformat())
+
+    def test_priority_colors(self):
+        colors = {priority: Task(priority=priority).get_priority_color() for priority, _ in Task.PRIORITY_CHOICES}
+        self.assertEqual(colors, {"HIGH": "red", "MEDIUM": "yellow", "LOW": "green"})
+
+
+@override_settings(TASKHERO_DB_BUSY_RETRIES=2)
+@mock.patch.object(dbretry, "_backoff")
+class BusyRetryTests(SimpleTestCase):
+    def flaky(self, *errors):
+        """A callable raising ``errors`` in turn, then returning "ok"."""
+        return mock.Mock(side_effect=[*errors, "ok"])
+
+    def test_locked_database_is_retried_then_given_up(self, backoff):
+        locked = OperationalError("database is locked")
+        func = self.flaky(locked, locked)
+        self.assertEqual(dbretry.retry_on_busy(func)(), "ok")
+        self.assertEqual((func.call_count, backoff.call_count), (3, 2))
+
+        func = self.flaky(locked, locked, locked)
+        with self.assertRaisesMessage(OperationalError, "database is locked"):
+            dbretry.retry_on_busy(func)()
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_are_not_retried(self, backoff):
+        for error in (OperationalError("no such table: taskhero_task"), IntegrityError("database is locked")):
+            func = self.flaky(error)
+            with self.subTest(error=error), self.assertRaises(type(error)):
+                dbretry.retry_on_busy(func)()
+            self.assertEqual(func.call_count, 1)
+        self.assertFalse(backoff.called)
+
+    def test_statements_inside_a_transaction_are_not_retried(self, backoff):
+        execute = self.flaky(OperationalError("database is locked"))
+        context = {"connection": mock.Mock(in_atomic_block=False)}
+        self.assertEqual(dbretry._retry_wrapper(execute, "UPDATE", [], False, context), "ok")
+
+        execute = self.flaky(OperationalError("database is locked"))
+        context["connection"].in_atomic_block = True
+        with self.assertRaises(OperationalError):
+            dbretry._retry_wrapper(execute, "UPDATE", [], False, context)
+        self.assertEqual(execute.call_count, 1)
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        make_tasks(cls.user, 60)
+
+    def setUp(self):
+        # cache versions only move on commit, which TestCase never reaches
+        caches["default"].clear()
+        self.client.force_login(self.user)
+
+    def test_task_cache_is_invalidated_on_commit(self):
+        before = tasks_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Task.objects.create(owner=self.user, title="New")
+            Task.objects.filter(owner=self.user, title="New").complete()
+            self.assertEqual(tasks_version(self.user.pk), before)
+        self.assertTrue(callbacks)
+        self.assertNotEqual(tasks_version(self.user.pk), before)
+
+    def test_views_stay_within_budget(self):
+        for name in ("taskhero:task_list", "taskhero:dashboard", "taskhero:about", "taskhero:prompt_store"):
+            with self.subTest(name):
+                response = assert_view_within_budget(self.client, reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_only_the_first_dashboard_page_is_cached(self):
+        cache = caches["default"]
+        dashboard = reverse("taskhero:dashboard")
+        next_cursor = self.client.get(dashboard).context["next_cursor"]
+        entries = len(cache._cache)
+        for cursor in (next_cursor, next_cursor + "AA", "made-up"):
+            self.client.get(dashboard, {"cursor": cursor})
+        self.assertEqual(len(cache._cache), entries)
+        self.assertEqual(self.client.get(dashboard, {"cursor": "made-up"}).status_code, 400)
+
+    def test_repeated_query_is_flagged(self):
+        tasks = list(Task.objects.all())
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_max_queries(None, repeat_limit=5):
+                for task in tasks:
+                    task.owner  # noqa: B018 - one query per row
+
+    def test_over_budget_is_flagged(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_max_queries(1):
+                list(Task.objects.all())
+                list(User.objects.all())
+
+    @override_settings(TASKHERO_QUERY_BUDGET="raise")
+    def test_middleware_raises_over_declared_budget(self):
+        with mock.patch.object(views.task_list.query_budget, "max_queries", 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("taskhero:task_list"))
+
+    @override_settings(TASKHERO_QUERY_BUDGET="raise")
+    def test_admin_task_list_has_no_per_row_queries(self):
+        staff = User.objects.create_superuser("admin", password="pw")
+        make_tasks(staff, 30)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("admin:taskhero_task_changelist"))
+        self.assertEqual(response.status_code, 200)
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run(self):
+        benchmarks.seed(users=2, tasks=10, activities=1)
+        self.assertEqual(Task.objects.filter(owner__username="bench1").count(), 10)
+
+        result = benchmarks.run_benchmarks(repeat=1)
+        self.assertEqual(set(result["results"]), set(benchmarks.benchmarks(User.objects.get(username="bench0"))))
+        self.assertTrue(all(row["queries"] > 0 for row in result["results"].values()))
+
+    def test_compare_flags_slowdowns_and_extra_queries(self):
+        baseline = {"results": {"a": {"p50_ms": 10.0, "queries": 2}, "b": {"p50_ms": 10.0, "queries": 2}}}
+        current = {"results": {"a": {"p50_ms": 20.0, "queries": 2}, "b": {"p50_ms": 10.5, "queries": 3}}}
+        regressions = benchmarks.compare(current, baseline, threshold=0.25)
+        self.assertEqual([line.split(":")[0] for line in regressions], ["a", "b"])
+
+
+class OllamaStub:
+    """Mixin: ``self.stub(complete=...)`` starts a stub Ollama and points OLLAMA_URL at it."""
+
+    def stub(self, **kwargs):
+        server = start_ollama_stub(**kwargs)
+        self.addCleanup(server.shutdown)
+        settings = override_settings(OLLAMA_URL="http://127.0.0.1:%d" % server.server_address[1])
+        settings.enable()
+        self.addCleanup(settings.disable)
+        llm_cache._cache().clear()
+        self.addCleanup(llm_cache._cache().clear)
+        return server
+
+
+class OllamaOptionsTests(OllamaStub, TestCase):
+    def test_options_are_sent_nested_never_as_arguments(self):
+        server = self.stub()
+        options = {"prompt": "y", "format": "json", "temperature": 0}
+        text, _, _ = async_to_sync(ollama.cached_generate)("plan my week", options=options)
+        self.assertEqual(text, STUB_REPLY)
+        body = server.requests[-1]
+        self.assertEqual((body["prompt"], body["options"]), ("plan my week", options))
+        self.assertNotIn("format", body)
+
+    def test_prompt_view_rejects_non_object_options(self):
+        self.client.force_login(User.objects.create_user("ada", password="pw"))
+        for options in (["temperature"], "hot", 3, []):
+            response = self.client.post(
+                reverse("taskhero:prompt_run"), {"prompt": "plan", "options": options}, content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400, options)
+
+
+class TruncatedStreamTests(OllamaStub, TestCase):
+    def cached(self, prompt):
+        return async_to_sync(llm_cache.aget)(ollama.default_model(), prompt)
+
+    def sse_events(self, prompt):
+        async def collect():
+            return [event async for event in ollama.sse_tokens(prompt, use_cache=True)]
+        return [event.split("\n", 1)[0].removeprefix("event: ") for event in async_to_sync(collect)()]
+
+    def test_complete_reply_is_cached(self):
+        self.stub()
+        text, _, cache = async_to_sync(ollama.cached_generate)("plan my week")
+        self.assertEqual((text, cache), (STUB_REPLY, "miss"))
+        self.assertEqual(self.cached("plan my week")["text"], STUB_REPLY)
+
+    def test_truncated_reply_is_an_error_and_not_cached(self):
+        self.stub(complete=False)
+        with self.assertRaisesMessage(ollama.OllamaError, "ended before the final chunk"):
+            async_to_sync(ollama.cached_generate)("plan my week")
+        self.assertEqual(self.sse_events("plan my day")[-1], "error")
+        self.assertIsNone(self.cached("plan my week"))
+        self.assertIsNone(self.cached("plan my day"))
+
+
+class GenerationWorkerTests(OllamaStub, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+
+    def work(self):
+        options = {"concurrency": 1, "poll_interval": 0, "once": True, "requeue_interval": 60}
+        async_to_sync(GenerationWorker(stdout=io.StringIO()).run)("test", options)
+
+    def test_truncated_stream_fails_the_job(self):
+        self.stub(complete=False)
+        job = jobs.enqueue(self.user, "plan my week")
+        self.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertIsNone(async_to_sync(llm_cache.aget)(job.model, job.prompt))
+
+    def test_unexpected_error_fails_only_that_job(self):
+        self.stub()
+        broken, ok = jobs.enqueue(self.user, "first"), jobs.enqueue(self.user, "second")
+        run_job = jobs.run_job
+
+        async def flaky(job):
+            if job.pk == broken.pk:
+                raise KeyError("options")
+            await run_job(job)
+
+        with mock.patch.object(jobs, "run_job", flaky), self.assertLogs(GenerationWorker.__module__, "ERROR"):
+            self.work()
+        broken.refresh_from_db()
+        ok.refresh_from_db()
+        self.assertEqual((broken.status, ok.status), (GenerationJob.STATUS_FAILED, GenerationJob.STATUS_SUCCEEDED))
+        self.assertEqual(broken.error, "Worker error: 'options'")
+
+    def test_stale_job_is_requeued_without_its_partial_result(self):
+        job = jobs.enqueue(self.user, "plan my week")
+        GenerationJob.objects.filter(pk=job.pk).update(
+            status=GenerationJob.STATUS_RUNNING, attempts=1, result="half a rep",
+            updated_at=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (GenerationJob.STATUS_QUEUED, ""))
+
+    def test_requeued_job_ignores_writes_from_its_previous_claim(self):
+        self.stub()
+        jobs.enqueue(self.user, "plan my week")
+        stale = jobs.claim_next("host:1/0")
+        GenerationJob.objects.filter(pk=stale.pk).update(
+            updated_at=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        current = jobs.claim_next("host:1/0")  # the same slot, back from a stall, claims it again
+        self.assertEqual((current.pk, current.attempts), (stale.pk, 2))
+
+        with self.assertRaises(jobs.ClaimLost):
+            async_to_sync(jobs.run_job)(stale)
+        with self.assertRaises(jobs.ClaimLost):
+            jobs.fail(stale, "Worker error: late")
+        current.refresh_from_db()
+        self.assertEqual((current.status, current.result, current.error), (GenerationJob.STATUS_RUNNING, "", ""))
+
+        async_to_sync(jobs.run_job)(current)
+        current.refresh_from_db()
+        self.assertEqual((current.status, current.result), (GenerationJob.STATUS_SUCCEEDED, STUB_REPLY))
+
+
+class PushTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        cls.task = Task.objects.create(owner=cls.user, title="Water the plants", priority="HIGH")
+
+    def setUp(self):
+        self.broker = push.InProcessBroker()
+        patcher = mock.patch.object(push, "get_broker", return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def receive(self, publish):
+        async with self.broker.subscribe(push.channel_for(self.user.pk)) as subscription:
+            await sync_to_async(publish)()
+            return json.loads(await subscription.get(timeout=1))
+
+    def test_subscriber_receives_cards_and_removals(self):
+        message = async_to_sync(self.receive)(lambda: push.tasks_changed(self.user.pk, [self.task.pk]))
+        self.assertEqual(message["type"], "cards")
+        self.assertEqual([(c["id"], c["priority"]) for c in message["cards"]], [(self.task.pk, "HIGH")])
+        self.assertIn("Water the plants", message["cards"][0]["html"])
+        self.assertEqual(message["counts"], {"HIGH|TODO": 1})
+
+        message = async_to_sync(self.receive)(lambda: push.tasks_removed(self.user.pk, [self.task.pk]))
+        self.assertEqual((message["type"], message["ids"]), ("remove", [self.task.pk]))
+
+    def test_no_subscriber_publishes_nothing(self):
+        with mock.patch.object(self.broker, "publish") as publish:
+            push.tasks_changed(self.user.pk, [self.task.pk])
+        publish.assert_not_called()
+
+    def test_stream_needs_asgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("taskhero:task_events")).status_code, 204)
+        self.assertNotContains(self.client.get(reverse("taskhero:task_list")), "EventSource(")
+
+    async def test_stream_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse("taskhero:task_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(await anext(response.streaming_content), b"retry: 3000\n\n")
+        await response._iterator.aclose()  # unsubscribe on this loop
+        self.assertContains(await client.get(reverse("taskhero:task_list")), "EventSource(")
+
+
+class OverdueStatsTests(TestCase):
+    # UTC+14 and UTC-11: 25 hours apart, so their dates always differ
+    AHEAD, BEHIND = "Pacific/Kiritimati", "Pacific/Pago_Pago"
+
+    def setUp(self):
+        self.ahead = User.objects.create_user("ada", password="pw")
+        self.behind = User.objects.create_user("bob", password="pw")
+        UserProfile.objects.create(user=self.ahead, timezone=self.AHEAD)
+        UserProfile.objects.create(user=self.behind, timezone=self.BEHIND)
+        for user in (self.ahead, self.behind):  # cached zones would outlive the rolled-back users
+            self.addCleanup(overdue.forget_zone, user.pk)
+
+    def overdue_counts(self):
+        return [stats.get_stats(user).overdue for user in (self.ahead, self.behind)]
+
+    def test_overdue_count_follows_the_owners_time_zone(self):
+        self.assertEqual(self.overdue_counts(), [0, 0])
+        # yesterday where ada lives, today or tomorrow where bob does
+        due = overdue.local_today(self.AHEAD) - datetime.timedelta(days=1)
+        for user in (self.ahead, self.behind):
+            Task.objects.create(owner=user, title="Pay rent", due_date=due)
+        self.assertEqual(self.overdue_counts(), [1, 0])
+
+        stats.rebuild_for_users()
+        self.assertEqual(self.overdue_counts(), [1, 0])
+        stats.rebuild_for_users([self.behind.pk])
+        self.assertEqual(self.overdue_counts(), [1, 0])
+        # the sweeper agrees with the dashboard
+        self.assertEqual(overdue.sweep_overdue(), 1)
+        self.assertEqual(list(Task.objects.filter(overdue_flagged_on__isnull=False).values_list("owner", flat=True)), [self.ahead.pk])
+
+    def test_changing_time_zone_moves_the_count(self):
+        due = overdue.local_today(self.AHEAD) - datetime.timedelta(days=1)
+        Task.objects.create(owner=self.behind, title="Pay rent", due_date=due)
+        self.assertEqual(self.overdue_counts(), [0, 0])
+        profile = UserProfile.objects.get(user=self.behind)
+        profile.timezone = self.AHEAD
+        profile.save()
+        self.assertEqual(self.overdue_counts(), [0, 1])
+
+
+class BulkDeleteTests(TestCase):
+    def test_every_relation_to_task_is_handled(self):
+        # bulk_delete uses _raw_delete, which skips on_delete; it applies these rules itself
+        for relation in Task._meta.related_objects:
+            with self.subTest(str(relation)):
+                self.assertFalse(relation.many_to_many)
+                self.assertIn(relation.on_delete, TaskQuerySet.RAW_DELETE_RULES)
+
+    def test_bulk_delete_keeps_history_and_leaves_tombstones(self):
+        user = User.objects.create_user("ada", password="pw")
+        tasks = make_tasks(user, 3)
+        TaskActivity.objects.bulk_create([TaskActivity(task=task, user=user, action="created") for task in tasks])
+        self.assertEqual(Task.objects.filter(pk__in=[t.pk for t in tasks[:2]]).bulk_delete(), 2)
+        self.assertEqual(
+            list(TaskActivity.objects.order_by("pk").values_list("task_id", flat=True)), [None, None, tasks[2].pk],
+        )
+        self.assertEqual(set(TaskTombstone.objects.values_list("task_id", flat=True)), {t.pk for t in tasks[:2]})
+
+
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        cls.other = User.objects.create_user("bob", password="pw")
+        cls.tasks = make_tasks(cls.user, 3)
+        make_tasks(cls.other, 2)
+
+    def sync_all(self, token=None, limit=1):
+        """Page through ``changes`` until done: ``(changed pks, deleted pks, final token, pages)``."""
+        changed, deleted, pages = [], [], 0
+        while True:
+            rows, gone, token, has_more = sync.changes(self.user, token, limit=limit)
+            self.assertLessEqual(len(rows) + len(gone), limit)
+            changed += [row.pk for row in rows]
+            deleted += gone
+            pages += 1
+            if not has_more:
+                return changed, deleted, token, pages
+
+    def test_token_round_trip(self):
+        self.assertEqual(sync.decode_token(sync.encode_token(41, 7)), (41, 7, 0))
+        self.assertEqual(sync.decode_token(sync.encode_token(41, 7, 40)), (41, 7, 40))
+        for token in ("nonsense", sync.encode_token(1, 2)[:-3], "W10"):
+            with self.subTest(token), self.assertRaises(InvalidCursor):
+                sync.decode_token(token)
+
+    def test_snapshot_then_nothing_changed(self):
+        changed, deleted, token, _ = self.sync_all()
+        self.assertEqual(changed, [task.pk for task in self.tasks])
+        self.assertEqual(deleted, [])
+        self.assertEqual(sync.changes(self.user, token), ([], [], token, False))
+
+    def test_bulk_update_and_delete_page_in_change_order(self):
+        first, second, third = self.tasks
+        _, _, token, _ = self.sync_all()
+        Task.objects.filter(pk=third.pk).set_priority("HIGH")
+        Task.objects.filter(pk__in=[first.pk, second.pk]).complete()
+        Task.objects.filter(pk=third.pk).bulk_delete()
+        Task.objects.filter(owner=self.other).complete()  # not ada's
+
+        changed, deleted, token, pages = self.sync_all(token, limit=1)
+        # third changed, then was deleted: only the deletion is left to report
+        self.assertEqual((changed, deleted, pages), ([first.pk, second.pk], [third.pk], 3))
+        self.assertEqual(sync.changes(self.user, token)[:2], ([], []))
+
+        Task.objects.filter(pk=first.pk).set_status("TODO")
+        self.assertEqual(self.sync_all(token, limit=1)[:2], ([first.pk], []))
+
+    def test_page_boundary_between_tasks_and_tombstones(self):
+        _, _, token, _ = self.sync_all()
+        Task.objects.filter(pk=self.tasks[0].pk).bulk_delete()
+        Task.objects.filter(pk=self.tasks[1].pk).complete()
+        Task.objects.filter(pk=self.tasks[2].pk).bulk_delete()
+        rows, gone, token, has_more = sync.changes(self.user, token, limit=2)
+        self.assertEqual(([row.pk for row in rows], gone, has_more), ([self.tasks[1].pk], [self.tasks[0].pk], True))
+        self.assertEqual(sync.changes(self.user, token, limit=2), ([], [self.tasks[2].pk], mock.ANY, False))
+
+    def test_token_expires_once_its_deletions_are_pruned(self):
+        _, _, old_token, _ = self.sync_all()
+        Task.objects.filter(pk=self.tasks[0].pk).bulk_delete()
+        _, _, new_token, _ = self.sync_all(old_token)
+        later = timezone.now() + datetime.timedelta(days=sync.TOMBSTONE_RETENTION_DAYS + 1)
+        self.assertEqual(sync.prune_tombstones(now=later), 1)
+
+        with self.assertRaises(sync.TokenExpired):
+            sync.changes(self.user, old_token)
+        self.assertEqual(sync.changes(self.user, new_token)[:2], ([], []))
+        self.assertEqual(len(self.sync_all(limit=1)[0]), 2)  # a paged snapshot isn't refused
+        self.assertEqual(sync.changes(self.other, None)[3], False)  # other users keep their tokens
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        cls.other = User.objects.create_user("bob", password="pw")
+        make_tasks(cls.user, 10)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, q, **params):
+        response = assert_view_within_budget(self.client, reverse("taskhero:search"), {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [task["title"] for task in response.json()["tasks"]]
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        task = Task.objects.create(owner=self.user, title="Quarterly budget", description="spreadsheets")
+        self.assertEqual(self.search("budget"), ["Quarterly budget"])
+        self.assertEqual(self.search("spread"), ["Quarterly budget"])  # words match as prefixes
+
+        task.title = "Annual plan"
+        task.save()
+        self.assertEqual(self.search("budget"), [])
+        self.assertEqual(self.search("annual"), ["Annual plan"])
+
+        task.delete()
+        self.assertEqual(self.search("annual"), [])
+        self.assertEqual(self.search("spreadsheets"), [])
+
+    def test_results_are_scoped_to_the_owner(self):
+        Task.objects.create(owner=self.other, title="Invoice for bob")
+        SavedPrompt.objects.create(owner=self.other, title="Invoice prompt", prompt="write an invoice")
+        Task.objects.create(owner=self.user, title="Invoice for ada")
+        self.assertEqual(self.search("invoice"), ["Invoice for ada"])
+        response = self.client.get(reverse("taskhero:search"), {"q": "invoice"})
+        self.assertEqual(response.json()["prompts"], [])
+
+    def test_best_match_first(self):
+        Task.objects.create(owner=self.user, title="Call the plumber about the leak, the sink and the tiles")
+        Task.objects.create(owner=self.user, title="Leak", description="leak under the sink")
+        response = self.client.get(reverse("taskhero:search"), {"q": "leak"})
+        tasks = response.json()["tasks"]
+        self.assertEqual([task["title"] for task in tasks], ["Leak", "Call the plumber about the leak, the sink and the tiles"])
+        self.assertGreater(tasks[0]["score"], tasks[1]["score"])
+        self.assertEqual(self.search("leak", limit=1), ["Leak"])
+
+    def test_empty_and_over_long_queries(self):
+        for q in ("", "   ", "?!"):
+            with self.subTest(q=q):
+                self.assertEqual(self.search(q), [])
+        response = self.client.get(reverse("taskhero:search"), {"q": "word " * views.SEARCH_MAX_QUERY_LENGTH})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse("taskhero:search"), {"q": "x", "limit": "many"}).status_code, 400)
+
+    def test_admin_search_uses_the_index_and_usernames(self):
+        Task.objects.create(owner=self.user, title="Renew passport")
+        Task.objects.create(owner=self.other, title="Book flights")
+        self.client.force_login(User.objects.create_superuser("admin", password="pw"))
+        changelist = reverse("admin:taskhero_task_changelist")
+        found = self.client.get(changelist, {"q": "passport"}).context["cl"].result_list
+        self.assertEqual([task.title for task in found], ["Renew passport"])
+        found = self.client.get(changelist, {"q": "bob"}).context["cl"].result_list
+        self.assertEqual([task.title for task in found], ["Book flights"])
+        prompts = reverse("admin:taskhero_savedprompt_changelist")
+        SavedPrompt.objects.create(owner=self.user, title="Weekly review", prompt="summarize my week")
+        found = self.client.get(prompts, {"q": "summar"}).context["cl"].result_list
+        self.assertEqual([prompt.title for prompt in found], ["Weekly review"])
+
+
+class ActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        cls.task = Task.objects.create(owner=cls.user, title="Write report")
+
+    def test_feed_pages_newest_first(self):
+        for action in (activity.CREATED, activity.EDITED, activity.COMPLETED):
+            activity.record(self.task, action)
+        TaskActivity.objects.create(user=User.objects.create_user("bob"), action=activity.CREATED, task_title="Not ada's")
+        self.client.force_login(self.user)
+
+        response = assert_view_within_budget(self.client, reverse("taskhero:activity_feed"))
+        self.assertEqual(
+            [event["action"] for event in response.json()["events"]], [activity.COMPLETED, activity.EDITED, activity.CREATED],
+        )
+        self.assertIsNone(response.json()["next_cursor"])
+
+        first, cursor = activity.feed(self.user, limit=2)
+        second, last = activity.feed(self.user, cursor, limit=2)
+        self.assertEqual([e.action for e in first], [activity.COMPLETED, activity.EDITED])
+        self.assertEqual(([e.action for e in second], last), ([activity.CREATED], None))
+        self.assertEqual(self.client.get(reverse("taskhero:activity_feed"), {"cursor": "made-up"}).status_code, 400)
+
+    def test_buffered_events_are_one_insert(self):
+        with self.assertNumQueries(1):
+            with activity.buffered():
+                for _ in range(3):
+                    activity.record(self.task, activity.EDITED)
+                with activity.buffered():  # nested: still flushed once, by the outer block
+                    activity.record(self.task, activity.COMPLETED)
+        self.assertEqual(TaskActivity.objects.count(), 4)
+
+        with mock.patch.object(activity, "FLUSH_SIZE", 2), self.assertNumQueries(2):
+            with activity.buffered():
+                for _ in range(3):
+                    activity.record(self.task, activity.EDITED)
+        self.assertEqual(TaskActivity.objects.count(), 7)
+
+    def test_compact_rolls_old_days_into_summaries(self):
+        now = timezone.make_aware(datetime.datetime(2026, 6, 1, 12))
+        old = now - datetime.timedelta(days=activity.RETENTION_DAYS + 5)
+        for created_at, action in [(old, activity.EDITED), (old, activity.EDITED), (old, activity.CREATED),
+                                   (old - datetime.timedelta(days=1), activity.EDITED), (now, activity.EDITED)]:
+            event = TaskActivity.objects.create(task=self.task, user=self.user, action=action)
+            TaskActivity.objects.filter(pk=event.pk).update(created_at=created_at)
+
+        self.assertEqual(activity.compact(now=now), 4)
+        self.assertEqual(TaskActivity.objects.get().created_at, now)
+        summaries = ActivityDailySummary.objects.order_by("day", "action").values_list("day", "action", "count")
+        old_day = old.date()
+        self.assertEqual(list(summaries), [
+            (old_day - datetime.timedelta(days=1), activity.EDITED, 1),
+            (old_day, activity.CREATED, 1), (old_day, activity.EDITED, 2),
+        ])
+
+        # a late straggler for an already-compacted day adds to its summary
+        event = TaskActivity.objects.create(task=self.task, user=self.user, action=activity.EDITED)
+        TaskActivity.objects.filter(pk=event.pk).update(created_at=old)
+        self.assertEqual(activity.compact(now=now), 1)
+        self.assertEqual(ActivityDailySummary.objects.get(day=old_day, action=activity.EDITED).count, 3)
+
+    def test_middleware_drops_events_of_a_failed_request(self):
+        request = RequestFactory().get("/")
+
+        def view(status=200, raises=False):
+            def get_response(request):
+                activity.record(self.task, activity.EDITED)
+                if raises:
+                    raise RuntimeError("boom")
+                return HttpResponse(status=status)
+            return activity.ActivityBufferMiddleware(get_response)
+
+        self.assertEqual(view()(request).status_code, 200)
+        self.assertEqual(view(status=500)(request).status_code, 500)
+        with self.assertRaises(RuntimeError):
+            view(raises=True)(request)
+        self.assertEqual(TaskActivity.objects.count(), 1)
+
+        async def aview(request):
+            await sync_to_async(activity.record)(self.task, activity.EDITED)
+            return HttpResponse(status=500)
+        async_to_sync(activity.ActivityBufferMiddleware(aview))(request)
+        self.assertEqual(TaskActivity.objects.count(), 1)
+
+
+class TaskPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+
+    def test_parse_task_plan(self):
+        item = {"title": "Draft plan"}
+        self.assertEqual(ai_tasks.parse_task_plan(json.dumps({"tasks": [item]})), [item])
+        self.assertEqual(ai_tasks.parse_task_plan(json.dumps([item])), [item])
+        for text in ("not json", '{"tasks": "Draft plan"}', '{"plan": []}', '"Draft plan"', '{"tasks": [{"title": "cut'):
+            with self.subTest(text), self.assertRaises(ai_tasks.TaskPlanError):
+                ai_tasks.parse_task_plan(text)
+
+    def test_valid_items_are_one_insert_and_invalid_ones_are_reported(self):
+        items = [
+            {"title": "Draft plan", "priority": "HIGH", "due_date": "2026-03-01"},
+            "Call the bank",
+            {"title": "", "priority": "HIGH"},
+            {"title": "Pay rent", "priority": "URGENT"},
+            {"title": "Book flights", "status": "IN_PROGRESS", "due_date": None},
+            {"title": "Renew passport", "due_date": "next week"},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = ai_tasks.create_tasks(self.user, items)
+        inserts = [q["sql"] for q in queries if q["sql"].startswith('INSERT INTO "taskhero_task"')]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual([task["title"] for task in result["created"]], ["Draft plan", "Book flights"])
+        self.assertEqual([error["index"] for error in result["errors"]], [1, 2, 3, 5])
+        self.assertIn("title", result["errors"][1]["errors"])
+        self.assertIn("priority", result["errors"][2]["errors"])
+        self.assertIn("due_date", result["errors"][3]["errors"])
+        self.assertEqual(
+            list(Task.objects.filter(owner=self.user).order_by("pk").values_list("title", "priority", "status", "due_date")),
+            [("Draft plan", "HIGH", "TODO", datetime.date(2026, 3, 1)), ("Book flights", "MEDIUM", "IN_PROGRESS", None)],
+        )
+        self.assertEqual(TaskActivity.objects.filter(action=activity.AI_CREATED).count(), 2)
+
+        # with the change counter and time zone warm: a seq, the tasks, their
+        # activity, and the stats rebuild (3) however many tasks there are
+        with self.assertNumQueries(6):
+            ai_tasks.create_tasks(self.user, [{"title": f"Task {i}"} for i in range(20)])
+        self.assertEqual(ai_tasks.create_tasks(self.user, [None, []]), {
+            "created": [], "errors": [{"index": i, "errors": {"__all__": ["Expected an object"]}} for i in (0, 1)],
+        })
+
+
+class RecurrenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+
+    def dates(self, rrule, starts_on, through, after=None):
+        rule = RecurrenceRule(starts_on=starts_on, **recurrence.parse_rrule(rrule))
+        return list(recurrence.occurrence_dates(rule, after or starts_on - datetime.timedelta(days=1), through))
+
+    def test_occurrence_dates(self):
+        d = datetime.date
+        cases = [
+            ("FREQ=DAILY;INTERVAL=3", d(2026, 1, 1), d(2026, 1, 15), d(2026, 1, 5),
+             [d(2026, 1, 7), d(2026, 1, 10), d(2026, 1, 13)]),
+            # 2026-01-01 is a Thursday; every other week from the week that holds it
+            ("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH", d(2026, 1, 1), d(2026, 1, 31), None,
+             [d(2026, 1, 1), d(2026, 1, 12), d(2026, 1, 15), d(2026, 1, 26), d(2026, 1, 29)]),
+            ("FREQ=WEEKLY", d(2026, 1, 1), d(2026, 1, 20), None, [d(2026, 1, 1), d(2026, 1, 8), d(2026, 1, 15)]),
+            ("FREQ=MONTHLY", d(2026, 1, 31), d(2026, 5, 31), None,
+             [d(2026, 1, 31), d(2026, 2, 28), d(2026, 3, 31), d(2026, 4, 30), d(2026, 5, 31)]),
+            ("FREQ=MONTHLY;INTERVAL=12", d(2028, 2, 29), d(2033, 1, 1), d(2029, 1, 1),
+             [d(2029, 2, 28), d(2030, 2, 28), d(2031, 2, 28), d(2032, 2, 29)]),
+            ("FREQ=DAILY;UNTIL=20260103T000000Z", d(2026, 1, 1), d(2026, 2, 1), None,
+             [d(2026, 1, 1), d(2026, 1, 2), d(2026, 1, 3)]),
+        ]
+        for rrule, starts_on, through, after, expected in cases:
+            with self.subTest(rrule):
+                self.assertEqual(self.dates(rrule, starts_on, through, after), expected)
+
+    def test_invalid_rrules(self):
+        for rrule in ("FREQ=YEARLY", "FREQ=DAILY;BYDAY=MO", "FREQ=DAILY;INTERVAL=0", "FREQ=DAILY;COUNT=0", "FREQ=DAILY;X=1"):
+            with self.subTest(rrule), self.assertRaises(ValueError):
+                recurrence.parse_rrule(rrule)
+        task = Task(owner=self.user, title="Never", due_date=datetime.date(2026, 1, 1))
+        with self.assertRaises(ValueError):
+            recurrence.start(task, RecurrenceRule.DAILY, count=0)
+        self.assertFalse(Task.objects.exists())
+
+    def start(self, rrule, due_date, today, window_days=7):
+        task = Task(owner=self.user, title="Standup", due_date=due_date)
+        rule = recurrence.start(task, **recurrence.parse_rrule(rrule), today=today, window_days=window_days)
+        return rule, task
+
+    def occurrences(self, rule):
+        return list(Task.objects.filter(recurrence=rule).order_by("due_date").values_list("due_date", flat=True))
+
+    def test_count_and_until_finish_the_series(self):
+        today = datetime.date(2026, 1, 1)
+        counted, _ = self.start("FREQ=DAILY;COUNT=10", today, today)
+        self.assertEqual((len(self.occurrences(counted)), counted.finished), (8, False))
+        recurrence.extend(today=today + datetime.timedelta(days=30), window_days=7)
+        counted.refresh_from_db()
+        self.assertEqual((len(self.occurrences(counted)), counted.finished), (10, True))
+
+        once, _ = self.start("FREQ=WEEKLY;COUNT=1", today, today)
+        until, _ = self.start("FREQ=WEEKLY;UNTIL=20260115", today, today, window_days=60)
+        self.assertEqual((len(self.occurrences(once)), once.finished), (1, True))
+        self.assertEqual(self.occurrences(until), [today, datetime.date(2026, 1, 8), datetime.date(2026, 1, 15)])
+        self.assertTrue(until.finished)
+
+    def test_moving_an_occurrence_onto_a_taken_date_is_a_field_error(self):
+        today = datetime.date(2026, 1, 1)
+        rule, first = self.start("FREQ=DAILY", today, today)
+        second = Task.objects.get(recurrence=rule, due_date=today + datetime.timedelta(days=1))
+        self.client.force_login(self.user)
+        data = {"title": "Standup", "due_date": second.due_date, "status": "TODO", "priority": "MEDIUM"}
+
+        response = self.client.post(reverse("taskhero:task_update", args=[first.pk]), data, headers={"Accept": "application/json"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("due_date", response.json()["errors"])
+
+        response = self.client.patch(
+            reverse("taskhero:api_task", args=[first.pk]), json.dumps({"due_date": second.due_date.isoformat()}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("due_date", response.json()["errors"])
+        first.refresh_from_db()
+        self.assertEqual(first.due_date, today)
+
+        # a free date, or leaving the date alone, still saves
+        data["due_date"] = today - datetime.timedelta(days=1)
+        self.assertEqual(self.client.post(reverse("taskhero:task_update", args=[first.pk]), data).status_code, 302)
+
+    def test_deleting_with_series_stops_it(self):
+        today = datetime.date(2026, 1, 1)
+        rule, first = self.start("FREQ=DAILY", today, today)
+        third = Task.objects.get(recurrence=rule, due_date=today + datetime.timedelta(days=2))
+        Task.objects.filter(recurrence=rule, due_date=today + datetime.timedelta(days=5)).update(status="COMPLETED")
+        later = list(Task.objects.filter(recurrence=rule, due_date__gt=third.due_date, status="TODO").values_list("pk", flat=True))
+        self.client.force_login(self.user)
+
+        response = assert_view_within_budget(
+            self.client, reverse("taskhero:task_delete", args=[third.pk]), {"series": "1"}, method="post",
+        )
+        self.assertEqual(response.status_code, 302)
+        rule.refresh_from_db()
+        self.assertEqual((rule.until, rule.finished), (today + datetime.timedelta(days=1), True))
+        self.assertEqual(self.occurrences(rule), [today, today + datetime.timedelta(days=1), today + datetime.timedelta(days=5)])
+        self.assertEqual(recurrence.extend(today=today + datetime.timedelta(days=30), window_days=7), 0)
+        self.assertEqual(TaskTombstone.objects.filter(task_id__in=later).count(), len(later))  # sync sees them go
+
+        # without "series" only the one occurrence goes
+        self.client.post(reverse("taskhero:task_delete", args=[first.pk]))
+        self.assertEqual(len(self.occurrences(rule)), 2)
+
+    def test_extend_is_idempotent(self):
+        today = datetime.date(2026, 1, 1)
+        rule, first = self.start("FREQ=WEEKLY;BYDAY=MO,FR", today, today)
+        later = today + datetime.timedelta(days=21)
+        created = recurrence.extend(today=later, window_days=7)
+        self.assertGreater(created, 0)
+        self.assertEqual(recurrence.extend(today=later, window_days=7), 0)
+
+        # a rewound window (restored backup, admin edit) must not clash with
+        # the (recurrence, due_date) constraint or count occurrences twice
+        expected = self.occurrences(rule)
+        rule.refresh_from_db()
+        RecurrenceRule.objects.filter(pk=rule.pk).update(materialized_through=first.due_date, materialized_count=1)
+        self.assertEqual(recurrence.extend(today=later, window_days=7), 0)
+        self.assertEqual(self.occurrences(rule), expected)
+        self.assertEqual(
+            RecurrenceRule.objects.values_list("materialized_through", "materialized_count").get(pk=rule.pk),
+            (rule.materialized_through, rule.materialized_count),
+        )
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        make_tasks(cls.user, 5)
+        cls.task = Task.objects.create(
+            owner=cls.user, title="Write report", description="Q3 numbers", status="IN_PROGRESS", priority="HIGH",
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def send(self, method, path, payload, **headers):
+        return getattr(self.client, method)(path, json.dumps(payload), content_type="application/json", headers=headers)
+
+    def test_unchanged_collection_is_not_modified(self):
+        url = reverse("taskhero:api_tasks") + "?status=TODO"
+        response = assert_view_within_budget(self.client, url)
+        etag = response["ETag"]
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        not_modified = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual((not_modified.status_code, not_modified.content, not_modified["ETag"]), (304, b"", etag))
+        self.assertEqual(self.client.get(reverse("taskhero:api_tasks"), headers={"If-None-Match": etag}).status_code, 200)
+
+        Task.objects.filter(pk=response.json()["results"][0]["id"]).complete()
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 200)
+        etag = self.client.get(url)["ETag"]
+        Task.objects.filter(owner=self.user, status="TODO")[:1].get().delete()  # no updated_at moves
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_stale_if_match_is_refused(self):
+        url = reverse("taskhero:api_task", args=[self.task.pk])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+        response = self.send("patch", url, {"title": "Mine"}, **{"If-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        stale = self.send("patch", url, {"title": "Theirs"}, **{"If-Match": etag})
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(self.client.delete(url, headers={"If-Match": etag}).status_code, 412)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Mine")
+
+    def test_field_selection(self):
+        response = self.client.get(reverse("taskhero:api_task", args=[self.task.pk]), {"fields": "id,title"})
+        self.assertEqual(response.json()["task"], {"id": self.task.pk, "title": "Write report"})
+        rows = self.client.get(reverse("taskhero:api_tasks"), {"fields": "title,priority", "limit": 2}).json()["results"]
+        self.assertEqual([set(row) for row in rows], [{"title", "priority"}] * 2)
+
+        response = self.client.get(reverse("taskhero:api_tasks"), {"fields": "id,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.json()["error"])
+        self.assertIn("title", response.json()["allowed"])
+        self.assertEqual(self.send("patch", reverse("taskhero:api_task", args=[self.task.pk]), {"owner": 2}).status_code, 400)
+
+    def test_patch_keeps_and_put_resets_missing_fields(self):
+        url = reverse("taskhero:api_task", args=[self.task.pk])
+        patched = self.send("patch", url, {"title": "Write the report"}).json()["task"]
+        self.assertEqual(
+            (patched["title"], patched["description"], patched["status"], patched["priority"]),
+            ("Write the report", "Q3 numbers", "IN_PROGRESS", "HIGH"),
+        )
+        put = self.send("put", url, {"title": "Start over"}).json()["task"]
+        self.assertEqual(
+            (put["title"], put["description"], put["status"], put["priority"], put["due_date"]),
+            ("Start over", "", Task.STATUS_TODO, Task.PRIORITY_MEDIUM, None),
+        )
+
+
+class TransferTests(TestCase):
+    FIELDS = ("title", "description", "due_date", "status", "priority")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        cls.other = User.objects.create_user("bob", password="pw")
+        make_tasks(cls.user, 7)
+        Task.objects.create(
+            owner=cls.user, title='Quotes "and", commas', description="Two\nlines — ünïcode", status="COMPLETED",
+        )
+
+    def tasks(self, user):
+        return list(Task.objects.filter(owner=user).order_by("pk").values_list(*self.FIELDS))
+
+    def upload(self, name, content):
+        self.client.force_login(self.other)
+        return self.client.post(reverse("taskhero:task_import"), {"file": SimpleUploadedFile(name, content)})
+
+    def test_export_import_round_trip(self):
+        for fmt in ("csv", "ndjson"):
+            with self.subTest(fmt):
+                Task.objects.filter(owner=self.other).delete()
+                self.client.force_login(self.user)
+                exported = b"".join(self.client.get(reverse("taskhero:task_export"), {"format": fmt}).streaming_content)
+                response = self.upload(f"tasks.{fmt}", exported)
+                self.assertEqual(response.json(), {"ok": True, "created": 8, "errors": []})
+                self.assertEqual(self.tasks(self.other), self.tasks(self.user))
+
+    async def test_asgi_export_streams_asynchronously(self):
+        expected = "".join(await sync_to_async(list)(transfer.export_tasks(Task.objects.filter(owner=self.user), "csv")))
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("taskhero:task_export"))
+        self.assertTrue(response.is_async)
+        self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]).decode(), expected)
+
+    def test_invalid_utf8_rows_are_reported(self):
+        content = "title,priority\nGood one,HIGH\n".encode("utf-8") + "Caf\xe9,LOW\n".encode("latin-1") + b"Also good,LOW\n"
+        response = self.upload("tasks.csv", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(response.json()["errors"], [{"line": 3, "errors": {"__all__": ["Not valid UTF-8 text"]}}])
+        self.assertEqual([task[0] for task in self.tasks(self.other)], ["Good one", "Also good"])
+
+
+class PerformanceHistogramTests(TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+
+    def request_metrics(self, wall, queries):
+        metrics = instrumentation.RequestMetrics()
+        metrics.wall, metrics.db_count = wall, queries
+        return metrics
+
+    def test_each_view_is_one_cache_entry(self):
+        for wall in (0.001, 0.002, 0.200):
+            instrumentation.record("taskhero:task_list", self.request_metrics(wall, 4))
+        report = instrumentation.report()["taskhero:task_list"]
+        self.assertEqual((report["count"], report["avg_queries"]), (3, 4.0))
+        self.assertLess(report["wall"]["p50"], report["wall"]["p99"])
+        cache = instrumentation._cache()
+        self.assertEqual(set(cache._cache), {cache.make_key(instrumentation._key(k)) for k in ("views", "taskhero:task_list")})
+
+    def test_lost_view_index_is_rebuilt(self):
+        instrumentation.record("taskhero:about", self.request_metrics(0.01, 1))
+        instrumentation._cache().delete(instrumentation._key("views"))
+        instrumentation.record("taskhero:about", self.request_metrics(0.01, 1))
+        self.assertEqual(instrumentation.report()["taskhero:about"]["count"], 2)
+
+
+@skipUnless(connection.vendor == "sqlite", "asserts on SQLite EXPLAIN QUERY PLAN output")
+class HotQueryPlanTests(TestCase):
+    """The per-user pages must be served from an index, without a sort step."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ada", password="pw")
+        other = User.objects.create_user("bob", password="pw")
+        make_tasks(cls.user, 60)
+        make_tasks(other, 60)
+        SavedPrompt.objects.bulk_create([SavedPrompt(owner=cls.user, title=f"P{i}", prompt="x") for i in range(5)])
+
+    def hot_queries(self):
+        tasks = Task.objects.for_user(self.user)
+        _, cursor = paginate(tasks, TASK_KEYSET, limit=20)
+        after_cursor = keyset_filter(tasks.order_by(*TASK_KEYSET), TASK_KEYSET, decode_cursor(cursor, Task, TASK_KEYSET))
+        return {
+            "recent (about)": tasks.order_by("-created_at")[:6],
+            "dashboard": tasks.order_by(*TASK_KEYSET)[:51],
+            "dashboard next page": after_cursor[:51],
+            "board column": tasks.filter(priority="HIGH", status="TODO").order_by(*TASK_KEYSET)[:13],
+            "board counts": tasks.order_by().values("priority", "status").annotate(n=Count("pk")),
+            "overdue": tasks.overdue(),
+            "overdue counts": tasks.order_by().overdue().values("owner_id").annotate(n=Count("pk")),
+            "saved prompts": SavedPrompt.objects.filter(owner=self.user),
+        }
+
+    def test_hot_queries_use_an_index_without_sorting(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertRegex(plan, r"USING (COVERING )?INDEX")
+                self.assertNotIn("TEMP B-TREE", plan)
+                self.assertNotRegex(plan, r"\bSCAN taskhero_")
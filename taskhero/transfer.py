@@ -0,0 +1,144 @@
+"""Bulk import/export of tasks as CSV or NDJSON.
+
+Exports are generators over ``.iterator(chunk_size=...)`` so memory stays flat
+however many tasks are written; ``aexport_tasks`` is the async variant ASGI
+streams from. Imports validate each row with ``TaskForm``
+and insert valid rows batch by batch with ``bulk_create``, one transaction
+per batch.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from . import activity
+from .dbretry import retry_on_busy
+from .forms import TaskForm, task_form_data
+from .models import Task
+from .signals import tasks_bulk_changed
+
+FORMATS = ("csv", "ndjson")
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = ["id", "title", "description", "due_date", "status", "priority", "created_at", "updated_at"]
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 500
+REPLACEMENT_CHARACTER = "\ufffd"  # what errors="replace" decodes invalid bytes to
+
+
+def _serialize(value):
+    if value is None:
+        return ""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _export_rows(queryset, chunk_size):
+    rows = queryset.order_by("pk").values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield [_serialize(value) for value in row]
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _export_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+def export_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    for row in _export_rows(queryset, chunk_size):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + "\n"
+
+
+def export_tasks(queryset, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    return export_csv(queryset, chunk_size) if fmt == "csv" else export_ndjson(queryset, chunk_size)
+
+
+async def aexport_tasks(queryset, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """``export_tasks`` as an async iterator, ``chunk_size`` lines per chunk.
+
+    Each chunk is built in the sync thread, so under ASGI the export streams
+    instead of Django collecting a sync iterator into one list first.
+    """
+    lines = export_tasks(queryset, fmt, chunk_size)
+    next_chunk = sync_to_async(lambda: "".join(islice(lines, chunk_size)))
+    while chunk := await next_chunk():
+        yield chunk
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row_dict)`` from a text stream.
+
+    Open the stream with ``errors="replace"``: bytes that aren't UTF-8 then
+    become U+FFFD and ``import_tasks`` reports those rows instead of the whole
+    file failing halfway, after earlier batches were committed.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+@retry_on_busy
+def _insert_batch(tasks):
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks)
+
+
+def import_tasks(owner, rows, batch_size=IMPORT_BATCH_SIZE):
+    """Import ``(line_number, row)`` pairs for ``owner``.
+
+    Returns ``{"created": int, "errors": [{"line": int, "errors": {...}}]}``;
+    invalid rows are reported and skipped, valid ones are still imported.
+    """
+    created = 0
+    errors = []
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        tasks = []
+        for line_number, row in batch:
+            if row is None:
+                errors.append({"line": line_number, "errors": {"__all__": ["Invalid row"]}})
+                continue
+            if any(REPLACEMENT_CHARACTER in str(value) for value in row.values()):
+                errors.append({"line": line_number, "errors": {"__all__": ["Not valid UTF-8 text"]}})
+                continue
+            form = TaskForm(data=task_form_data(row))
+            if not form.is_valid():
+                errors.append({"line": line_number, "errors": form.errors.get_json_data()})
+                continue
+            task = form.save(commit=False)
+            task.owner = owner
+            tasks.append(task)
+        if not tasks:
+            continue
+        _insert_batch(tasks)
+        with activity.buffered():
+            for task in tasks:
+                activity.record(task, activity.IMPORTED)
+        created += len(tasks)
+        tasks_bulk_changed.send(
+            sender=Task, action="import", task_ids=[t.pk for t in tasks], owner_ids={owner.pk},
+        )
+    return {"created": created, "errors": errors}
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "taskhero"
 
@@ -7,18 +7,38 @@ urlpatterns = [
     path("", views.home_page, name="home"),
     path("about/", views.about_page, name="about"),
     path('tasks/', views.task_list, name='task_list'),
+    path('tasks/column/', views.task_column, name='task_column'),
+    path('tasks/events/', views.task_events, name='task_events'),
+    path('tasks/bulk/', views.task_bulk, name='task_bulk'),
+    path('tasks/export/', views.task_export, name='task_export'),
+    path('tasks/import/', views.task_import, name='task_import'),
     path('tasks/add/', views.task_create, name='task_create'),
     path('tasks/<int:pk>/edit/', views.task_update, name='task_update'),
     path('tasks/<int:pk>/delete/', views.task_delete, name='task_delete'),
+    path('search/', views.search, name='search'),
+    path('activity/', views.activity_feed, name='activity_feed'),
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('generate-ai/', views.generate_task_ai, name='generate_task_ai'),
+    path('generate-ai/tasks/', views.generate_tasks_ai, name='generate_tasks_ai'),
 
 
     path('prompts/', views.prompt_store_page, name='prompt_store'),
     path('prompts/save/', views.save_prompt, name='prompt_save'),
     path('prompts/delete/', views.delete_prompt, name='prompt_delete'),
     path('prompts/run/', views.run_prompt, name='prompt_run'),
+
+    path('perf/', views.perf_report, name='perf_report'),
+
+    path('api/v1/tasks/', api.tasks, name='api_tasks'),
+    path('api/v1/tasks/changes/', api.task_changes, name='api_task_changes'),
+    path('api/v1/tasks/<int:pk>/', api.task, name='api_task'),
+    path('api/v1/prompts/', api.prompts, name='api_prompts'),
+    path('api/v1/prompts/<int:pk>/', api.prompt, name='api_prompt'),
+
+    path('jobs/', views.job_create, name='job_create'),
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/stream/', views.job_stream, name='job_stream'),
 ]
\ No newline at end of file
@@ -1,43 +1,60 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib.auth.models import User
 
 from django.contrib.auth.decorators import login_required
 from .models import Task
-from .forms import TaskForm
+from .forms import TaskCreateForm, TaskForm
 
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from .forms import SignUpForm
 
-from collections import OrderedDict
+from .cache import cached_for_user
+from .stats import get_stats
+from .board import board_column, grouped_tasks, render_board, render_cards
+from .pagination import TASK_KEYSET, InvalidCursor, paginate
 
 # taskhero/views.py
+import datetime
 import json
-import requests
-from django.http import JsonResponse, HttpResponseBadRequest
-from django.contrib.auth.decorators import login_required
+from asgiref.sync import sync_to_async
+import io
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.views.decorators.http import require_POST
-from .models import SavedPrompt, Task
-from .forms import SavedPromptForm
+from .models import SavedPrompt
+from . import activity, ai_tasks, jobs, ollama, push, recurrence, transfer
+from .search import get_backend as get_search_backend
+from . import instrumentation
+from .querybudget import query_budget
+from django.contrib.admin.views.decorators import staff_member_required
+import asyncio
+from .models import GenerationJob
 
 
 
 # Create your views here.
 
+@query_budget(3)
 def home_page(request):
     return render(request, "taskhero/home.html")
 
 
+@query_budget(8)  # includes building a missing stats row
 def about_page(request):
     # Handle logged-in and guest users safely
     if request.user.is_authenticated:
         # Get all tasks for the current user
-        user_tasks = Task.objects.filter(owner=request.user).order_by('-created_at')[:6]  # recent 6 tasks
+        user_tasks = cached_for_user(
+            request.user.pk, "recent",
+            lambda: list(Task.objects.filter(owner=request.user).order_by('-created_at').card()[:6]),  # recent 6 tasks
+        )
+        stats = get_stats(request.user)
     else:
         user_tasks = None
+        stats = None
 
     context = {
         "user_tasks": user_tasks,
+        "stats": stats,
     }
 
     return render(request, "taskhero/about.html", context)
@@ -52,103 +69,208 @@ def about_page(request):
 
 
 
-PRIORITY_ORDER = ["HIGH", "MEDIUM", "LOW"]
-STATUS_ORDER = ["TODO", "IN_PROGRESS", "COMPLETED", "CANCELLED"]
-
+@query_budget(5)
 @login_required
 def task_list(request):
-    tasks_qs = Task.objects.filter(owner=request.user).order_by('-created_at')
-    tasks = list(tasks_qs)
-
-    def _p(t): return (t.priority or "").strip().upper()
-    def _s(t): return (t.status or "").strip().upper()
-
-    grouped_tasks = []
-    handled_priorities = set()
-
-    for pr in PRIORITY_ORDER:
-        pr_tasks = [t for t in tasks if _p(t) == pr]
-        if not pr_tasks:
-            continue
-        handled_priorities.add(pr)
-
-        status_map = OrderedDict()
-        for st in STATUS_ORDER:
-            items = [t for t in pr_tasks if _s(t) == st]
-            if items:
-                status_map[st] = items
-
-        for t in pr_tasks:
-            st = _s(t) or "UNSPECIFIED"
-            if st not in status_map:
-                status_map.setdefault(st, []).append(t)
-
-        statuses = []
-        for st, items in status_map.items():
-            statuses.append({
-                "status": st,
-                "status_label": st.replace("_", " ").title(),  # e.g. IN_PROGRESS -> In Progress
-                "tasks": items
-            })
-
-        grouped_tasks.append({
-            "priority": pr,
-            "statuses": statuses
-        })
-
-    remaining_priorities = sorted({_p(t) for t in tasks if _p(t) and _p(t) not in handled_priorities})
-    for pr in remaining_priorities:
-        pr_tasks = [t for t in tasks if _p(t) == pr]
-        status_map = OrderedDict()
-        for t in pr_tasks:
-            st = _s(t) or "UNSPECIFIED"
-            status_map.setdefault(st, []).append(t)
-
-        statuses = [{
-            "status": st,
-            "status_label": st.replace("_", " ").title(),
-            "tasks": items
-        } for st, items in status_map.items()]
-
-        grouped_tasks.append({"priority": pr, "statuses": statuses})
-
-    no_priority_tasks = [t for t in tasks if not _p(t)]
-    if no_priority_tasks:
-        status_map = OrderedDict()
-        for t in no_priority_tasks:
-            st = _s(t) or "UNSPECIFIED"
-            status_map.setdefault(st, []).append(t)
-        statuses = [{
-            "status": st,
-            "status_label": st.replace("_", " ").title(),
-            "tasks": items
-        } for st, items in status_map.items()]
-        grouped_tasks.append({"priority": "UNSPECIFIED", "statuses": statuses})
-
-    context = {"grouped_tasks": grouped_tasks}
+    grouped = cached_for_user(
+        request.user.pk, "board", lambda: render_board(grouped_tasks(Task.objects.for_user(request.user))),
+    )
+    context = {"grouped_tasks": grouped, "live_updates": push.supported(request)}
     return render(request, "taskhero/task_list.html", context)
 
 
+@query_budget(4)
+@login_required
+def task_column(request):
+    """Load more cards for one priority/status column. GET ?priority=&status=&cursor="""
+    priority = request.GET.get("priority", "")
+    status = request.GET.get("status", "")
+    try:
+        tasks, next_cursor = board_column(Task.objects.for_user(request.user), priority, status, request.GET.get("cursor"))
+    except InvalidCursor as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    return JsonResponse({"ok": True, "html": "".join(render_cards(tasks)), "next_cursor": next_cursor})
+
+
+
+
+
+
+
+# 📡 Live board updates
+PUSH_KEEPALIVE = 15  # seconds between keep-alive comments
+PUSH_STREAM_TTL = 300  # end the stream now and then; EventSource reconnects on its own
+
+@query_budget(3)
+@login_required
+async def task_events(request):
+    """Server-Sent Events with diffs of the user's board (see taskhero/push.py)."""
+    if not push.supported(request):
+        return HttpResponse(status=204)  # no live updates under WSGI; EventSource won't reconnect
+    channel = push.channel_for((await request.auser()).pk)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + PUSH_STREAM_TTL
+        async with push.get_broker().subscribe(channel) as subscription:
+            yield "retry: 3000\n\n"
+            while loop.time() < deadline:
+                message = await subscription.get(PUSH_KEEPALIVE)
+                yield ": keep-alive\n\n" if message is None else f"event: board\ndata: {message}\n\n"
+
+    return _sse_response(events())
+
+
+# 📦 Bulk actions
+BULK_ACTIONS = {
+    "complete": "marked completed",
+    "status": "status changed to {value}",
+    "priority": "priority changed to {value}",
+    "delete": None,
+}
+
+@query_budget(15)
+@login_required
+@require_POST
+def task_bulk(request):
+    """
+    Apply one action to many tasks in a single query.
+    POST JSON: {action: complete|status|priority|delete, ids: [int], value(for status/priority): str}
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        action = payload.get("action")
+        ids = [int(pk) for pk in payload.get("ids") or []]
+        value = payload.get("value")
+    except Exception:
+        return JsonResponse({"ok": False, "error": "Invalid JSON"}, status=400)
+
+    if action not in BULK_ACTIONS:
+        return JsonResponse({"ok": False, "error": "Unknown action"}, status=400)
+    if not ids:
+        return JsonResponse({"ok": False, "error": "ids required"}, status=400)
+    if action == "status" and value not in dict(Task.STATUS_CHOICES):
+        return JsonResponse({"ok": False, "error": "Invalid status"}, status=400)
+    if action == "priority" and value not in dict(Task.PRIORITY_CHOICES):
+        return JsonResponse({"ok": False, "error": "Invalid priority"}, status=400)
+
+    tasks = Task.objects.for_user(request.user).filter(pk__in=ids)
+    rows = list(tasks.values_list("pk", "title", named=True))
+    if action == "delete":
+        for row in rows:
+            activity.record(row, activity.DELETED, request.user, link=False)
+        count = tasks.bulk_delete()
+        return JsonResponse({"ok": True, "count": count})
+
+    if action == "complete":
+        count = tasks.complete()
+    elif action == "status":
+        count = tasks.set_status(value)
+    else:
+        count = tasks.set_priority(value)
+
+    label = BULK_ACTIONS[action].format(value=value)
+    for row in rows:
+        activity.record(row, label, request.user)
+    return JsonResponse({"ok": True, "count": count})
+
 
+# 📤 Export / 📥 Import
+@query_budget(3)
+@login_required
+def task_export(request):
+    """Stream the user's tasks. GET ?format=csv|ndjson"""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in transfer.FORMATS:
+        return HttpResponseBadRequest("Unknown format")
+    export = transfer.aexport_tasks if push.supported(request) else transfer.export_tasks
+    response = StreamingHttpResponse(
+        export(Task.objects.for_user(request.user), fmt),
+        content_type=transfer.CONTENT_TYPES[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="tasks.{fmt}"'
+    return response
+
+@query_budget(None)  # one INSERT per batch, so it grows with the file
+@login_required
+@require_POST
+def task_import(request):
+    """POST multipart: file (CSV or NDJSON), format(optional, defaults to the file extension)"""
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"ok": False, "error": "file required"}, status=400)
+    fmt = request.POST.get("format") or ("ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in transfer.FORMATS:
+        return JsonResponse({"ok": False, "error": "Unknown format"}, status=400)
 
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8", errors="replace", newline="")
+    result = transfer.import_tasks(request.user, transfer.read_rows(stream, fmt))
+    return JsonResponse({"ok": True, **result})
 
 
+# 🔎 Search
+SEARCH_MAX_RESULTS = 50
+SEARCH_MAX_QUERY_LENGTH = 200  # every word is another MATCH term
+
+@query_budget(6)
+@login_required
+def search(request):
+    """Ranked full-text search over the user's tasks and saved prompts. GET ?q=&limit="""
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = min(int(request.GET.get("limit", 20)), SEARCH_MAX_RESULTS)
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid limit"}, status=400)
+    if not query:
+        return JsonResponse({"ok": True, "tasks": [], "prompts": []})
+    if len(query) > SEARCH_MAX_QUERY_LENGTH:
+        return JsonResponse({"ok": False, "error": "Query too long"}, status=400)
+
+    backend = get_search_backend()
+    tasks = backend.search(Task.objects.for_user(request.user), query, limit)
+    prompts = backend.search(SavedPrompt.objects.filter(owner=request.user), query, limit)
+    return JsonResponse({
+        "ok": True,
+        "tasks": [{
+            "id": t.id, "title": t.title, "status": t.status, "priority": t.priority,
+            "due_date": t.due_date.isoformat() if t.due_date else None, "score": t.search_score,
+        } for t in tasks],
+        "prompts": [{"id": p.id, "title": p.title, "score": p.search_score} for p in prompts],
+    })
+
+
+def _wants_json(request):
+    """Fetch calls from the board ask for JSON instead of a redirect; the
+    board itself is patched by the push stream (``task_events``)."""
+    return request.headers.get("Accept", "").startswith("application/json")
+
 
 # ➕ Create
+@query_budget(23)  # includes a missing stats row and change counter, and a repeating task's first window
 @login_required
 def task_create(request):
     if request.method == "POST":
-        form = TaskForm(request.POST)
+        form = TaskCreateForm(request.POST)
         if form.is_valid():
             task = form.save(commit=False)
             task.owner = request.user
-            task.save()
+            if form.cleaned_data["repeat"]:
+                recurrence.start(task, form.cleaned_data["repeat"])
+            else:
+                task.save()
+            activity.record(task, activity.CREATED, request.user)
+            if _wants_json(request):
+                return JsonResponse({"ok": True, "id": task.pk}, status=201)
             return redirect('taskhero:task_list')
+        if _wants_json(request):
+            return JsonResponse({"ok": False, "errors": form.errors.get_json_data()}, status=400)
     else:
-        form = TaskForm()
+        form = TaskCreateForm()
     return render(request, "taskhero/task_form.html", {"form": form, "title": "Add Task"})
 
 # ✏️ Update
+@query_budget(11)  # includes pushing the card to open tabs
 @login_required
 def task_update(request, pk):
     task = get_object_or_404(Task, pk=pk, owner=request.user)
@@ -156,17 +278,29 @@ def task_update(request, pk):
         form = TaskForm(request.POST, instance=task)
         if form.is_valid():
             form.save()
+            activity.record(task, activity.EDITED, request.user)
+            if _wants_json(request):
+                return JsonResponse({"ok": True, "id": task.pk})
             return redirect('taskhero:task_list')
+        if _wants_json(request):
+            return JsonResponse({"ok": False, "errors": form.errors.get_json_data()}, status=400)
     else:
         form = TaskForm(instance=task)
     return render(request, "taskhero/task_form.html", {"form": form, "title": "Edit Task"})
 
 # ❌ Delete
+@query_budget(21)  # includes stopping a series and bulk-deleting its later occurrences
 @login_required
 def task_delete(request, pk):
     task = get_object_or_404(Task, pk=pk, owner=request.user)
     if request.method == "POST":
+        activity.record(task, activity.DELETED, request.user, link=False)
         task.delete()
+        if task.recurrence_id and task.due_date and request.POST.get("series"):
+            # "and the rest of the series": it now ends the day before this one
+            recurrence.stop(task.recurrence, task.due_date - datetime.timedelta(days=1))
+        if _wants_json(request):
+            return JsonResponse({"ok": True})
         return redirect('taskhero:task_list')
     return render(request, "taskhero/task_confirm_delete.html", {"task": task})
 
@@ -174,6 +308,7 @@ def task_delete(request, pk):
 
 
 # 🧾 SIGN UP
+@query_budget(10)
 def signup_view(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST)
@@ -187,6 +322,7 @@ def signup_view(request):
     return render(request, 'auth/signup.html', {'form': form})
 
 # 🔐 LOGIN
+@query_budget(8)
 def login_view(request):
     if request.method == 'POST':
         username = request.POST['username']
@@ -201,6 +337,7 @@ def login_view(request):
     return render(request, 'auth/login.html')
 
 # 🚪 LOGOUT
+@query_budget(5)
 @login_required
 def logout_view(request):
     logout(request)
@@ -208,12 +345,24 @@ def logout_view(request):
     return redirect('taskhero:login')
 
 # 📊 DASHBOARD (User’s Task Area)
+DASHBOARD_PAGE_SIZE = 50
+
+@query_budget(9)  # includes building a missing stats row and looking up an uncached time zone
 @login_required
 def dashboard_view(request):
-    tasks = Task.objects.for_user(request.user)
-    for i in tasks:
-        print(i)
-    return render(request, 'taskhero/dashboard.html', {'tasks': tasks})
+    cursor = request.GET.get("cursor")
+
+    def page():
+        return paginate(Task.objects.for_user(request.user).row(), TASK_KEYSET, cursor, DASHBOARD_PAGE_SIZE)
+
+    try:
+        # Only the first page is cached: later pages are cheap keyset reads, and
+        # keying on the client's cursor would let anyone fill the cache.
+        tasks, next_cursor = page() if cursor else cached_for_user(request.user.pk, "dashboard", page)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    stats = get_stats(request.user)
+    return render(request, 'taskhero/dashboard.html', {'tasks': tasks, 'next_cursor': next_cursor, 'stats': stats})
 
 
 
@@ -221,37 +370,66 @@ def dashboard_view(request):
 
 
 
+@query_budget(4)
 @login_required
-def generate_task_ai(request):
+async def generate_task_ai(request):
+    """GET renders the generator; POST streams the model's reply as Server-Sent Events."""
     if request.method == "POST":
         prompt = request.POST.get("prompt", "")
-        user = request.user.username
+        user = (await request.auser()).username
 
-        ollama_url = "http://localhost:11434/api/generate"
-        payload = {
-            "model": "llama3",  # or mistral, phi3, etc.
-            "prompt": f"Generate a list of tasks for user {user} based on: {prompt}. "
-                      f"Each task should include a title, short description, priority, and status."
-        }
+        ai_prompt = (
+            f"Generate a list of tasks for user {user} based on: {prompt}. "
+            f"Each task should include a title, short description, priority, and status."
+        )
+        if request.POST.get("background"):
+            return await _enqueue_response(request, ai_prompt)
+        return _sse_response(ollama.sse_tokens(ai_prompt))
+    return await sync_to_async(render)(request, "taskhero/generate_task_ai.html")
 
-        response = requests.post(ollama_url, json=payload, stream=True)
-        output = ""
-        for line in response.iter_lines():
-            if line:
-                data = line.decode("utf-8")
-                if '"response":' in data:
-                    output += data.split('"response":')[1].split('"')[1]
 
-        return JsonResponse({"response": output.strip()})
-    return render(request, "taskhero/generate_task_ai.html")
+@query_budget(12)
+@login_required
+@require_POST
+async def generate_tasks_ai(request):
+    """
+    Ask the model for a JSON task plan and save every valid task in one INSERT.
+    POST (form or JSON): {prompt: str, model(optional): str}
+    """
+    if request.content_type == "application/json":
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except Exception:
+            return JsonResponse({"ok": False, "error": "Invalid JSON"}, status=400)
+    else:
+        payload = request.POST
+    prompt = (payload.get("prompt") or "").strip()
+    if not prompt:
+        return JsonResponse({"ok": False, "error": "Empty prompt"}, status=400)
 
+    try:
+        result = await ollama.generate(ai_tasks.TASK_PLAN_PROMPT.format(prompt=prompt), payload.get("model"), format="json")
+        items = ai_tasks.parse_task_plan(result.text)
+    except ollama.OllamaError as e:
+        return JsonResponse({"ok": False, "error": f"Ollama error: {str(e)}"}, status=500)
+    except ai_tasks.TaskPlanError as e:
+        return JsonResponse({"ok": False, "error": str(e), "response": result.text}, status=502)
 
+    saved = await sync_to_async(ai_tasks.create_tasks)(await request.auser(), items)
+    return JsonResponse({"ok": True, **saved})
 
 
+def _sse_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let a proxy buffer the stream
+    return response
 
-OLLAMA_API = "http://localhost:11434/api/generate"  # adjust if different
-DEFAULT_MODEL = "llama3"
 
+
+
+
+@query_budget(4)
 @login_required
 def prompt_store_page(request):
     """
@@ -263,6 +441,7 @@ def prompt_store_page(request):
     default_prompt = "Generate a task with title, description, priority (HIGH/MEDIUM/LOW), status (TODO/IN_PROGRESS/COMPLETED), due_date YYYY-MM-DD."
     return render(request, "taskhero/prompt_store.html", {"prompts": prompts, "default_prompt": default_prompt})
 
+@query_budget(5)
 @login_required
 @require_POST
 def save_prompt(request):
@@ -288,6 +467,7 @@ def save_prompt(request):
 
     return JsonResponse({"ok": True, "prompt": {"id": saved.id, "title": saved.title, "prompt": saved.prompt, "updated_at": saved.updated_at.isoformat()}})
 
+@query_budget(5)
 @login_required
 @require_POST
 def delete_prompt(request):
@@ -303,40 +483,126 @@ def delete_prompt(request):
     saved.delete()
     return JsonResponse({"ok": True})
 
+@query_budget(4)
 @login_required
 @require_POST
-def run_prompt(request):
+async def run_prompt(request):
     """
-    Run a prompt through Ollama and return the text. 
-    POST JSON: {prompt: str, model(optional): str}
+    Run a prompt through Ollama and return the text.
+    POST JSON: {prompt: str, model(optional): str, options(optional): dict,
+                stream(optional): bool, bypass_cache(optional): bool}
+    With stream=true the reply is sent as Server-Sent Events instead of JSON;
+    with background=true it is queued and a job id is returned at once (202).
+    Replies are cached per (model, prompt, options); "cache" reports hit/miss/bypass.
     """
     try:
         payload = json.loads(request.body.decode("utf-8"))
         prompt_text = payload.get("prompt", "").strip()
-        model = payload.get("model", DEFAULT_MODEL)
+        model = payload.get("model") or ollama.default_model()
+        options = payload.get("options")
+        bypass_cache = bool(payload.get("bypass_cache"))
     except Exception:
         return JsonResponse({"ok": False, "error": "Invalid JSON"}, status=400)
 
     if not prompt_text:
         return JsonResponse({"ok": False, "error": "Empty prompt"}, status=400)
+    if options is not None and not isinstance(options, dict):
+        return JsonResponse({"ok": False, "error": "options must be an object"}, status=400)
+
+    if payload.get("background"):
+        return await _enqueue_response(request, prompt_text, model, options)
+    if payload.get("stream"):
+        return _sse_response(ollama.sse_tokens(prompt_text, model, options, use_cache=True, bypass_cache=bypass_cache))
 
     try:
-        # call Ollama (simple approach)
-        resp = requests.post(OLLAMA_API, json={"model": model, "prompt": prompt_text}, stream=False, timeout=20)
-        resp.raise_for_status()
-        # Ollama returns JSON or streaming chunks — handle simple JSON body
-        try:
-            data = resp.json()
-            # If your Ollama output uses a key like 'response' or 'text', adapt accordingly
-            if isinstance(data, dict):
-                # Try common keys
-                output = data.get("response") or data.get("text") or data.get("output") or json.dumps(data)
-            else:
-                output = str(data)
-        except Exception:
-            output = resp.text
-    except Exception as e:
-        # fallback: return error (or a simple local generator)
+        text, stats, cache = await ollama.cached_generate(prompt_text, model, options, bypass_cache)
+    except ollama.OllamaError as e:
         return JsonResponse({"ok": False, "error": f"Ollama error: {str(e)}"}, status=500)
 
-    return JsonResponse({"ok": True, "response": output})
+    return JsonResponse({"ok": True, "response": text, "stats": stats, "cache": cache})
+
+
+
+# ⏳ Background generation jobs
+JOB_POLL_INTERVAL = 0.5
+
+async def _enqueue_response(request, prompt, model=None, options=None):
+    job = await sync_to_async(jobs.enqueue)(await request.auser(), prompt, model, options)
+    return JsonResponse({"ok": True, "job": jobs.job_json(job)}, status=202)
+
+@query_budget(4)
+@login_required
+@require_POST
+async def job_create(request):
+    """Queue a generation. POST JSON: {prompt: str, model(optional): str, options(optional): dict}"""
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        prompt_text = payload.get("prompt", "").strip()
+        options = payload.get("options")
+    except Exception:
+        return JsonResponse({"ok": False, "error": "Invalid JSON"}, status=400)
+    if not prompt_text:
+        return JsonResponse({"ok": False, "error": "Empty prompt"}, status=400)
+    if options is not None and not isinstance(options, dict):
+        return JsonResponse({"ok": False, "error": "options must be an object"}, status=400)
+    return await _enqueue_response(request, prompt_text, payload.get("model"), options)
+
+@query_budget(4)
+@login_required
+def job_detail(request, pk):
+    job = get_object_or_404(GenerationJob, pk=pk, owner=request.user)
+    return JsonResponse({"ok": True, "job": jobs.job_json(job)})
+
+@query_budget(4)
+@login_required
+async def job_stream(request, pk):
+    """Server-Sent Events for one job: ``token`` events with new output, then ``done`` or ``error``."""
+    owner = await request.auser()
+    job = await GenerationJob.objects.filter(pk=pk, owner=owner).only("pk").afirst()
+    if job is None:
+        return JsonResponse({"ok": False, "error": "Not found"}, status=404)
+
+    async def events():
+        sent = 0
+        while True:
+            job = await GenerationJob.objects.aget(pk=pk)
+            if len(job.result) > sent:
+                yield ollama.sse("token", {"token": job.result[sent:]})
+                sent = len(job.result)
+            if job.status == GenerationJob.STATUS_SUCCEEDED:
+                yield ollama.sse("done", {"stats": job.stats})
+                return
+            if job.status == GenerationJob.STATUS_FAILED:
+                yield ollama.sse("error", {"error": job.error})
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    return _sse_response(events())
+
+
+
+# 🕘 Activity feed
+@query_budget(4)
+@login_required
+def activity_feed(request):
+    """The user's task events, newest first. GET ?cursor="""
+    try:
+        events, next_cursor = activity.feed(request.user, request.GET.get("cursor"))
+    except InvalidCursor as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+    return JsonResponse({
+        "ok": True,
+        "events": [{
+            "id": e.pk, "action": e.action, "task_id": e.task_id, "task_title": e.task_title,
+            "created_at": e.created_at.isoformat(),
+        } for e in events],
+        "next_cursor": next_cursor,
+    })
+
+
+# 📈 Performance report (staff only)
+@query_budget(3)
+@staff_member_required
+def perf_report(request):
+    """Per-URL-name latency percentiles (ms) recorded by PerformanceMiddleware."""
+    return JsonResponse({"ok": True, "views": instrumentation.report()})